@@ -3,13 +3,39 @@ import datetime
 import re
 import requests
 import json
+import hashlib
+import email.utils
+import gzip
+import html as html_lib
+import sqlite3
+import socket
+import time
+import weakref
+import asyncio
+import argparse
+import difflib
+import math
+import mimetypes
+import random
+import signal
+import sys
+import textwrap
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from urllib.parse import unquote
+from xml.sax.saxutils import escape as xml_escape, quoteattr as xml_quoteattr
 
 # ===== AI imports =====
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
 except ImportError:
     OpenAI = None
+    AsyncOpenAI = None
 
 try:
     import google.generativeai as genai
@@ -17,12 +43,32 @@ try:
 except ImportError:
     genai = None
 
+# ===== Optional imports =====
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 # ===== Config =====
 TEMPLATE_FILE = "blog/TEMPLATE.html"
 BLOG_DIR = "blog"
 INDEX_FILE = "blog/index.html"
 TOPICS_FILE = "blog/topics.md"
 
+OPENAI_MODEL = "gpt-4o-mini"
+OPENAI_STRONG_MODEL = "gpt-4o"
+GEMINI_MODEL = "gemini-2.5-flash-preview-05-20"
+
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 SLACK_WEBHOOK_URL = os.environ.get("SLACK_WEBHOOK_URL")
@@ -33,8 +79,6 @@ print(f"   OpenAI: {'✅ Configured' if OPENAI_API_KEY else '❌ Not configured'
 print(f"   Gemini: {'✅ Configured' if GEMINI_API_KEY else '❌ Not configured'}")
 print(f"   Slack: {'✅ Configured' if SLACK_WEBHOOK_URL else '❌ Not configured'}")
 
-# OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
 # Gemini client configuration
 if GEMINI_API_KEY and genai:
     genai.configure(api_key=GEMINI_API_KEY)
@@ -42,248 +86,3220 @@ if GEMINI_API_KEY and genai:
 else:
     print("❌ Gemini client not configured (missing API key or library)")
 
-# ===== Functions =====
+# ===== Provider clients =====
+# Each provider client is built once and keeps a pool of keep-alive
+# connections. warm_provider_clients() opens them (TCP + TLS) in the
+# background while the run is still loading its topic and template.
+HTTP2 = os.environ.get("BLOG_HTTP2", "0") == "1"
+HTTP_MAX_CONNECTIONS = 20
+HTTP_KEEPALIVE_CONNECTIONS = 10
+HTTP_KEEPALIVE_EXPIRY = 120
+connection_stats = {"requests": 0, "connections": 0}
+# Weak, so a closed connection's id can't be mistaken for a new one's
+_seen_streams = weakref.WeakSet()
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> AsyncOpenAI
+_gemini_models = {}
+_warm_thread = None
 
-def get_next_topic():
-    """Read the first topic from topics.md"""
-    if not Path(TOPICS_FILE).exists():
-        print(f"Error: {TOPICS_FILE} not found.")
-        return None
+def http2_enabled():
+    """HTTP/2 when requested and the h2 package is installed"""
+    if not HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        print("⚠️ BLOG_HTTP2=1 but h2 is not installed (pip install 'httpx[http2]'); using HTTP/1.1")
+        return False
 
-    with open(TOPICS_FILE, "r") as f:
-        topics = [line.strip() for line in f if line.strip()]
-    if not topics:
-        return None
-    
-    return topics[0], topics[1:]
+def _track_connection(response):
+    """Count requests and the distinct connections that carried them"""
+    connection_stats["requests"] += 1
+    stream = response.extensions.get("network_stream")
+    if stream is not None and stream not in _seen_streams:
+        _seen_streams.add(stream)
+        connection_stats["connections"] += 1
 
-def update_topics_file(remaining_topics):
-    """Save remaining topics back to topics.md"""
-    with open(TOPICS_FILE, "w") as f:
-        for topic in remaining_topics:
-            f.write(topic + "\n")
+async def _track_connection_async(response):
+    _track_connection(response)
 
-def generate_blog_with_gemini(prompt: str):
-    """Fallback to Gemini AI to generate blog content."""
-    if not genai:
-        print("❌ Gemini AI library not imported.")
+def build_http_client(async_mode=False):
+    """A pooled keep-alive httpx client for a provider SDK, or None without httpx"""
+    if httpx is None:
         return None
-    
-    if not GEMINI_API_KEY:
-        print("❌ Gemini API key not configured.")
+    options = {
+        "http2": http2_enabled(),
+        "limits": httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                               max_keepalive_connections=HTTP_KEEPALIVE_CONNECTIONS,
+                               keepalive_expiry=HTTP_KEEPALIVE_EXPIRY),
+        "timeout": httpx.Timeout(600.0, connect=10.0),
+        "follow_redirects": True
+    }
+    if async_mode:
+        return httpx.AsyncClient(event_hooks={"response": [_track_connection_async]}, **options)
+    return httpx.Client(event_hooks={"response": [_track_connection]}, **options)
+
+def openai_available(async_mode=False):
+    return bool(OPENAI_API_KEY and (AsyncOpenAI if async_mode else OpenAI))
+
+def openai_async_client():
+    """The async client for the running event loop (pooled connections can't cross loops)"""
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        _async_clients[loop] = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=build_http_client(async_mode=True))
+    return _async_clients[loop]
+
+async def close_async_clients():
+    """Close the running loop's async client and its pooled connections before the loop ends"""
+    async_client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if async_client is not None:
+        await async_client.close()  # aclose()s the httpx pool
+
+def gemini_model(model_name):
+    """One GenerativeModel per model name, reusing its gRPC channel"""
+    if model_name not in _gemini_models:
+        _gemini_models[model_name] = genai.GenerativeModel(model_name)
+    return _gemini_models[model_name]
+
+def _warm_openai():
+    client.with_options(max_retries=0, timeout=10).models.retrieve(OPENAI_MODEL)
+
+def _warm_gemini():
+    gemini_model(GEMINI_MODEL).count_tokens("ping")
+
+def warm_provider_clients():
+    """Open provider connections in a background thread, once per process"""
+    global _warm_thread
+    if _warm_thread is not None:
+        return _warm_thread
+
+    def warm():
+        started = time.monotonic()
+        warmed = []
+        for name, available, warm_up in [("OpenAI", client is not None, _warm_openai),
+                                         ("Gemini", bool(genai and GEMINI_API_KEY), _warm_gemini)]:
+            if not available:
+                continue
+            try:
+                warm_up()
+                warmed.append(name)
+            except Exception as e:
+                print(f"⚠️ Could not warm {name} connection: {e}")
+        if warmed:
+            print(f"🔌 Warmed {', '.join(warmed)} connections in {time.monotonic() - started:.2f}s")
+
+    _warm_thread = threading.Thread(target=warm, name="warm-provider-clients", daemon=True)
+    _warm_thread.start()
+    return _warm_thread
+
+async def warm_async_clients():
+    """Open the async OpenAI pool on the running loop"""
+    if not openai_available(async_mode=True):
+        return
+    try:
+        await openai_async_client().with_options(max_retries=0, timeout=10).models.retrieve(OPENAI_MODEL)
+    except Exception as e:
+        print(f"⚠️ Could not warm async OpenAI connection: {e}")
+
+def connection_report():
+    """Print how many provider requests reused an open connection"""
+    requests_made, connections = connection_stats["requests"], connection_stats["connections"]
+    if not requests_made:
+        return
+    reused = requests_made - connections
+    print(f"🔌 OpenAI HTTP: {requests_made} request(s) over {connections} connection(s), "
+          f"{reused} reused ({reused / requests_made:.0%}){' via HTTP/2' if http2_enabled() else ''}")
+    if _gemini_models:
+        print(f"🔌 Gemini: {len(_gemini_models)} cached model client(s)")
+
+client = OpenAI(api_key=OPENAI_API_KEY, http_client=build_http_client()) if openai_available() else None
+
+# ===== Run journal =====
+# Every run writes a journal of completed stages so a failed run can resume
+# where it stopped instead of losing the post or paying for a new generation.
+STATE_DIR = ".blog_state"
+JOURNAL_DIR = f"{STATE_DIR}/journal"
+PIPELINE_STAGES = ["generate", "parse", "render", "slack", "save", "topics", "index", "git", "verify"]
+
+def write_json_atomic(path, data):
+    """Write JSON to a temp file and rename it into place"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "w", encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def start_journal(topic):
+    """Create a new journal for a run on the given topic"""
+    slug = re.sub(r'[^a-z0-9]+', '-', topic.lower()).strip('-')[:40] or "topic"
+    run_id = f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}-{slug}"
+    journal = {
+        "run_id": run_id,
+        "topic": topic,
+        "status": "running",
+        "created_at": datetime.datetime.now().isoformat(),
+        "stages": {}
+    }
+    save_journal(journal)
+    print(f"📓 Started run journal: {run_id}")
+    return journal
+
+def save_journal(journal):
+    """Persist the journal for this run"""
+    write_json_atomic(Path(JOURNAL_DIR) / f"{journal['run_id']}.json", journal)
+
+def find_incomplete_journal(topic=None):
+    """Return the oldest journal (optionally for a topic) that did not reach the final stage"""
+    journal_dir = Path(JOURNAL_DIR)
+    if not journal_dir.exists():
         return None
 
+    for path in sorted(journal_dir.glob("*.json")):
+        try:
+            with open(path, "r", encoding='utf-8') as f:
+                journal = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Skipping unreadable journal {path}: {e}")
+            continue
+        if topic is not None and journal.get("topic") != topic:
+            continue
+        if journal.get("status") != "complete":
+            return journal
+    return None
+
+def stage_done(journal, stage):
+    """Check whether a stage was completed in a previous attempt"""
+    if not journal:
+        return False
+    return journal["stages"].get(stage, {}).get("status") == "done"
+
+def stage_started(journal, stage):
+    """Check whether a stage was started but never recorded as done"""
+    if not journal:
+        return False
+    return journal["stages"].get(stage, {}).get("status") == "started"
+
+def stage_artifact(journal, stage, key, default=None):
+    """Read an artifact recorded by a completed stage"""
+    return journal["stages"].get(stage, {}).get("artifacts", {}).get(key, default)
+
+def begin_stage(journal, stage):
+    """Record that a stage is about to run (write-ahead)"""
+    if journal is None:
+        return
+    journal["stages"][stage] = {
+        "status": "started",
+        "started_at": datetime.datetime.now().isoformat()
+    }
+    save_journal(journal)
+
+def complete_stage(journal, stage, **artifacts):
+    """Record a completed stage together with its artifacts"""
+    if journal is None:
+        return
+    entry = journal["stages"].setdefault(stage, {})
+    entry["status"] = "done"
+    entry["completed_at"] = datetime.datetime.now().isoformat()
+    entry["artifacts"] = artifacts
+    save_journal(journal)
+
+def finish_journal(journal):
+    """Mark the run as complete so it is never resumed"""
+    journal["status"] = "complete"
+    journal["completed_at"] = datetime.datetime.now().isoformat()
+    save_journal(journal)
+    print(f"📓 Run journal {journal['run_id']} complete")
+
+# ===== Output manifest =====
+# Site files are written through write_output(), which skips writes whose
+# content hash matches the manifest and records what changed for the deploy.
+# The manifest lives in SQLite so concurrent workers and the daemon don't lose
+# each other's updates. A changed file stays pending, and stays in the deploy
+# manifest, until a commit containing it succeeds, even across failed or
+# resumed runs.
+OUTPUT_MANIFEST_DB = f"{STATE_DIR}/outputs.db"
+LEGACY_OUTPUT_MANIFEST_FILE = "output-manifest.json"
+DEPLOY_MANIFEST_FILE = f"{STATE_DIR}/deploy-manifest.json"
+
+@contextmanager
+def output_store():
+    """Open the output manifest database in WAL mode"""
+    Path(OUTPUT_MANIFEST_DB).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(OUTPUT_MANIFEST_DB, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
     try:
-        print("🔑 Using Gemini API key:", GEMINI_API_KEY[:10] + "..." if GEMINI_API_KEY else "None")
-        
-        # Create a more comprehensive prompt for Gemini to generate detailed content
-        comprehensive_prompt = f"""
-Generate a comprehensive, detailed blog post about: {topic}
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS outputs (
+                path TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                etag TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER,
+                pending INTEGER NOT NULL DEFAULT 0,
+                changed_at REAL
+            )
+        """)
+        if os.path.abspath(OUTPUT_MANIFEST_DB) not in _output_stores_ready:
+            _output_stores_ready.add(os.path.abspath(OUTPUT_MANIFEST_DB))
+            import_legacy_output_manifest(conn)
+        yield conn
+    finally:
+        conn.close()
 
-Return ONLY a valid JSON object with this structure:
-{{
-    "title": "Detailed Blog Title",
-    "description": "Comprehensive description of what this blog post covers",
-    "sections": [
-        {{
-            "heading": "Introduction",
-            "content": "Write 3-4 detailed paragraphs introducing the topic, explaining its importance, and setting the context for readers. Make this engaging and informative.",
-            "code_examples": ["const allocateResources = (demand) => {{ return Math.min(demand * 1.5, MAX_RESOURCES); }};", "const monitorPerformance = () => {{ return {{ latency: measureLatency(), throughput: measureThroughput() }}; }};"]
-        }},
-        {{
-            "heading": "Core Concepts and Fundamentals",
-            "content": "Write 4-5 detailed paragraphs explaining the fundamental concepts, principles, and underlying mechanisms. Break down complex ideas into digestible parts with clear explanations.",
-            "code_examples": ["const allocateResources = (demand) => {{ return Math.min(demand * 1.5, MAX_RESOURCES); }};", "const monitorPerformance = () => {{ return {{ latency: measureLatency(), throughput: measureThroughput() }}; }};"]
-        }},
-        {{
-            "heading": "Implementation Strategies and Best Practices",
-            "content": "Write 4-5 detailed paragraphs covering practical implementation approaches, common patterns, best practices, and real-world considerations. Include specific guidance and actionable advice.",
-            "code_examples": ["const isFeatureEnabled = (featureName, userId) => {{ const feature = getFeatureConfig(featureName); return feature.enabled && hashUserId(userId) % 100 < feature.rolloutPercentage; }};", "const handleOperation = async (op) => {{ try {{ const result = await op(); logSuccess(op.name, result); return result; }} catch (error) {{ logError(op.name, error); throw error; }} }};"]
-        }},
-        {{
-            "heading": "Advanced Techniques and Optimization",
-            "content": "Write 3-4 detailed paragraphs covering advanced techniques, performance optimization strategies, scalability considerations, and cutting-edge approaches in this field.",
-            "code_examples": ["const predictScaling = (data) => {{ const patterns = analyzePatterns(data); return applyMLModel(patterns); }};", "const autoRespond = (issue) => {{ const response = determineResponse(issue); if (response.automated) {{ executeResponse(response.action); }} else {{ escalateToHuman(issue); }} }};"]
-        }},
-        {{
-            "heading": "Real-World Applications and Case Studies",
-            "content": "Write 3-4 detailed paragraphs discussing real-world applications, industry use cases, success stories, and lessons learned from practical implementations.",
-            "code_examples": ["const deployWithRollback = async (version) => {{ const health = await monitorHealth(); if (health.failing > THRESHOLD) {{ await rollback(); return false; }} return true; }};", "const generateDashboard = (metrics) => {{ return {{ status: getStatus(), alerts: getAlerts(), recommendations: generateRecs(metrics) }}; }};"]
-        }},
-        {{
-            "heading": "Conclusion and Future Considerations",
-            "content": "Write 2-3 detailed paragraphs summarizing key takeaways, discussing future trends, and providing guidance on next steps for readers.",
-            "code_examples": []
-        }}
-    ],
-    "tags": ["Serverless", "Cloud Computing", "Performance", "Architecture", "Best Practices"],
-    "read_time": 12
-}}
+_output_stores_ready = set()
 
-IMPORTANT: 
-- Return ONLY valid JSON, no other text
-- Make each section comprehensive and detailed
-- Aim for 15-20 total paragraphs across all sections
-- Include specific, actionable insights and examples
-- Write content that provides real value to readers
-- For code_examples: Provide actual working code snippets, NOT placeholder comments like "// Example: ..."
-- Code should be real, functional examples that readers can use
-- Avoid generic placeholders - write specific, meaningful code
-"""
-        
-        model = genai.GenerativeModel('gemini-2.5-flash-preview-05-20')
-        response = model.generate_content(
-            comprehensive_prompt,
-            generation_config=GenerationConfig(
-                temperature=0.4,  # Slightly higher for more creative content
-                max_output_tokens=8000,  # Significantly increased token limit
-                top_p=0.9,  # Add top_p for better content diversity
-                top_k=40    # Add top_k for better content selection
+def import_legacy_output_manifest(conn):
+    """Seed an empty manifest from the JSON manifest earlier versions kept"""
+    legacy = Path(OUTPUT_MANIFEST_DB).parent / LEGACY_OUTPUT_MANIFEST_FILE
+    if not legacy.exists() or conn.execute("SELECT 1 FROM outputs LIMIT 1").fetchone():
+        return
+    try:
+        with open(legacy, "r", encoding='utf-8') as f:
+            files = json.load(f).get("files", {})
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ Not importing {legacy}: {e}")
+        return
+    conn.executemany(
+        "INSERT OR IGNORE INTO outputs (path, sha256, etag, size, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+        [(path, entry["sha256"], entry["etag"], entry["size"], entry.get("mtime_ns"))
+         for path, entry in files.items()]
+    )
+    print(f"📥 Imported {len(files)} output(s) from {legacy}")
+
+def output_entry(key):
+    with output_store() as conn:
+        row = conn.execute("SELECT * FROM outputs WHERE path = ?", (key,)).fetchone()
+    return dict(row) if row else None
+
+def record_output(key, fingerprint, mtime_ns, changed):
+    """Store a file's fingerprint; a change marks it pending until committed"""
+    with output_store() as conn:
+        conn.execute(
+            """INSERT INTO outputs (path, sha256, etag, size, mtime_ns, pending, changed_at)
+               VALUES (:path, :sha256, :etag, :size, :mtime_ns, :pending, :changed_at)
+               ON CONFLICT(path) DO UPDATE SET sha256 = excluded.sha256, etag = excluded.etag,
+                   size = excluded.size, mtime_ns = excluded.mtime_ns,
+                   pending = MAX(outputs.pending, excluded.pending),
+                   changed_at = COALESCE(excluded.changed_at, outputs.changed_at)""",
+            dict(fingerprint, path=key, mtime_ns=mtime_ns, pending=int(changed),
+                 changed_at=time.time() if changed else None)
+        )
+
+def content_fingerprint(data):
+    """Hash, S3-style ETag and size of some bytes"""
+    return {
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "etag": f'"{hashlib.md5(data).hexdigest()}"',
+        "size": len(data)
+    }
+
+def _file_matches(path, entry, sha256):
+    """Check the file on disk still holds the given content"""
+    stat = path.stat()
+    if entry and entry.get("sha256") == sha256 and stat.st_size == entry["size"] \
+            and stat.st_mtime_ns == entry.get("mtime_ns"):
+        return True
+    # Edited outside the pipeline (or unknown to the manifest): hash it
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest() == sha256
+
+def write_output(path, content):
+    """Write a site file unless its content is unchanged; returns True if written"""
+    path = Path(path)
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    fingerprint = content_fingerprint(data)
+    key = path.as_posix()
+    entry = output_entry(key)
+
+    if path.exists() and _file_matches(path, entry, fingerprint["sha256"]):
+        if not entry or entry.get("mtime_ns") != path.stat().st_mtime_ns:
+            record_output(key, fingerprint, path.stat().st_mtime_ns, changed=False)
+        print(f"⏩ Unchanged, not rewriting: {key}")
+        return False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+    record_output(key, fingerprint, path.stat().st_mtime_ns, changed=True)
+    return True
+
+def scan_outputs(root=None):
+    """Record every file under the site directory, noting those that changed"""
+    root = Path(root or BLOG_DIR)
+    for path in sorted(p for p in root.rglob("*") if p.is_file()):
+        if path.name.endswith(".tmp"):
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        fingerprint = content_fingerprint(data)
+        key = path.as_posix()
+        entry = output_entry(key)
+        changed = not entry or entry["sha256"] != fingerprint["sha256"]
+        record_output(key, fingerprint, path.stat().st_mtime_ns, changed)
+
+def pending_outputs():
+    with output_store() as conn:
+        rows = conn.execute(
+            "SELECT path, sha256, etag, size FROM outputs WHERE pending = 1 ORDER BY path"
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+def mark_outputs_deployed(paths):
+    """Clear pending outputs at or under paths, once a commit with them has succeeded"""
+    prefixes = [Path(path).as_posix().rstrip("/") for path in paths]
+    with output_store() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for prefix in prefixes:
+            conn.execute(
+                "UPDATE outputs SET pending = 0 WHERE pending = 1 AND (path = ? OR substr(path, 1, ?) = ?)",
+                (prefix, len(prefix) + 1, prefix + "/")
+            )
+        conn.execute("COMMIT")
+
+def write_deploy_manifest():
+    """Write every output changed since the last successful commit, for deploy/sync"""
+    changed = pending_outputs()
+    deploy_manifest = {
+        "generated_at": datetime.datetime.now().isoformat(),
+        "changed": changed
+    }
+    write_json_atomic(DEPLOY_MANIFEST_FILE, deploy_manifest)
+    print(f"📦 Deploy manifest: {len(changed)} changed file(s) -> {DEPLOY_MANIFEST_FILE}")
+    return deploy_manifest
+
+# ===== Topic queue =====
+# topics.md is the editable view; the SQLite queue is what workers pull from.
+# Leases let several processes work the backlog without taking the same topic.
+# Every change to the queued set rewrites topics.md in the same transaction,
+# so a queued topic missing from the file was deleted there by hand.
+QUEUE_DB = f"{STATE_DIR}/topics.db"
+LEASE_SECONDS = 30 * 60
+MAX_ATTEMPTS = 3
+
+@contextmanager
+def topic_queue():
+    """Open the topic queue database in WAL mode"""
+    Path(QUEUE_DB).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(QUEUE_DB, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS topics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL UNIQUE,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
             )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS topics_pending ON topics (status, priority DESC, id)")
+        yield conn
+    finally:
+        conn.close()
+
+def queue_worker_id():
+    """Identify this worker process in lease records"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def _queue_topic(conn, topic, priority, now):
+    """Insert a topic, or requeue one removed from topics.md; True if it is newly queued"""
+    cursor = conn.execute(
+        "INSERT OR IGNORE INTO topics (topic, priority, created_at, updated_at) VALUES (?, ?, ?, ?)",
+        (topic, priority, now, now)
+    )
+    if cursor.rowcount == 0:
+        cursor = conn.execute(
+            "UPDATE topics SET status = 'queued', priority = ?, updated_at = ? WHERE topic = ? AND status = 'removed'",
+            (priority, now, topic)
         )
-        
-        if response and response.parts:
-            content = response.text
-            print(f"✅ Gemini generated content: {len(content)} characters")
-            return content
-        else:
-            finish_reason = None
-            if hasattr(response, 'candidates') and response.candidates:
-                first_candidate = response.candidates[0]
-                if hasattr(first_candidate, 'finish_reason'):
-                    finish_reason = first_candidate.finish_reason
-
-            if finish_reason == 2:
-                print("❌ Gemini generated no readable text content. Response was likely blocked due to safety concerns or content policy.")
-            else:
-                print(f"❌ Gemini generated no readable text content. Finish reason: {finish_reason}.")
-            return None
-    except Exception as e:
-        print(f"❌ Gemini failed with error: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+    return cursor.rowcount == 1
 
-def generate_structured_content(topic):
-    """Generate structured content that's easier to format"""
-    prompt = f"""
-You are a technical blog writer. Generate a comprehensive, detailed blog post about: {topic}
+def enqueue_topic(topic, priority=0):
+    """Add a topic to the queue (and topics.md); returns False if it was already known"""
+    with topic_queue() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            added = _queue_topic(conn, topic, priority, time.time())
+            if added:
+                export_topics_file(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return added
 
-IMPORTANT: You must return ONLY a valid JSON object. No other text, no explanations, no markdown formatting.
+def import_topics_file():
+    """Sync the queue with topics.md: add new topics, remove queued ones deleted from the file"""
+    if not Path(TOPICS_FILE).exists():
+        print(f"Error: {TOPICS_FILE} not found.")
+        return 0
 
-Return this exact JSON structure:
-{{
-    "title": "Your Comprehensive Blog Title Here",
-    "description": "A detailed description of what this blog post covers and what readers will learn",
-    "sections": [
-        {{
-            "heading": "Introduction",
-            "content": "Write 3-4 detailed paragraphs introducing the topic, explaining its importance in modern cloud computing, and setting the context for readers. Make this engaging and informative.",
-            "code_examples": []
-        }},
-        {{
-            "heading": "Core Concepts and Fundamentals",
-            "content": "Write 4-5 detailed paragraphs explaining the fundamental concepts, principles, and underlying mechanisms. Break down complex ideas into digestible parts with clear explanations and examples.",
-            "code_examples": ["// Detailed code example 1 with comprehensive comments", "// Detailed code example 2 with explanations", "// Configuration example with best practices"]
-        }},
-        {{
-            "heading": "Implementation Strategies and Best Practices",
-            "content": "Write 4-5 detailed paragraphs covering practical implementation approaches, common patterns, best practices, and real-world considerations. Include specific guidance and actionable advice.",
-            "code_examples": ["// Best practice implementation with detailed comments", "// Error handling and edge case examples", "// Performance optimization code"]
-        }},
-        {{
-            "heading": "Advanced Techniques and Optimization",
-            "content": "Write 3-4 detailed paragraphs covering advanced techniques, performance optimization strategies, scalability considerations, and cutting-edge approaches in this field.",
-            "code_examples": ["// Advanced optimization example", "// Performance monitoring and tuning code", "// Scalability implementation"]
-        }},
-        {{
-            "heading": "Real-World Applications and Case Studies",
-            "content": "Write 3-4 detailed paragraphs discussing real-world applications, industry use cases, success stories, and lessons learned from practical implementations.",
-            "code_examples": ["// Real-world implementation example", "// Case study code snippet", "// Production deployment code"]
-        }},
-        {{
-            "heading": "Conclusion and Future Considerations",
-            "content": "Write 2-3 detailed paragraphs summarizing key takeaways, discussing future trends, and providing guidance on next steps for readers.",
-            "code_examples": []
-        }}
-    ],
-    "tags": ["Serverless", "Cloud Computing", "Performance", "Architecture", "Best Practices"],
-    "read_time": 15
-}}
+    now = time.time()
+    with topic_queue() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Read inside the transaction: every writer of the queued set holds it too
+            with open(TOPICS_FILE, "r") as f:
+                topics = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+            added = sum(1 for topic in topics if _queue_topic(conn, topic, 0, now))
+            listed = set(topics)
+            removed = [row["id"] for row in conn.execute("SELECT id, topic FROM topics WHERE status = 'queued'")
+                       if row["topic"] not in listed]
+            conn.executemany("UPDATE topics SET status = 'removed', updated_at = ? WHERE id = ?",
+                             [(now, topic_id) for topic_id in removed])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
 
-Requirements:
-- Focus on cloud computing, serverless, or distributed systems
-- Make content comprehensive, informative, and engaging
-- Include practical examples and code snippets where relevant
-- Target total content: 2000-3000 words across all sections
-- Return ONLY valid JSON, no other text
-- Use technical but accessible language
-- Ensure JSON is properly formatted with no syntax errors
-- Each section should be substantial and provide real value
-- Include specific, actionable insights and implementation guidance
+    if added:
+        print(f"📥 Imported {added} new topic(s) from {TOPICS_FILE}")
+    if removed:
+        print(f"🗑️ Removed {len(removed)} topic(s) deleted from {TOPICS_FILE}")
+    return added
 
-Remember: Return ONLY the JSON object, nothing else.
-"""
-    
-    blog_content = None
+def export_topics_file(conn=None):
+    """Write the queued topics back to topics.md in the order they will be served"""
+    if conn is None:
+        with topic_queue() as conn:
+            return export_topics_file(conn)
 
-    # Try OpenAI
-    if client:
+    rows = conn.execute(
+        "SELECT topic FROM topics WHERE status = 'queued' ORDER BY priority DESC, id"
+    ).fetchall()
+    update_topics_file([row["topic"] for row in rows])
+    return len(rows)
+
+def lease_topic(worker_id, lease_seconds=LEASE_SECONDS):
+    """Lease the highest-priority available topic, or return None"""
+    now = time.time()
+    with topic_queue() as conn:
+        conn.execute("BEGIN IMMEDIATE")
         try:
-            print("🔄 Attempting to generate structured content with OpenAI...")
-            print(f"🔑 OpenAI API key configured: {'Yes' if OPENAI_API_KEY else 'No'}")
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a technical blog writer. You must ALWAYS return ONLY valid JSON. Never include markdown, HTML, or any other formatting. Only return the JSON object."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3  # Lower temperature for more consistent output
+            # Expired leases that already used every attempt go to the dead letters
+            conn.execute(
+                "UPDATE topics SET status = 'dead', last_error = COALESCE(last_error, 'lease expired'), updated_at = ? "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, MAX_ATTEMPTS)
             )
-            blog_content = response.choices[0].message.content
-            print("✅ OpenAI generation successful.")
-        except Exception as e:
-            print(f"❌ OpenAI failed: {e}")
-            import traceback
-            traceback.print_exc()
-            print("🔄 Falling back to Gemini...")
+            row = conn.execute(
+                "SELECT id, topic, attempts FROM topics "
+                "WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY priority DESC, id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE topics SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (worker_id, now + lease_seconds, now, row["id"])
+                )
+                export_topics_file(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
 
-    # Fallback to Gemini
-    if not blog_content and GEMINI_API_KEY and genai:
-        print("🔄 Attempting to generate structured content with Gemini...")
-        blog_content = generate_blog_with_gemini(prompt)
-        if blog_content:
-            print("✅ Gemini generation successful.")
-    
-    if not blog_content:
-        print("❌ Both AI services failed. Creating fallback content...")
-        # Create a comprehensive fallback blog post
-        fallback_content = {
-            "title": f"Understanding {topic}: A Comprehensive Guide",
-            "description": f"A comprehensive guide about {topic} and its importance in modern cloud computing and distributed systems.",
-            "sections": [
-                {
-                    "heading": "Introduction",
-                    "content": f"This comprehensive blog post explores the fundamentals of {topic} and why it matters in today's cloud-native world. We'll dive deep into the concepts, implementation strategies, and best practices that can help you build better systems.\n\nUnderstanding {topic} is crucial for developers, architects, and DevOps engineers working in modern cloud environments. As organizations continue to adopt cloud-native architectures, the principles behind {topic} provide a foundation for making informed decisions about system design, resource allocation, and performance optimization.\n\nThe importance of {topic} extends beyond just technical implementation—it represents a fundamental shift in how we think about system architecture, resource management, and scalability in the cloud era. Whether you're working with serverless functions, microservices, or traditional cloud infrastructure, grasping these concepts will help you build better systems.",
-                    "code_examples": []
-                },
-                {
-                    "heading": "Core Concepts and Fundamentals",
-                    "content": f"To understand {topic}, we need to grasp several key concepts. This includes understanding the underlying principles, common patterns, and how it fits into the broader ecosystem of cloud computing and distributed systems.\n\nThe fundamental principles of {topic} revolve around resource management, scalability, and performance optimization. These concepts work together to create systems that can efficiently handle varying workloads while maintaining reliability and cost-effectiveness.\n\nUnderstanding the underlying mechanisms involves grasping concepts like dynamic allocation, adaptive scaling, and intelligent resource management. These mechanisms work together to create systems that can respond intelligently to changing demands while maintaining performance standards.\n\nThe relationship between {topic} and system architecture is crucial—the way you design your system directly impacts how effectively you can implement these concepts. This includes considerations around data flow, component coupling, and the overall system topology.",
-                    "code_examples": ["// Example: Basic resource allocation with dynamic scaling", "// Example: Configuration management with best practices", "// Example: Performance monitoring with comprehensive metrics"]
-                },
-                {
-                    "heading": "Implementation Strategies and Best Practices",
-                    "content": f"Implementing {topic} requires careful consideration of several factors. We'll explore practical approaches, common pitfalls to avoid, and strategies for ensuring your implementation is robust and scalable.\n\nStart by establishing clear metrics and monitoring capabilities that will help you understand how your system is performing. This includes setting up logging, metrics collection, and alerting systems that can provide real-time insights into system behavior.\n\nNext, consider implementing gradual rollout strategies that allow you to test changes in production without affecting all users. This might involve feature flags, canary deployments, or A/B testing approaches that minimize risk while maximizing learning opportunities.\n\nWhen implementing {topic} strategies, it's crucial to consider the operational aspects as well. This includes setting up proper alerting, establishing runbooks for common scenarios, and ensuring your team has the necessary skills and knowledge to operate the system effectively.",
-                    "code_examples": ["// Best practice implementation with comprehensive error handling", "// Feature flag implementation with gradual rollout", "// Canary deployment with health checks"]
-                },
-                {
-                    "heading": "Advanced Techniques and Optimization",
-                    "content": f"Once you have the basic {topic} implementation in place, you can start exploring advanced techniques and optimization strategies. This includes implementing sophisticated monitoring and alerting systems that can detect issues before they impact users.\n\nAdvanced optimization techniques often involve machine learning and predictive analytics. By analyzing historical data and patterns, you can predict when scaling will be needed and proactively allocate resources. This proactive approach can significantly improve system performance and user experience.\n\nPerformance tuning is another critical aspect of advanced {topic} implementation. This involves fine-tuning various parameters, monitoring the impact of changes, and continuously iterating to find the optimal configuration for your specific use case and workload patterns.\n\nScalability considerations become increasingly important as your system grows. Advanced implementations often involve multi-region deployments, load balancing strategies, and sophisticated caching mechanisms that can handle massive scale while maintaining performance.",
-                    "code_examples": ["// Advanced performance monitoring with ML insights", "// Predictive scaling with historical data analysis", "// Automated response system for common issues"]
-                },
-                {
-                    "heading": "Real-World Applications and Case Studies",
+    if not row:
+        return None
+    print(f"🔒 Leased topic #{row['id']} (attempt {row['attempts'] + 1}/{MAX_ATTEMPTS}) as {worker_id}")
+    return {"id": row["id"], "topic": row["topic"], "attempts": row["attempts"] + 1}
+
+def renew_lease(topic_id, worker_id, lease_seconds=LEASE_SECONDS):
+    """Extend a lease this worker still holds"""
+    with topic_queue() as conn:
+        cursor = conn.execute(
+            "UPDATE topics SET lease_expires = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (time.time() + lease_seconds, time.time(), topic_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+def complete_topic(topic_id, worker_id):
+    """Mark a leased topic as published"""
+    with topic_queue() as conn:
+        conn.execute(
+            "UPDATE topics SET status = 'done', lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE id = ? AND lease_owner = ?",
+            (time.time(), topic_id, worker_id)
+        )
+
+def skip_topic(topic_id, worker_id, reason):
+    """Retire a leased topic without generating it"""
+    with topic_queue() as conn:
+        conn.execute(
+            "UPDATE topics SET status = 'skipped', lease_owner = NULL, lease_expires = NULL, last_error = ?, updated_at = ? "
+            "WHERE id = ? AND lease_owner = ?",
+            (reason, time.time(), topic_id, worker_id)
+        )
+    print(f"⏭️ Topic #{topic_id} skipped: {reason}")
+
+def fail_topic(topic_id, worker_id, error):
+    """Release a failed topic for retry, or dead-letter it after MAX_ATTEMPTS"""
+    with topic_queue() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE topics SET status = CASE WHEN attempts >= ? THEN 'dead' ELSE 'queued' END, "
+                "lease_owner = NULL, lease_expires = NULL, last_error = ?, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ?",
+                (MAX_ATTEMPTS, str(error)[:500], time.time(), topic_id, worker_id)
+            )
+            status = conn.execute("SELECT status FROM topics WHERE id = ?", (topic_id,)).fetchone()
+            export_topics_file(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    if status and status["status"] == "dead":
+        print(f"☠️ Topic #{topic_id} moved to dead letters after {MAX_ATTEMPTS} attempts")
+    else:
+        print(f"↩️ Topic #{topic_id} released for retry")
+
+def requeue_dead_topics():
+    """Give dead-lettered topics a fresh set of attempts"""
+    with topic_queue() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.execute(
+            "UPDATE topics SET status = 'queued', attempts = 0, last_error = NULL, updated_at = ? WHERE status = 'dead'",
+            (time.time(),)
+        )
+        export_topics_file(conn)
+        conn.execute("COMMIT")
+        return cursor.rowcount
+
+def queue_status():
+    """Print queue counts, active leases and dead letters"""
+    with topic_queue() as conn:
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM topics GROUP BY status").fetchall())
+        print("📊 Topic queue:")
+        for status in ["queued", "leased", "done", "skipped", "removed", "dead"]:
+            print(f"   {status}: {counts.get(status, 0)}")
+        for row in conn.execute("SELECT id, topic, lease_owner, lease_expires FROM topics WHERE status = 'leased'"):
+            remaining = int(row["lease_expires"] - time.time())
+            print(f"   🔒 #{row['id']} {row['topic']} ({row['lease_owner']}, {remaining}s left)")
+        for row in conn.execute("SELECT id, topic, attempts, last_error FROM topics WHERE status = 'dead'"):
+            print(f"   ☠️ #{row['id']} {row['topic']} after {row['attempts']} attempts: {row['last_error']}")
+        return counts
+
+# ===== Near-duplicate detection =====
+# MinHash signatures of every post's title and body, so a topic that has
+# effectively been written already is caught before we pay for a generation.
+# The index also keeps LSH buckets (band hash -> posts) for both signatures,
+# so candidates are looked up by band instead of scanning every post.
+DEDUPE_INDEX_FILE = f"{STATE_DIR}/minhash.json"
+MINHASH_PERMUTATIONS = 128
+MINHASH_BANDS = 32
+DUPLICATE_THRESHOLD = float(os.environ.get("BLOG_DUPLICATE_THRESHOLD", "0.5"))
+DUPLICATE_ACTION = os.environ.get("BLOG_DUPLICATE_ACTION", "flag")  # skip | merge | flag
+NON_POST_FILES = {"index.html", "TEMPLATE.html"}
+LSH_SIGNATURES = ("title_signature", "body_signature")
+
+# The MinHash and related-posts indexes are read-modify-written from worker
+# threads in the async pipeline; one lock keeps each update (and the
+# index.json/counts.npz pair) whole. Loaded indexes stay in memory until
+# their files change, so a long-lived process (the daemon) reads them once;
+# callers share the cached object and must use it under the lock.
+_index_lock = threading.RLock()
+_index_cache = {}
+
+def _index_files_key(*paths):
+    """Identity of index files on disk; atomic writes always change it"""
+    stats = [Path(path).stat() for path in paths]
+    return tuple((s.st_ino, s.st_mtime_ns, s.st_size) for s in stats)
+
+def _cached_index(*paths):
+    """The index last loaded from or saved to these files, if they haven't changed since"""
+    if not all(Path(path).exists() for path in paths):
+        return None
+    cached = _index_cache.get(str(Path(paths[0]).resolve()))
+    if cached and cached[0] == _index_files_key(*paths):
+        return cached[1]
+    return None
+
+def _remember_index(index, *paths):
+    _index_cache[str(Path(paths[0]).resolve())] = (_index_files_key(*paths), index)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_minhash_rng = random.Random(20250824)
+_MINHASH_COEFFICIENTS = [
+    (_minhash_rng.randrange(1, _MERSENNE_PRIME), _minhash_rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+# Words that say nothing about what a title is actually about
+TITLE_STOPWORDS = {
+    "a", "an", "and", "the", "of", "for", "in", "on", "to", "with", "into", "its", "how", "why", "what",
+    "mastering", "understanding", "guide", "comprehensive", "deep", "dive", "approach", "explained",
+    "power", "strategies", "strategy", "introduction", "peak"
+}
+
+def _normalize_word(word):
+    """Very light stemming so plurals match their singular"""
+    if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+def title_shingles(text):
+    """Content words of a topic or title"""
+    words = re.findall(r'[a-z0-9]+', text.lower())
+    return {_normalize_word(w) for w in words if w not in TITLE_STOPWORDS}
+
+def body_shingles(text, size=3):
+    """Word n-grams of a post body"""
+    words = re.findall(r'[a-z0-9]+', text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def minhash_signature(shingles):
+    """MinHash signature of a shingle set"""
+    if not shingles:
+        return [_MERSENNE_PRIME] * MINHASH_PERMUTATIONS
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), "big") % _MERSENNE_PRIME
+        for s in shingles
+    ]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _MINHASH_COEFFICIENTS]
+
+def estimate_similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of the sets behind two signatures"""
+    matches = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+    return matches / MINHASH_PERMUTATIONS
+
+def extract_post_text(html):
+    """Pull the title and article body text out of a rendered post"""
+    # The <h1> is what readers see; some older pages have a stale <title>
+    heading_match = re.search(r'<h1[^>]*>(.*?)</h1>', html, re.IGNORECASE | re.DOTALL)
+    title_match = re.search(r'<title>(.*?)(?: - Siddharth Agarwal)?</title>', html, re.IGNORECASE | re.DOTALL)
+    title = ""
+    if heading_match:
+        title = re.sub(r'<[^>]+>', '', heading_match.group(1))
+        # Drop decoration in front of the words (the template's emoji, for one)
+        title = re.sub(r'^[^\w"\'(\[]+', '', title.strip())
+    if not title and title_match:
+        title = title_match.group(1).strip()
+    title = re.sub(r'\s+', ' ', title)
+
+    body_match = re.search(r'<div class="blog-content">(.*?)<!-- Author Bio -->', html, re.DOTALL)
+    body_html = body_match.group(1) if body_match else html
+    body = re.sub(r'<[^>]+>', ' ', body_html)
+    return title, re.sub(r'\s+', ' ', body).strip()
+
+def load_duplicate_index():
+    """Load the MinHash index, adding any posts written since it was saved"""
+    with _index_lock:
+        return _load_duplicate_index()
+
+def _load_duplicate_index():
+    index = _cached_index(DEDUPE_INDEX_FILE)
+    if index is None and Path(DEDUPE_INDEX_FILE).exists():
+        try:
+            with open(DEDUPE_INDEX_FILE, "r", encoding='utf-8') as f:
+                index = json.load(f)
+            _remember_index(index, DEDUPE_INDEX_FILE)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Rebuilding unreadable duplicate index: {e}")
+    if index is None:
+        index = {"posts": {}}
+    changed = "buckets" not in index
+    if changed:
+        # Saved before the index kept its buckets
+        entries, index["posts"] = index["posts"], {}
+        index["buckets"] = {key: {} for key in LSH_SIGNATURES}
+        for name, entry in entries.items():
+            _set_duplicate_entry(index, name, entry)
+
+    # Drop deleted posts, then (re)index new ones and ones edited since
+    posts = {path.name: path for path in Path(BLOG_DIR).glob("*.html") if path.name not in NON_POST_FILES}
+    for name in [name for name in index["posts"] if name not in posts]:
+        _set_duplicate_entry(index, name, None)
+        changed = True
+    for name, path in sorted(posts.items()):
+        mtime_ns = path.stat().st_mtime_ns
+        if index["posts"].get(name, {}).get("mtime_ns") == mtime_ns:
+            continue
+        with open(path, "r", encoding='utf-8') as f:
+            title, body = extract_post_text(f.read())
+        _set_duplicate_entry(index, name, _duplicate_entry(title, body, mtime_ns))
+        changed = True
+
+    if changed:
+        save_duplicate_index(index)
+    return index
+
+def save_duplicate_index(index):
+    with _index_lock:
+        write_json_atomic(DEDUPE_INDEX_FILE, index)
+        _remember_index(index, DEDUPE_INDEX_FILE)
+
+def _band_keys(signature):
+    """Hash of each LSH band of a signature"""
+    rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+    return [
+        f"{b}:" + hashlib.blake2b(",".join(map(str, signature[b * rows:(b + 1) * rows])).encode('utf-8'),
+                                  digest_size=8).hexdigest()
+        for b in range(MINHASH_BANDS)
+    ]
+
+def _set_duplicate_entry(index, name, entry):
+    """Put a post in the index, or take it out with entry=None, keeping its buckets in step"""
+    old = index["posts"].pop(name, None)
+    for key in LSH_SIGNATURES:
+        buckets = index["buckets"][key]
+        if old:
+            for band in _band_keys(old[key]):
+                if name in buckets.get(band, ()):
+                    buckets[band].remove(name)
+                    if not buckets[band]:
+                        del buckets[band]
+        if entry:
+            for band in _band_keys(entry[key]):
+                buckets.setdefault(band, []).append(name)
+    if entry:
+        index["posts"][name] = entry
+
+def _duplicate_entry(title, body, mtime_ns=None):
+    return {
+        "title": title,
+        "mtime_ns": mtime_ns,
+        "title_signature": minhash_signature(title_shingles(title)),
+        "body_signature": minhash_signature(body_shingles(body))
+    }
+
+def index_post_for_duplicates(filename, content_html):
+    """Add or refresh one post in the MinHash index"""
+    title, body = extract_post_text(content_html)
+    path = Path(BLOG_DIR) / Path(filename).name
+    mtime_ns = path.stat().st_mtime_ns if path.exists() else None
+    with _index_lock:
+        index = load_duplicate_index()
+        _set_duplicate_entry(index, path.name, _duplicate_entry(title, body, mtime_ns))
+        save_duplicate_index(index)
+
+def _lsh_candidates(index, signature, key):
+    """Posts sharing at least one LSH band with the signature"""
+    buckets = index["buckets"][key]
+    return sorted({name for band in _band_keys(signature) for name in buckets.get(band, ())})
+
+def find_duplicate_topic(topic, threshold=DUPLICATE_THRESHOLD):
+    """Return the most similar existing post if it is above the threshold"""
+    signature = minhash_signature(title_shingles(topic))
+
+    best = None
+    with _index_lock:
+        index = load_duplicate_index()
+        for name in _lsh_candidates(index, signature, "title_signature"):
+            entry = index["posts"][name]
+            score = estimate_similarity(signature, entry["title_signature"])
+            if score >= threshold and (best is None or score > best["similarity"]):
+                best = {"filename": name, "title": entry["title"], "similarity": score}
+    return best
+
+def duplicate_report(threshold=DUPLICATE_THRESHOLD):
+    """Print every pair of existing posts whose titles or bodies look alike"""
+    with _index_lock:
+        index = load_duplicate_index()
+        # Candidates share a bucket; titles can match while bodies are reworded, so use both
+        pairs = set()
+        for key in LSH_SIGNATURES:
+            for names in index["buckets"][key].values():
+                for i, a in enumerate(names):
+                    for b in names[i + 1:]:
+                        pairs.add(tuple(sorted((a, b))))
+
+        found = []
+        for a, b in sorted(pairs):
+            body_score = estimate_similarity(index["posts"][a]["body_signature"], index["posts"][b]["body_signature"])
+            title_score = estimate_similarity(index["posts"][a]["title_signature"], index["posts"][b]["title_signature"])
+            if max(body_score, title_score) >= threshold:
+                found.append((a, b, body_score, title_score))
+
+    print(f"🔍 {len(found)} near-duplicate post pair(s) at threshold {threshold}:")
+    for a, b, body_score, title_score in sorted(found):
+        print(f"   {a}\n   ↔ {b}\n     title {title_score:.2f}, body {body_score:.2f}")
+    return found
+
+# ===== Related posts =====
+# TF-IDF vectors of every post's section text, stored as a CSR matrix of raw
+# term counts so adding a post only appends a row. A full refresh takes the
+# neighbours of every post from one sparse product X @ X.T, computed for a
+# block of rows at a time so at most RELATED_BLOCK_CELLS products (and
+# scores) are held at once.
+RELATED_DIR = f"{STATE_DIR}/related"
+RELATED_POSTS_COUNT = 3
+RELATED_BLOCK_CELLS = 1 << 22
+RELATED_MARKER_START = "<!-- RELATED-POSTS -->"
+RELATED_MARKER_END = "<!-- /RELATED-POSTS -->"
+
+TFIDF_STOPWORDS = {
+    "the", "and", "for", "that", "this", "with", "are", "can", "you", "your", "from", "into", "its", "their",
+    "they", "them", "have", "has", "was", "were", "will", "would", "should", "could", "not", "but", "all",
+    "any", "more", "most", "such", "also", "these", "those", "when", "where", "which", "while", "what",
+    "how", "why", "than", "then", "there", "here", "our", "out", "over", "each", "other", "about", "both",
+    "between", "through", "like", "just", "only", "one", "two", "use", "using", "used", "may", "many", "well"
+}
+
+def tfidf_terms(text):
+    """Terms counted for the TF-IDF vectors"""
+    words = re.findall(r'[a-z][a-z0-9]{2,}', text.lower())
+    return [_normalize_word(w) for w in words if w not in TFIDF_STOPWORDS]
+
+def _empty_related_index():
+    return {
+        "terms": [],
+        "posts": [],
+        "indptr": np.zeros(1, dtype=np.int64),
+        "indices": np.zeros(0, dtype=np.int32),
+        "counts": np.zeros(0, dtype=np.float32)
+    }
+
+def load_related_index():
+    """Load the term-count matrix, adding any posts written since it was saved"""
+    if np is None:
+        return None
+    with _index_lock:
+        return _load_related_index()
+
+def _load_related_index():
+    related_dir = Path(RELATED_DIR)
+    files = (related_dir / "index.json", related_dir / "counts.npz")
+    index = _cached_index(*files)
+    if index is None:
+        index = _empty_related_index()
+        if all(path.exists() for path in files):
+            with open(files[0], "r", encoding='utf-8') as f:
+                meta = json.load(f)
+            matrix = np.load(files[1])
+            index.update(terms=meta["terms"], posts=meta["posts"],
+                         indptr=matrix["indptr"], indices=matrix["indices"], counts=matrix["counts"])
+            _remember_index(index, *files)
+
+    known = {post["filename"] for post in index["posts"]}
+    added = False
+    for path in sorted(Path(BLOG_DIR).glob("*.html")):
+        if path.name in NON_POST_FILES or path.name in known:
+            continue
+        with open(path, "r", encoding='utf-8') as f:
+            title, body = extract_post_text(f.read())
+        _add_related_row(index, path.name, title, body)
+        added = True
+
+    if added:
+        save_related_index(index)
+    return index
+
+def save_related_index(index):
+    """Persist the vocabulary, post list and CSR matrix"""
+    related_dir = Path(RELATED_DIR)
+    related_dir.mkdir(parents=True, exist_ok=True)
+    tmp_matrix = related_dir / f"counts.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+    with _index_lock:
+        np.savez(tmp_matrix, indptr=index["indptr"], indices=index["indices"], counts=index["counts"])
+        os.replace(tmp_matrix, related_dir / "counts.npz")
+        write_json_atomic(related_dir / "index.json", {"terms": index["terms"], "posts": index["posts"]})
+        _remember_index(index, related_dir / "index.json", related_dir / "counts.npz")
+
+def _add_related_row(index, filename, title, body):
+    """Append (or replace) one post's term counts"""
+    rows = [i for i, post in enumerate(index["posts"]) if post["filename"] == filename]
+    if rows:
+        row = rows[0]
+        start, end = index["indptr"][row], index["indptr"][row + 1]
+        index["indices"] = np.concatenate([index["indices"][:start], index["indices"][end:]])
+        index["counts"] = np.concatenate([index["counts"][:start], index["counts"][end:]])
+        index["indptr"] = np.concatenate([index["indptr"][:row + 1], index["indptr"][row + 2:] - (end - start)])
+        del index["posts"][row]
+
+    term_ids = {term: i for i, term in enumerate(index["terms"])}
+    counts = {}
+    for term in tfidf_terms(f"{title} {body}"):
+        if term not in term_ids:
+            term_ids[term] = len(index["terms"])
+            index["terms"].append(term)
+        counts[term_ids[term]] = counts.get(term_ids[term], 0) + 1
+
+    columns = np.array(sorted(counts), dtype=np.int32)
+    values = np.array([counts[c] for c in columns], dtype=np.float32)
+    index["indices"] = np.concatenate([index["indices"], columns])
+    index["counts"] = np.concatenate([index["counts"], values])
+    index["indptr"] = np.append(index["indptr"], index["indptr"][-1] + len(columns))
+    index["posts"].append({"filename": filename, "title": title})
+
+def _tfidf_weights(index):
+    """Row ids, TF-IDF weights and row norms for the stored matrix"""
+    n_posts = len(index["posts"])
+    n_terms = len(index["terms"])
+    row_ids = np.repeat(np.arange(n_posts), np.diff(index["indptr"]))
+    doc_freq = np.bincount(index["indices"], minlength=n_terms)
+    idf = np.log((1 + n_posts) / (1 + doc_freq)) + 1
+    weights = (1 + np.log(index["counts"])) * idf[index["indices"]]
+    norms = np.sqrt(np.bincount(row_ids, weights=weights ** 2, minlength=n_posts))
+    norms[norms == 0] = 1
+    return row_ids, weights, norms, idf
+
+def add_post_vectors(filename, content_html):
+    """Add a saved post to the related-posts matrix"""
+    if np is None:
+        return
+    title, body = extract_post_text(content_html)
+    with _index_lock:
+        index = load_related_index()
+        _add_related_row(index, Path(filename).name, title, body)
+        save_related_index(index)
+
+def find_related_posts(text, top_k=RELATED_POSTS_COUNT, exclude=None, index=None):
+    """Top-k existing posts by cosine similarity to the text"""
+    if index is None:
+        with _index_lock:
+            index = load_related_index()
+            return find_related_posts(text, top_k, exclude, index) if index is not None else []
+    if not index["posts"]:
+        return []
+
+    row_ids, weights, norms, idf = _tfidf_weights(index)
+    term_ids = {term: i for i, term in enumerate(index["terms"])}
+    query = np.zeros(len(index["terms"]), dtype=np.float64)
+    for term in tfidf_terms(text):
+        if term in term_ids:
+            query[term_ids[term]] += 1
+    nonzero = query > 0
+    query[nonzero] = (1 + np.log(query[nonzero])) * idf[nonzero]
+    query_norm = np.linalg.norm(query) or 1
+
+    # Sparse matrix-vector product over the CSR arrays
+    scores = np.bincount(row_ids, weights=weights * query[index["indices"]], minlength=len(index["posts"]))
+    scores = scores / (norms * query_norm)
+    for i, post in enumerate(index["posts"]):
+        if post["filename"] == exclude:
+            scores[i] = -1
+
+    ranked = np.argsort(-scores)[:top_k]
+    return [dict(index["posts"][i], score=float(scores[i])) for i in ranked if scores[i] > 0]
+
+def related_neighbours(index, top_k=RELATED_POSTS_COUNT):
+    """Top-k neighbours of every post from the sparse product S = X @ X.T, in blocks of rows"""
+    n_posts = len(index["posts"])
+    k = min(top_k, n_posts - 1)
+    if k <= 0:
+        return {post["filename"]: [] for post in index["posts"]}
+    row_ids, weights, norms, _ = _tfidf_weights(index)
+    values = weights / norms[row_ids]
+    indptr, indices = index["indptr"], index["indices"]
+
+    # The same matrix in CSC order: for each term, the rows that contain it
+    order = np.argsort(indices, kind="stable")
+    posting_rows, posting_values = row_ids[order], values[order]
+    posting_lengths = np.bincount(indices, minlength=len(index["terms"]))
+    posting_ptr = np.concatenate([[0], np.cumsum(posting_lengths)])
+
+    # Each stored value meets every posting of its term; size blocks by those products
+    products = posting_lengths[indices]
+    row_products = np.cumsum(np.bincount(row_ids, weights=products, minlength=n_posts))
+    neighbours = {}
+    start = 0
+    while start < n_posts:
+        # As many rows as fit the budget, in products and in n_posts scores per row
+        before = row_products[start - 1] if start else 0
+        fit = min(np.searchsorted(row_products, before + RELATED_BLOCK_CELLS, side="right"),
+                  start + RELATED_BLOCK_CELLS // n_posts)
+        stop = max(start + 1, int(fit))
+        lo, hi = indptr[start], indptr[stop]
+        terms, lengths = indices[lo:hi], products[lo:hi]
+        positions = np.repeat(posting_ptr[terms] - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        cell = np.repeat(row_ids[lo:hi] - start, lengths) * n_posts + posting_rows[positions]
+        scores = np.bincount(cell, weights=posting_values[positions] * np.repeat(values[lo:hi], lengths),
+                             minlength=(stop - start) * n_posts).reshape(stop - start, n_posts)
+        scores[np.arange(stop - start), np.arange(start, stop)] = -1
+
+        # Top k of every row in the block at once
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        ordered = np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+        for offset, row in enumerate(ordered):
+            neighbours[index["posts"][start + offset]["filename"]] = [
+                dict(index["posts"][j], score=float(scores[offset, j])) for j in row if scores[offset, j] > 0
+            ]
+        start = stop
+    return neighbours
+
+def render_related_posts(related):
+    """HTML block for the {{RELATED_POSTS}} placeholder"""
+    items = "".join(
+        f'\n                    <li><a href="./{post["filename"]}" class="text-primary hover:underline">{post["title"]}</a></li>'
+        for post in related
+    )
+    if not items:
+        return f"{RELATED_MARKER_START}{RELATED_MARKER_END}"
+    return f'''{RELATED_MARKER_START}
+            <div class="mt-16 p-6 bg-gray-900 rounded-xl border border-gray-800">
+                <h3 class="text-lg font-bold text-white mb-4">🔗 Related Posts</h3>
+                <ul class="space-y-2">{items}
+                </ul>
+            </div>
+            {RELATED_MARKER_END}'''
+
+# Related block last written to each page, with the page's mtime then, so a
+# long-lived process only reopens pages whose neighbours changed
+_related_blocks = {}
+
+def refresh_related_posts(top_k=RELATED_POSTS_COUNT):
+    """Recompute every post's neighbours and rewrite their related blocks; returns the pages rewritten"""
+    if np is None:
+        print("❌ numpy is not installed. Cannot compute related posts.")
+        return []
+    with _index_lock:
+        neighbours = related_neighbours(load_related_index(), top_k)
+
+    updated = []
+    for filename, related in neighbours.items():
+        path = Path(BLOG_DIR) / filename
+        if not path.exists():
+            continue
+        block = render_related_posts(related)
+        key = str(path.resolve())
+        if _related_blocks.get(key) == (path.stat().st_mtime_ns, block):
+            continue
+        with open(path, "r", encoding='utf-8') as f:
+            html = f.read()
+        if RELATED_MARKER_START in html:
+            new_html = re.sub(
+                re.escape(RELATED_MARKER_START) + r'.*?' + re.escape(RELATED_MARKER_END),
+                lambda _: block, html, count=1, flags=re.DOTALL
+            )
+        elif "<!-- Navigation -->" in html:
+            new_html = html.replace("<!-- Navigation -->", f"{block}\n\n            <!-- Navigation -->", 1)
+        else:
+            new_html = None  # nowhere to put the block
+        if new_html is not None and write_output(path, new_html):
+            updated.append(path.as_posix())
+        _related_blocks[key] = (path.stat().st_mtime_ns, block)
+
+    print(f"🔗 Refreshed related posts in {len(updated)} page(s)")
+    return updated
+
+# ===== Taxonomy =====
+# Tags come from a vocabulary of canonical tags, each with the phrases that
+# signal it and a weight. All phrases are compiled into one Aho-Corasick
+# automaton so the whole post is scanned in a single pass.
+TAXONOMY_FILE = os.environ.get("BLOG_TAXONOMY_FILE", "blog/taxonomy.json")
+MAX_TAGS = int(os.environ.get("BLOG_MAX_TAGS", "5"))
+TITLE_TAG_BOOST = 3.0
+DEFAULT_TAGS = ["Cloud Computing", "Research"]
+TAG_ROW_PATTERN = r'(<div class="flex flex-wrap justify-center gap-2 mb-6">)(.*?)(</div>)'
+
+DEFAULT_TAXONOMY = {
+    "Serverless": {"synonyms": ["serverless", "serverless computing"], "weight": 1.0},
+    "FaaS": {"synonyms": ["faas", "function as a service", "functions as a service"], "weight": 1.2},
+    "AWS Lambda": {"synonyms": ["aws lambda", "lambda function", "lambda functions"], "weight": 1.5},
+    "AWS": {"synonyms": ["aws", "amazon web services"], "weight": 0.8},
+    "Cold Start": {"synonyms": ["cold start", "cold starts", "cold-start", "cold-starts"], "weight": 2.0},
+    "Auto-scaling": {"synonyms": ["autoscaling", "auto-scaling", "autoscaler", "auto scaling"], "weight": 1.5},
+    "Scaling": {"synonyms": ["scaling", "scalability", "scale out", "horizontal scaling"], "weight": 0.6},
+    "Reinforcement Learning": {
+        "synonyms": ["reinforcement learning", "q-learning", "deep q-network", "policy gradient", "rl agent"],
+        "weight": 2.0
+    },
+    "Machine Learning": {"synonyms": ["machine learning", "neural network", "deep learning"], "weight": 1.0},
+    "Kubernetes": {"synonyms": ["kubernetes", "k8s", "knative"], "weight": 1.5},
+    "Containers": {"synonyms": ["container", "containers", "docker"], "weight": 0.8},
+    "Performance": {"synonyms": ["performance", "latency", "throughput"], "weight": 0.6},
+    "Optimization": {"synonyms": ["optimization", "optimisation", "optimize", "optimizing"], "weight": 0.6},
+    "Cost Optimization": {"synonyms": ["cost optimization", "cost efficiency", "cost savings"], "weight": 1.2},
+    "Architecture": {"synonyms": ["architecture", "architectural"], "weight": 0.6},
+    "Distributed Systems": {"synonyms": ["distributed systems", "distributed system", "distributed computing"], "weight": 1.2},
+    "Cloud Computing": {"synonyms": ["cloud computing", "cloud provider", "cloud providers", "cloud-native"], "weight": 0.8},
+    "Monitoring": {"synonyms": ["monitoring", "observability", "cloudwatch", "prometheus"], "weight": 0.8},
+    "Research": {"synonyms": ["research", "paper", "study"], "weight": 0.4}
+}
+
+def load_taxonomy():
+    """The tag vocabulary, with BLOG_TAXONOMY_FILE entries overriding the defaults"""
+    taxonomy = dict(DEFAULT_TAXONOMY)
+    if Path(TAXONOMY_FILE).exists():
+        try:
+            with open(TAXONOMY_FILE, "r", encoding='utf-8') as f:
+                taxonomy.update(json.load(f))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Ignoring unreadable taxonomy file {TAXONOMY_FILE}: {e}")
+    return taxonomy
+
+def build_tag_automaton(taxonomy):
+    """Compile every synonym into an Aho-Corasick automaton.
+
+    Returns (goto, fail, outputs): goto[state] maps a character to the next
+    state, fail[state] is the longest proper suffix state, and outputs[state]
+    lists (tag, weight, phrase length) for phrases ending there.
+    """
+    goto, fail, outputs = [{}], [0], [[]]
+    for tag, entry in taxonomy.items():
+        weight = float(entry.get("weight", 1.0))
+        for phrase in set([tag.lower()] + [s.lower() for s in entry.get("synonyms", [])]):
+            state = 0
+            for char in phrase:
+                if char not in goto[state]:
+                    goto.append({})
+                    fail.append(0)
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append((tag, weight, len(phrase)))
+
+    # Breadth-first so each failure link points at an already-finished state
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, child in goto[state].items():
+            queue.append(child)
+            link = fail[state]
+            while link and char not in goto[link]:
+                link = fail[link]
+            fail[child] = goto[link].get(char, 0)
+            outputs[child] = outputs[child] + outputs[fail[child]]
+    return goto, fail, outputs
+
+_tag_automaton = None
+
+def scan_tags(text, automaton=None):
+    """Weighted tag hits in text, counting whole-word matches only"""
+    global _tag_automaton
+    if automaton is None:
+        if _tag_automaton is None:
+            _tag_automaton = build_tag_automaton(load_taxonomy())
+        automaton = _tag_automaton
+    goto, fail, outputs = automaton
+
+    text = text.lower()
+    scores = {}
+    state = 0
+    for end, char in enumerate(text):
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        for tag, weight, length in outputs[state]:
+            start = end - length + 1
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end + 1 < len(text) and text[end + 1].isalnum():
+                continue
+            scores[tag] = scores.get(tag, 0.0) + weight
+    return scores
+
+def extract_tags(title, body, limit=None):
+    """Rank tags by weighted frequency, with title matches boosted"""
+    limit = limit or MAX_TAGS
+    scores = scan_tags(body)
+    for tag, score in scan_tags(title).items():
+        scores[tag] = scores.get(tag, 0.0) + score * TITLE_TAG_BOOST
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [tag for tag, _ in ranked[:limit]] or list(DEFAULT_TAGS)
+
+def render_tags(tags, separator=' '):
+    return separator.join(f'<span class="tag">{tag}</span>' for tag in tags)
+
+def post_tags(html):
+    """Tags shown in a rendered post's header"""
+    row = re.search(TAG_ROW_PATTERN, html, re.DOTALL)
+    return re.findall(r'<span class="tag">(.*?)</span>', row.group(2)) if row else []
+
+def retag_posts(apply=False):
+    """Re-derive tags for every post; with apply, rewrite post headers and index cards"""
+    with open(INDEX_FILE, "r", encoding='utf-8') as f:
+        index_html = f.read()
+
+    changed = 0
+    for path in sorted(Path(BLOG_DIR).glob("*.html")):
+        if path.name in NON_POST_FILES:
+            continue
+        with open(path, "r", encoding='utf-8') as f:
+            html = f.read()
+        title, body = extract_post_text(html)
+        tags = extract_tags(title, body)
+        current = post_tags(html)
+        print(f"🏷️ {path.name}: {', '.join(tags)}" + ("" if tags == current else f" (was {', '.join(current)})"))
+        if not apply:
+            continue
+
+        new_html = re.sub(
+            TAG_ROW_PATTERN,
+            lambda m: f"{m.group(1)}\n                {render_tags(tags)}\n            {m.group(3)}",
+            html, count=1, flags=re.DOTALL
+        )
+        if write_output(path, new_html):
+            changed += 1
+        index_html = replace_card_tags(index_html, path.name, tags)
+
+    if apply and write_output(INDEX_FILE, index_html):
+        changed += 1
+    if apply:
+        print(f"🏷️ Rewrote tags in {changed} file(s)")
+    return changed
+
+def render_card_tags(tags):
+    return '\n'.join(f'                        <span class="tag">{tag}</span>' for tag in tags)
+
+def replace_card_tags(index_html, filename, tags):
+    """Swap the tag row of the index card that links to filename"""
+    link = re.search(r'href="(?:\./)?' + re.escape(filename) + '"', index_html)
+    if not link:
+        return index_html
+    card_start = index_html.rfind('<div class="blog-card', 0, link.start())
+    rows = list(re.finditer(r'<div class="flex flex-wrap gap-2 mb-[46]">(.*?)</div>',
+                            index_html[card_start:link.start()], re.DOTALL))
+    if card_start == -1 or not rows:
+        return index_html
+    row = rows[-1]
+    return (index_html[:card_start + row.start(1)] + "\n" + render_card_tags(tags) + "\n                    "
+            + index_html[card_start + row.end(1):])
+
+# ===== Site check =====
+# Each page is parsed in a worker process, which reports its problems plus the
+# ids and links it contains. Links into other pages are resolved afterwards
+# against those ids, so no page is parsed twice.
+SITE_CHECK_FILE = f"{STATE_DIR}/site-check.json"
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+                 "source", "track", "wbr"}
+# End tags HTML lets authors omit
+OPTIONAL_END_TAGS = {"p", "li", "dt", "dd", "option", "tr", "td", "th", "thead", "tbody", "tfoot"}
+EXTERNAL_LINK_PREFIXES = ("http:", "https:", "mailto:", "tel:", "javascript:", "data:", "//")
+UNCHECKED_PAGES = {"TEMPLATE.html"}
+
+class PageParser(HTMLParser):
+    """Collects ids, links and tag-balance problems for one page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []
+        self.ids = []
+        self.links = []
+        self.issues = []
+        self.toc_depth = None
+        self.card_depth = None
+
+    def problem(self, check, message, severity="error"):
+        self.issues.append({"check": check, "severity": severity, "line": self.getpos()[0], "message": message})
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if attrs.get("id"):
+            self.ids.append(attrs["id"])
+        classes = (attrs.get("class") or "").split()
+        if tag == "a" and attrs.get("href") is not None:
+            self.links.append({
+                "href": attrs["href"], "line": self.getpos()[0],
+                "toc": self.toc_depth is not None, "card": self.card_depth is not None
+            })
+        asset = attrs.get("src") if tag == "script" else attrs.get("href") if tag == "link" else None
+        if asset and (tag == "script" or "stylesheet" in (attrs.get("rel") or "").split()):
+            self.links.append({"href": asset, "line": self.getpos()[0], "toc": False, "card": False, "asset": True})
+        if tag in VOID_ELEMENTS:
+            return
+        self.stack.append((tag, self.getpos()[0]))
+        if "table-of-contents" in classes and self.toc_depth is None:
+            self.toc_depth = len(self.stack)
+        if "blog-card" in classes and self.card_depth is None:
+            self.card_depth = len(self.stack)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_ELEMENTS:
+            return
+        if not any(open_tag == tag for open_tag, _ in self.stack):
+            self.problem("markup", f"</{tag}> has no matching <{tag}>")
+            return
+        while self.stack:
+            open_tag, line = self.stack.pop()
+            if open_tag == tag:
+                break
+            if open_tag not in OPTIONAL_END_TAGS:
+                self.problem("markup", f"<{open_tag}> opened on line {line} is never closed")
+        if self.toc_depth is not None and len(self.stack) < self.toc_depth:
+            self.toc_depth = None
+        if self.card_depth is not None and len(self.stack) < self.card_depth:
+            self.card_depth = None
+
+    def close(self):
+        super().close()
+        for open_tag, line in self.stack:
+            if open_tag not in OPTIONAL_END_TAGS:
+                self.problem("markup", f"<{open_tag}> opened on line {line} is never closed")
+        self.stack = []
+
+def check_page(path):
+    """Parse one page: its own problems, ids and outgoing links"""
+    with open(path, "r", encoding='utf-8') as f:
+        html = f.read()
+    parser = PageParser()
+    parser.feed(html)
+    parser.close()
+
+    ids = set(parser.ids)
+    for duplicate in sorted({i for i in parser.ids if parser.ids.count(i) > 1}):
+        parser.issues.append({"check": "id", "severity": "error", "line": None,
+                              "message": f"id '{duplicate}' is used more than once"})
+    for link in parser.links:
+        if link["toc"] and link["href"].startswith("#") and link["href"][1:] not in ids:
+            parser.issues.append({"check": "toc", "severity": "error", "line": link["line"],
+                                  "message": f"table of contents points at missing anchor {link['href']}"})
+    return {"page": str(path), "ids": sorted(ids), "links": parser.links, "issues": parser.issues}
+
+def resolve_site_link(page, href, site_root):
+    """Local file a link points at (or None for external links) and its fragment"""
+    if href.startswith(EXTERNAL_LINK_PREFIXES) or not href.strip():
+        return None, None
+    target, _, fragment = href.partition("#")
+    target = target.split("?", 1)[0]
+    if not target:
+        return Path(page), fragment
+    base = Path(site_root) if target.startswith("/") else Path(page).parent
+    resolved = Path(os.path.normpath(base / target.lstrip("/")))
+    if resolved.is_dir() or target.endswith("/"):
+        resolved = resolved / "index.html"
+    return resolved, fragment
+
+def check_site(root=None, workers=None, pages=None):
+    """Check every page under root (or just `pages`) in a process pool; returns a JSON-ready report"""
+    root = Path(root or BLOG_DIR)
+    started = time.monotonic()
+    if pages is None:
+        pages = sorted(path for path in root.rglob("*.html") if path.name not in UNCHECKED_PAGES)
+    else:
+        pages = sorted({Path(path) for path in pages if Path(path).name not in UNCHECKED_PAGES and Path(path).exists()})
+    workers = workers or os.cpu_count() or 1
+    if len(pages) < 50 or workers == 1:
+        results = [check_page(path) for path in pages]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(check_page, pages, chunksize=max(1, len(pages) // (workers * 4))))
+
+    page_ids = {os.path.normpath(result["page"]): set(result["ids"]) for result in results}
+    index_path = os.path.normpath(INDEX_FILE)
+    index_checked = index_path in page_ids
+
+    def ids_of(target):
+        """Ids of a link target, parsing pages outside the checked set on demand"""
+        key = os.path.normpath(target)
+        if key not in page_ids and target.suffix == ".html" and target.name not in UNCHECKED_PAGES:
+            page_ids[key] = set(check_page(target)["ids"])
+        return page_ids.get(key)
+
+    issues = []
+    linked_from_index = set()
+    for result in results:
+        page = result["page"]
+        issues.extend(dict(issue, page=page) for issue in result["issues"])
+        for link in result["links"]:
+            target, fragment = resolve_site_link(page, link["href"], root.parent)
+            if target is None:
+                continue
+            key = os.path.normpath(target)
+            if os.path.normpath(page) == index_path and link["card"]:
+                linked_from_index.add(key)
+            if not target.exists():
+                check = "asset" if link.get("asset") else "index" if link["card"] else "link"
+                missing = "file" if link.get("asset") else "page"
+                issues.append({"page": page, "check": check, "severity": "error", "line": link["line"],
+                               "message": f"link to missing {missing} {link['href']}"})
+            elif fragment and not link["toc"] and ids_of(target) is not None and fragment not in ids_of(target):
+                issues.append({"page": page, "check": "fragment", "severity": "error", "line": link["line"],
+                               "message": f"link to missing anchor {link['href']}"})
+
+    # Posts nobody can reach from the index
+    if index_checked:
+        for path in pages:
+            key = os.path.normpath(path)
+            if path.parent == root and path.name not in NON_POST_FILES and key not in linked_from_index:
+                issues.append({"page": str(path), "check": "index", "severity": "warning", "line": None,
+                               "message": f"post has no card in {INDEX_FILE}"})
+
+    report = {
+        "checked_at": datetime.datetime.now().isoformat(),
+        "root": str(root),
+        "pages": len(pages),
+        "errors": sum(1 for issue in issues if issue["severity"] == "error"),
+        "warnings": sum(1 for issue in issues if issue["severity"] == "warning"),
+        "elapsed_seconds": round(time.monotonic() - started, 3),
+        "issues": issues
+    }
+    write_json_atomic(SITE_CHECK_FILE, report)
+    return report
+
+def report_site_check(pages=None):
+    """Check the pages a publish wrote; problems are reported, not fatal"""
+    try:
+        report = check_site(pages=pages)
+    except Exception as e:
+        print(f"⚠️ Site check failed to run: {e}")
+        return None
+    if report["errors"]:
+        print_site_check(report)
+    else:
+        print(f"🔎 Site check: {report['pages']} page(s) OK ({report['warnings']} warning(s)) "
+              f"in {report['elapsed_seconds']}s")
+    return report
+
+def print_site_check(report):
+    for issue in report["issues"]:
+        icon = "❌" if issue["severity"] == "error" else "⚠️"
+        line = f":{issue['line']}" if issue["line"] else ""
+        print(f"{icon} {issue['page']}{line} [{issue['check']}] {issue['message']}")
+    print(f"🔎 Checked {report['pages']} page(s) in {report['elapsed_seconds']}s: "
+          f"{report['errors']} error(s), {report['warnings']} warning(s)")
+
+# ===== Performance budget =====
+# Measures what a browser has to fetch and parse for each page: bytes on the
+# wire raw and compressed, DOM size, resources that block first render, inline
+# script/style weight and the third-party origins it talks to. Every audit is
+# appended to a history file so the site-wide totals can be followed over time.
+PERF_REPORT_FILE = f"{STATE_DIR}/perf-budget.json"
+PERF_HISTORY_FILE = f"{STATE_DIR}/perf-history.jsonl"
+PERF_ACTION = os.environ.get("BLOG_PERF_ACTION", "flag")  # flag | fail
+DEFAULT_PERF_BUDGETS = {
+    "html_bytes": 60000,
+    "gzip_bytes": 15000,
+    "dom_nodes": 1500,
+    "render_blocking": 2,  # the Tailwind CDN script and the shared stylesheet
+    "inline_script_bytes": 2048,
+    "inline_style_bytes": 8192,
+    "third_party_origins": 2
+}
+PERF_BUDGETS = {**DEFAULT_PERF_BUDGETS, **json.loads(os.environ.get("BLOG_PERF_BUDGETS", "{}"))}
+# Elements whose src/href the browser fetches on load (links are navigation)
+RESOURCE_ATTRIBUTES = {"script": "src", "link": "href", "img": "src", "iframe": "src",
+                       "source": "src", "video": "src", "audio": "src"}
+
+class PerfParser(HTMLParser):
+    """Counts DOM nodes and collects the resources and inline code of one page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.dom_nodes = 0
+        self.in_head = False
+        self.inline = None
+        self.inline_bytes = {"script": 0, "style": 0}
+        self.blocking = []
+        self.resources = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        self.dom_nodes += 1
+        if tag == "head":
+            self.in_head = True
+        elif tag == "body":
+            self.in_head = False
+
+        url = attrs.get(RESOURCE_ATTRIBUTES.get(tag, ""))
+        rel = (attrs.get("rel") or "").lower().split()
+        if tag == "link" and not {"stylesheet", "preload", "modulepreload", "icon"} & set(rel):
+            url = None  # alternate feeds, canonical and friends are not fetched
+        if url:
+            self.resources.append(url)
+
+        if tag == "script" and url:
+            if self.in_head and "async" not in attrs and "defer" not in attrs and attrs.get("type") != "module":
+                self.blocking.append(url)
+        elif tag == "link" and "stylesheet" in rel:
+            if attrs.get("media", "all") in ("all", "screen", ""):
+                self.blocking.append(url)
+        elif tag in ("script", "style") and attrs.get("type") not in ("application/ld+json", "application/json"):
+            self.inline = tag
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.in_head = False
+        if tag == self.inline:
+            self.inline = None
+
+    def handle_data(self, data):
+        if self.inline:
+            self.inline_bytes[self.inline] += len(data.encode('utf-8'))
+
+def resource_origin(url):
+    """scheme://host of an absolute URL, None for same-site paths"""
+    match = re.match(r'(?:(https?):)?//([^/?#]+)', url, re.IGNORECASE)
+    if not match:
+        return None
+    return f"{(match.group(1) or 'https').lower()}://{match.group(2).lower()}"
+
+def audit_page(path, site_origin=None):
+    """Performance metrics for one page"""
+    with open(path, "rb") as f:
+        data = f.read()
+    parser = PerfParser()
+    parser.feed(data.decode('utf-8', errors='replace'))
+    parser.close()
+
+    origins = sorted({origin for origin in map(resource_origin, parser.resources)
+                      if origin and origin != site_origin})
+    return {
+        "page": str(path),
+        "html_bytes": len(data),
+        "gzip_bytes": len(gzip.compress(data, compresslevel=9, mtime=0)),
+        "brotli_bytes": len(brotli.compress(data)) if brotli else None,
+        "dom_nodes": parser.dom_nodes,
+        "render_blocking": len(parser.blocking),
+        "inline_script_bytes": parser.inline_bytes["script"],
+        "inline_style_bytes": parser.inline_bytes["style"],
+        "third_party_origins": len(origins),
+        "blocking_resources": parser.blocking,
+        "origins": origins
+    }
+
+def _audit_page_args(args):
+    return audit_page(*args)
+
+def check_budgets(metrics, budgets=None):
+    """Budget violations for one page's metrics"""
+    budgets = budgets or PERF_BUDGETS
+    severity = "error" if PERF_ACTION == "fail" else "warning"
+    return [
+        {"page": metrics["page"], "metric": metric, "value": metrics[metric], "budget": budget,
+         "severity": severity}
+        for metric, budget in budgets.items()
+        if metrics.get(metric) is not None and metrics[metric] > budget
+    ]
+
+def load_perf_report():
+    if not Path(PERF_REPORT_FILE).exists():
+        return None
+    try:
+        with open(PERF_REPORT_FILE, "r", encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def audit_site(root=None, workers=None, record=True, pages=None):
+    """Audit pages against the budgets; returns a JSON-ready report for the whole site.
+
+    With pages, only those are measured and merged into the last site-wide
+    report, and only their new violations count as errors: a page already
+    over budget before this run doesn't fail the run again.
+    """
+    root = Path(root or BLOG_DIR)
+    started = time.monotonic()
+    previous = load_perf_report() if pages is not None else None
+    if previous is None:
+        pages = None
+    if pages is None:
+        audited = sorted(path for path in root.rglob("*.html") if path.name not in UNCHECKED_PAGES)
+    else:
+        audited = sorted({Path(path) for path in pages if Path(path).name not in UNCHECKED_PAGES and Path(path).exists()})
+    site_origin = resource_origin(blog_base_url())
+    workers = workers or os.cpu_count() or 1
+    jobs = [(path, site_origin) for path in audited]
+    if len(audited) < 50 or workers == 1:
+        results = [audit_page(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_audit_page_args, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    checked = {os.path.normpath(metrics["page"]) for metrics in results}
+    new_violations = [violation for metrics in results for violation in check_budgets(metrics)]
+    if pages is None:
+        failing = new_violations
+    else:
+        # Merge into the last site-wide report, dropping pages that no longer exist
+        results += [metrics for metrics in previous["metrics"]
+                    if os.path.normpath(metrics["page"]) not in checked and Path(metrics["page"]).exists()]
+        results.sort(key=lambda metrics: metrics["page"])
+        known = {(os.path.normpath(violation["page"]), violation["metric"]): violation["value"]
+                 for violation in previous["violations"]}
+        failing = [violation for violation in new_violations
+                   if violation["value"] > known.get((os.path.normpath(violation["page"]), violation["metric"]), -1)]
+
+    violations = [violation for metrics in results for violation in check_budgets(metrics)]
+    totals = {metric: sum(metrics[metric] or 0 for metrics in results)
+              for metric in ("html_bytes", "gzip_bytes", "brotli_bytes", "dom_nodes",
+                             "inline_script_bytes", "inline_style_bytes")}
+    report = {
+        "audited_at": datetime.datetime.now().isoformat(),
+        "root": str(root),
+        "pages": len(results),
+        "checked": sorted(checked),
+        "budgets": PERF_BUDGETS,
+        "action": PERF_ACTION,
+        "totals": totals,
+        "largest": max(results, key=lambda metrics: metrics["gzip_bytes"])["page"] if results else None,
+        "over_budget": len({violation["page"] for violation in violations}),
+        "errors": sum(1 for violation in failing if violation["severity"] == "error"),
+        "warnings": sum(1 for violation in violations if violation["severity"] == "warning"),
+        "elapsed_seconds": round(time.monotonic() - started, 3),
+        "violations": violations,
+        "failing": failing,
+        "metrics": results
+    }
+    write_json_atomic(PERF_REPORT_FILE, report)
+    if record:
+        record_perf_history(report)
+    return report
+
+def record_perf_history(report):
+    """Append the site-wide numbers of one audit to the history file"""
+    pages = max(1, report["pages"])
+    entry = {
+        "at": report["audited_at"],
+        "pages": report["pages"],
+        "over_budget": report["over_budget"],
+        **report["totals"],
+        "mean_gzip_bytes": round(report["totals"]["gzip_bytes"] / pages),
+        "max_gzip_bytes": max((metrics["gzip_bytes"] for metrics in report["metrics"]), default=0)
+    }
+    Path(PERF_HISTORY_FILE).parent.mkdir(parents=True, exist_ok=True)
+    with open(PERF_HISTORY_FILE, "a", encoding='utf-8') as f:
+        f.write(json.dumps(entry) + "\n")
+
+def load_perf_history(limit=None):
+    if not Path(PERF_HISTORY_FILE).exists():
+        return []
+    with open(PERF_HISTORY_FILE, "r", encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    return entries[-limit:] if limit else entries
+
+def print_perf_trend(limit=10):
+    """Site-wide totals of the last audits, with the change since the previous one"""
+    entries = load_perf_history(limit)
+    if not entries:
+        print(f"📈 No audits recorded yet in {PERF_HISTORY_FILE}")
+        return
+    print(f"{'audited at':<20} {'pages':>5} {'over':>4} {'html KB':>9} {'gzip KB':>9} "
+          f"{'mean gz':>8} {'max gz':>8} {'Δ gzip':>8}")
+    previous = None
+    for entry in entries:
+        delta = "" if previous is None else f"{(entry['gzip_bytes'] - previous['gzip_bytes']) / 1024:+.1f}"
+        print(f"{entry['at'][:19]:<20} {entry['pages']:>5} {entry['over_budget']:>4} "
+              f"{entry['html_bytes'] / 1024:>9.1f} {entry['gzip_bytes'] / 1024:>9.1f} "
+              f"{entry['mean_gzip_bytes']:>8} {entry['max_gzip_bytes']:>8} {delta:>8}")
+        previous = entry
+
+def print_perf_audit(report, verbose=False):
+    if verbose:
+        print(f"{'page':<60} {'html':>7} {'gzip':>6} {'nodes':>5} {'block':>5} {'js':>5} {'css':>6} {'3p':>3}")
+        for metrics in report["metrics"]:
+            print(f"{Path(metrics['page']).name[:60]:<60} {metrics['html_bytes']:>7} {metrics['gzip_bytes']:>6} "
+                  f"{metrics['dom_nodes']:>5} {metrics['render_blocking']:>5} {metrics['inline_script_bytes']:>5} "
+                  f"{metrics['inline_style_bytes']:>6} {metrics['third_party_origins']:>3}")
+    for violation in report["violations"]:
+        icon = "❌" if violation["severity"] == "error" else "⚠️"
+        print(f"{icon} {violation['page']} [{violation['metric']}] {violation['value']} > {violation['budget']}")
+    print(f"⚡ Audited {report['pages']} page(s) in {report['elapsed_seconds']}s: "
+          f"{report['totals']['gzip_bytes'] / 1024:.1f} KB gzipped, "
+          f"{report['over_budget']} page(s) over budget")
+
+def report_perf_budget(pages=None):
+    """Audit the pages a publish wrote; returns False only if they newly break a failing budget"""
+    try:
+        report = audit_site(pages=pages)
+    except Exception as e:
+        print(f"⚠️ Performance audit failed to run: {e}")
+        return True
+    checked = set(report["checked"])
+    for violation in report["violations"]:
+        if os.path.normpath(violation["page"]) in checked:
+            failed = violation in report["failing"] and violation["severity"] == "error"
+            print(f"{'❌' if failed else '⚠️'} {violation['page']} [{violation['metric']}] "
+                  f"{violation['value']} > {violation['budget']}")
+    print(f"⚡ Performance budget: audited {len(checked)} page(s) in {report['elapsed_seconds']}s, "
+          f"site {report['totals']['gzip_bytes'] / 1024:.1f} KB gzipped, "
+          f"{report['over_budget']} page(s) over budget")
+    return report["errors"] == 0
+
+# ===== Feeds and sitemap =====
+# Updated per post instead of rebuilt: the feeds keep only the latest
+# FEED_ENTRIES posts, and the sitemap appends to its newest chunk, so the
+# work per post stays the same however large the archive gets.
+FEED_STATE_FILE = f"{STATE_DIR}/feeds.json"
+FEED_ENTRIES = int(os.environ.get("BLOG_FEED_ENTRIES", "20"))
+SITEMAP_CHUNK_SIZE = int(os.environ.get("BLOG_SITEMAP_CHUNK_SIZE", "1000"))
+SITE_URL = os.environ.get("BLOG_SITE_URL")
+FEED_AUTHOR = os.environ.get("BLOG_FEED_AUTHOR", "Siddharth Agarwal")
+ATOM_FEED_NAME = "feed.xml"
+RSS_FEED_NAME = "rss.xml"
+SITEMAP_NAME = "sitemap.xml"
+
+def blog_base_url():
+    """Public URL of the blog directory, from BLOG_SITE_URL or the CNAME file"""
+    site_url = SITE_URL
+    if not site_url and Path("CNAME").exists():
+        with open("CNAME", "r", encoding='utf-8') as f:
+            site_url = f"https://{f.read().strip()}"
+    return f"{(site_url or '').rstrip('/')}/{BLOG_DIR.strip('/')}"
+
+def post_published_date(name, content_html):
+    """ISO date of a post: the filename prefix, else the date shown on the page"""
+    date_match = re.match(r'(\d{4}-\d{2}-\d{2})-', name)
+    if date_match:
+        return date_match.group(1)
+    shown = re.search(r'📅 ([A-Z][a-z]+ \d{1,2}, \d{4})', content_html)
+    if shown:
+        try:
+            return datetime.datetime.strptime(shown.group(1), "%B %d, %Y").date().isoformat()
+        except ValueError:
+            pass
+    return datetime.date.today().isoformat()
+
+def post_feed_entry(filename, content_html, title=None):
+    """Feed fields for one post"""
+    name = Path(filename).name
+    # The page's <h1> keeps its entities; the feeds escape the plain text
+    title = title or html_lib.unescape(extract_post_text(content_html)[0])
+    desc_match = re.search(r'<meta name="description" content="(.*?)">', content_html, re.DOTALL)
+    published = post_published_date(name, content_html)
+    return {
+        "url": f"{blog_base_url()}/{name}",
+        "title": title or name,
+        "summary": html_lib.unescape(desc_match.group(1).strip()) if desc_match else "",
+        "tags": post_tags(content_html),
+        "published": f"{published}T00:00:00Z"
+    }
+
+def site_title():
+    """The blog index's <title>, used as the feed title"""
+    with open(INDEX_FILE, "r", encoding='utf-8') as f:
+        match = re.search(r'<title>(.*?)</title>', f.read(), re.DOTALL)
+    return match.group(1).strip() if match else "Blog"
+
+def render_atom_feed(entries):
+    base = blog_base_url()
+    updated = entries[0]["published"] if entries else datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    items = "".join(f"""
+  <entry>
+    <title>{xml_escape(entry['title'])}</title>
+    <link href={xml_quoteattr(entry['url'])}/>
+    <id>{xml_escape(entry['url'])}</id>
+    <published>{entry['published']}</published>
+    <updated>{entry['published']}</updated>
+    <summary>{xml_escape(entry['summary'])}</summary>{"".join(f'''
+    <category term={xml_quoteattr(tag)}/>''' for tag in entry['tags'])}
+  </entry>""" for entry in entries)
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>{xml_escape(site_title())}</title>
+  <link href={xml_quoteattr(f"{base}/")}/>
+  <link rel="self" href={xml_quoteattr(f"{base}/{ATOM_FEED_NAME}")}/>
+  <id>{xml_escape(f"{base}/")}</id>
+  <updated>{updated}</updated>
+  <author><name>{xml_escape(FEED_AUTHOR)}</name></author>{items}
+</feed>
+"""
+
+def render_rss_feed(entries):
+    base = blog_base_url()
+
+    def rfc822(timestamp):
+        return datetime.datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ").strftime("%a, %d %b %Y %H:%M:%S +0000")
+
+    items = "".join(f"""
+    <item>
+      <title>{xml_escape(entry['title'])}</title>
+      <link>{xml_escape(entry['url'])}</link>
+      <guid isPermaLink="true">{xml_escape(entry['url'])}</guid>
+      <pubDate>{rfc822(entry['published'])}</pubDate>
+      <description>{xml_escape(entry['summary'])}</description>{"".join(f'''
+      <category>{xml_escape(tag)}</category>''' for tag in entry['tags'])}
+    </item>""" for entry in entries)
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">
+  <channel>
+    <title>{xml_escape(site_title())}</title>
+    <link>{xml_escape(f"{base}/")}</link>
+    <atom:link href={xml_quoteattr(f"{base}/{RSS_FEED_NAME}")} rel="self" type="application/rss+xml"/>
+    <description>{xml_escape(f"Latest posts from {FEED_AUTHOR}")}</description>{items}
+  </channel>
+</rss>
+"""
+
+def render_sitemap_index(chunks):
+    base = blog_base_url()
+    items = "".join(f"""
+  <sitemap>
+    <loc>{xml_escape(f"{base}/{chunk['file']}")}</loc>
+    <lastmod>{chunk['lastmod']}</lastmod>
+  </sitemap>""" for chunk in chunks)
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{items}
+</sitemapindex>
+"""
+
+def sitemap_url_entry(url, lastmod):
+    return f"""  <url>
+    <loc>{xml_escape(url)}</loc>
+    <lastmod>{lastmod}</lastmod>
+  </url>
+"""
+
+def add_sitemap_url(state, url, lastmod):
+    """Append a URL to the newest sitemap chunk, opening a new chunk when it is full"""
+    chunks = state["chunks"]
+    if not chunks or chunks[-1]["count"] >= SITEMAP_CHUNK_SIZE:
+        chunks.append({"file": f"sitemap-{len(chunks) + 1}.xml", "count": 0, "lastmod": lastmod})
+        chunk_html = ('<?xml version="1.0" encoding="utf-8"?>\n'
+                      '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n</urlset>\n')
+    else:
+        with open(Path(BLOG_DIR) / chunks[-1]["file"], "r", encoding='utf-8') as f:
+            chunk_html = f.read()
+
+    chunk = chunks[-1]
+    if f"<loc>{xml_escape(url)}</loc>" in chunk_html:
+        return False
+    chunk_html = chunk_html.replace("</urlset>", sitemap_url_entry(url, lastmod) + "</urlset>", 1)
+    write_output(Path(BLOG_DIR) / chunk["file"], chunk_html)
+    chunk["count"] += 1
+    chunk["lastmod"] = max(chunk["lastmod"], lastmod)
+    write_output(Path(BLOG_DIR) / SITEMAP_NAME, render_sitemap_index(chunks))
+    return True
+
+def feed_output_paths():
+    """Feed and sitemap files that exist, for staging alongside a post"""
+    paths = [Path(BLOG_DIR) / name for name in (ATOM_FEED_NAME, RSS_FEED_NAME, SITEMAP_NAME)]
+    paths += sorted(Path(BLOG_DIR).glob("sitemap-*.xml"))
+    return [str(path) for path in paths if path.exists()]
+
+def write_feeds(state):
+    write_output(Path(BLOG_DIR) / ATOM_FEED_NAME, render_atom_feed(state["entries"]))
+    write_output(Path(BLOG_DIR) / RSS_FEED_NAME, render_rss_feed(state["entries"]))
+
+def rebuild_feeds():
+    """Build the feeds and sitemap from every post on disk"""
+    posts = sorted(
+        path for path in Path(BLOG_DIR).glob("*.html")
+        if path.name not in NON_POST_FILES and path.name not in UNCHECKED_PAGES
+    )
+    entries = []
+    for path in posts:
+        with open(path, "r", encoding='utf-8') as f:
+            entries.append(post_feed_entry(path, f.read()))
+    entries.sort(key=lambda entry: (entry["published"], entry["url"]))
+
+    for chunk_path in Path(BLOG_DIR).glob("sitemap-*.xml"):
+        chunk_path.unlink()
+    state = {"entries": [], "chunks": []}
+    add_sitemap_url(state, f"{blog_base_url()}/", datetime.date.today().isoformat())
+    for entry in entries:
+        add_sitemap_url(state, entry["url"], entry["published"][:10])
+
+    state["entries"] = entries[::-1][:FEED_ENTRIES]
+    write_feeds(state)
+    write_json_atomic(FEED_STATE_FILE, state)
+    print(f"📰 Rebuilt feeds ({len(state['entries'])} entries) and sitemap "
+          f"({len(entries) + 1} URLs in {len(state['chunks'])} chunk(s))")
+    return state
+
+def add_post_to_feeds(filename, content_html, title=None):
+    """Add one post to the feeds and sitemap"""
+    if not Path(FEED_STATE_FILE).exists():
+        rebuild_feeds()
+        return
+    with open(FEED_STATE_FILE, "r", encoding='utf-8') as f:
+        state = json.load(f)
+
+    entry = post_feed_entry(filename, content_html, title)
+    entries = [existing for existing in state["entries"] if existing["url"] != entry["url"]] + [entry]
+    entries.sort(key=lambda item: (item["published"], item["url"]), reverse=True)
+    state["entries"] = entries[:FEED_ENTRIES]
+    write_feeds(state)
+    add_sitemap_url(state, entry["url"], entry["published"][:10])
+    write_json_atomic(FEED_STATE_FILE, state)
+    print(f"📰 Added {Path(filename).name} to feeds and sitemap")
+
+# ===== Model cascade =====
+# Tiers are tried cheapest first. A response is accepted only if it passes
+# local checks; otherwise the request escalates to the next tier. Savings are
+# measured against sending every request to the priciest tier available.
+def default_cascade(openai_model=OPENAI_MODEL, gemini_model=GEMINI_MODEL):
+    """Both cheap tiers, then the strong OpenAI model for what neither gets right"""
+    return [f"openai:{openai_model}", f"gemini:{gemini_model}", f"openai:{OPENAI_STRONG_MODEL}"]
+
+MODEL_CASCADE = [
+    tier.strip() for tier in
+    os.environ.get("BLOG_MODEL_CASCADE", ",".join(default_cascade())).split(",")
+    if tier.strip()
+]
+MIN_SECTIONS = int(os.environ.get("BLOG_MIN_SECTIONS", "5"))
+MIN_WORDS_PER_SECTION = int(os.environ.get("BLOG_MIN_WORDS_PER_SECTION", "120"))
+CASCADE_STATS_DB = f"{STATE_DIR}/cascade.db"
+LEGACY_CASCADE_STATS_FILE = "cascade-stats.json"
+
+# Approximate list prices in USD per million (input, output) tokens
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1": (2.00, 8.00),
+    "gemini-2.5-flash-preview-05-20": (0.15, 0.60),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00)
+}
+
+def available_cascade_tiers(async_mode=False):
+    """Cascade tiers whose provider is configured in this process"""
+    tiers = []
+    for tier in MODEL_CASCADE:
+        provider = tier.split(":", 1)[0]
+        if provider == "openai" and (openai_available(async_mode) if async_mode else client):
+            tiers.append(tier)
+        elif provider == "gemini" and genai and GEMINI_API_KEY:
+            tiers.append(tier)
+    return tiers
+
+def call_model(tier, topic, journal=None):
+    """Call one cascade tier within its token budget; returns (candidate texts, usage)"""
+    provider, model_name = tier.split(":", 1)
+    request_text = build_blog_prompt(topic, journal, provider)
+    plan = plan_token_budget(model_name, request_text, BLOG_CANDIDATES)
+
+    def call_part(text):
+        result = rate_limited_call(tier, plan, lambda: call_provider(provider, model_name, text, plan["output_limit"]))
+        retry_limit = truncation_retry_limit(tier, result, plan["output_limit"])
+        if not retry_limit:
+            return result
+        retried = rate_limited_call(tier, dict(plan, output_limit=retry_limit),
+                                    lambda: call_provider(provider, model_name, text, retry_limit))
+        return retried[0], combine_usage(result[1], retried[1])
+
+    parts = [call_part(part_text) for part_text in split_prompt(request_text, plan["parts"])]
+    candidates, usage = merge_split_responses(parts)
+    record_token_usage(tier, plan, usage)
+    return candidates, usage
+
+async def call_model_async(tier, topic, journal=None):
+    """Async version of call_model"""
+    provider, model_name = tier.split(":", 1)
+    request_text = build_blog_prompt(topic, journal, provider)
+    plan = plan_token_budget(model_name, request_text, BLOG_CANDIDATES)
+
+    async def call_part(text):
+        result = await rate_limited_call_async(
+            tier, plan, lambda: call_provider_async(provider, model_name, text, plan["output_limit"])
+        )
+        retry_limit = truncation_retry_limit(tier, result, plan["output_limit"])
+        if not retry_limit:
+            return result
+        retried = await rate_limited_call_async(
+            tier, dict(plan, output_limit=retry_limit), lambda: call_provider_async(provider, model_name, text, retry_limit)
+        )
+        return retried[0], combine_usage(result[1], retried[1])
+
+    parts = await asyncio.gather(*(call_part(part_text) for part_text in split_prompt(request_text, plan["parts"])))
+    candidates, usage = merge_split_responses(parts)
+    record_token_usage(tier, plan, usage)
+    return candidates, usage
+
+def call_provider(provider, model_name, request_text, output_limit):
+    """One provider request; returns (candidate texts, usage)"""
+    if provider == "openai":
+        response = client.chat.completions.create(
+            model=model_name,
+            messages=openai_messages(request_text),
+            temperature=0.3,  # Lower temperature for more consistent output
+            n=BLOG_CANDIDATES,
+            max_completion_tokens=output_limit
+        )
+        return openai_candidate_texts(response), openai_usage(response)
+    if provider == "gemini":
+        print("🔑 Using Gemini API key:", GEMINI_API_KEY[:10] + "...")
+        model = gemini_model(model_name)
+        response = model.generate_content(
+            request_text, generation_config=gemini_generation_config(BLOG_CANDIDATES, output_limit)
+        )
+        return gemini_candidate_texts(response), gemini_usage(response)
+    raise ValueError(f"Unknown provider: {provider}")
+
+async def call_provider_async(provider, model_name, request_text, output_limit):
+    """Async version of call_provider"""
+    if provider == "openai":
+        response = await openai_async_client().chat.completions.create(
+            model=model_name,
+            messages=openai_messages(request_text),
+            temperature=0.3,
+            n=BLOG_CANDIDATES,
+            max_completion_tokens=output_limit
+        )
+        return openai_candidate_texts(response), openai_usage(response)
+    if provider == "gemini":
+        model = gemini_model(model_name)
+        response = await model.generate_content_async(
+            request_text, generation_config=gemini_generation_config(BLOG_CANDIDATES, output_limit)
+        )
+        return gemini_candidate_texts(response), gemini_usage(response)
+    raise ValueError(f"Unknown provider: {provider}")
+
+def truncation_retry_limit(tier, result, output_limit):
+    """A larger output limit to retry with when every completion was cut off, else None"""
+    texts, usage = result
+    truncated = (usage or {}).get("truncated", 0)
+    if not truncated:
+        return None
+    print(f"✂️ {tier}: {truncated} completion(s) hit the {output_limit}-token output limit and were dropped")
+    if texts:
+        return None
+    max_output = MODEL_LIMITS.get(tier.split(":", 1)[1], DEFAULT_MODEL_LIMITS)[1]
+    retry_limit = min(max_output, int(output_limit * TRUNCATION_RETRY_FACTOR))
+    if retry_limit <= output_limit:
+        print(f"❌ {tier}: already at the model's output maximum; rejecting the truncated response")
+        return None
+    print(f"🔁 {tier}: retrying with a {retry_limit}-token output limit")
+    return retry_limit
+
+def combine_usage(*usages):
+    """Token usage of several calls added together"""
+    return {key: sum((usage or {}).get(key, 0) for usage in usages)
+            for key in ("input_tokens", "output_tokens", "truncated")}
+
+def extract_structured_data(blog_content):
+    """Parse a raw response into the structured dict, or None"""
+    blog_content = blog_content.strip()
+    if blog_content.startswith('```json'):
+        blog_content = blog_content[7:]
+    if blog_content.endswith('```'):
+        blog_content = blog_content[:-3]
+    try:
+        return json.loads(blog_content.strip())
+    except json.JSONDecodeError:
+        pass
+    json_match = re.search(r'\{.*\}', blog_content, re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(fix_truncated_json(json_match.group(0)))
+        except json.JSONDecodeError:
+            pass
+    return None
+
+def check_acceptance(blog_content):
+    """Local quality checks; returns the list of failures (empty means accepted)"""
+    if not blog_content:
+        return ["empty response"]
+
+    data = extract_structured_data(blog_content)
+    if not isinstance(data, dict) or not isinstance(data.get("title"), str) \
+            or not isinstance(data.get("sections"), list):
+        return ["invalid schema"]
+
+    failures = []
+    sections = [section for section in data["sections"] if isinstance(section, dict)]
+    if len(sections) < MIN_SECTIONS:
+        failures.append(f"{len(sections)} sections < {MIN_SECTIONS}")
+
+    thin = [
+        section.get("heading", "?") for section in sections
+        if len(str(section.get("content", "")).split()) < MIN_WORDS_PER_SECTION
+    ]
+    if thin:
+        failures.append(f"{len(thin)} section(s) under {MIN_WORDS_PER_SECTION} words")
+
+    placeholders = sum(
+        1 for section in sections for code in section.get("code_examples") or []
+        if isinstance(code, str) and is_placeholder_code(code)
+    )
+    if placeholders:
+        failures.append(f"{placeholders} placeholder code example(s)")
+    return failures
+
+def estimate_cost(model_name, usage):
+    """USD cost of a call from its token usage"""
+    if not usage:
+        return 0.0
+    input_price, output_price = MODEL_PRICES.get(model_name, (0.0, 0.0))
+    return (usage["input_tokens"] * input_price + usage["output_tokens"] * output_price) / 1_000_000
+
+def review_cascade_response(tier, blog_content, usage, attempts):
+    """Run the acceptance checks on one tier's response and record the outcome"""
+    failures = check_acceptance(blog_content)
+    cost = estimate_cost(tier.split(":", 1)[1], usage)
+    attempts.append({"tier": tier, "content": blog_content, "usage": usage, "cost": cost, "failures": failures})
+    if failures:
+        print(f"⚠️ {tier} response rejected: {'; '.join(failures)}")
+        return False
+    print(f"✅ {tier} response accepted.")
+    record_cascade_request(attempts)
+    return True
+
+def settle_cascade(attempts):
+    """No tier passed: keep the response with the fewest failures"""
+    usable = [attempt for attempt in attempts if attempt["content"]]
+    record_cascade_request(attempts)
+    if not usable:
+        return None
+    best = min(reversed(usable), key=lambda attempt: len(attempt["failures"]))
+    print(f"⚠️ No tier passed the acceptance checks; using the {best['tier']} response")
+    return best["content"]
+
+def tier_price(tier):
+    """Output price per million tokens, the part that dominates a long post"""
+    return MODEL_PRICES.get(tier.split(":", 1)[-1], (0.0, 0.0))[1]
+
+def baseline_tier():
+    """The priciest tier this process could use, what a cascade-free setup would call"""
+    tiers = available_cascade_tiers() or MODEL_CASCADE
+    return max(tiers, key=tier_price) if tiers else None
+
+@contextmanager
+def cascade_store():
+    """Open the cascade stats database in WAL mode"""
+    Path(CASCADE_STATS_DB).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(CASCADE_STATS_DB, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tiers (
+                tier TEXT PRIMARY KEY,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                accepted INTEGER NOT NULL DEFAULT 0,
+                cost_usd REAL NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS totals (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                requests INTEGER NOT NULL DEFAULT 0,
+                cost_usd REAL NOT NULL DEFAULT 0,
+                baseline_cost_usd REAL NOT NULL DEFAULT 0
+            )
+        """)
+        if os.path.abspath(CASCADE_STATS_DB) not in _cascade_stores_ready:
+            _cascade_stores_ready.add(os.path.abspath(CASCADE_STATS_DB))
+            import_legacy_cascade_stats(conn)
+        yield conn
+    finally:
+        conn.close()
+
+_cascade_stores_ready = set()
+
+def import_legacy_cascade_stats(conn):
+    """Seed empty stats from the JSON file earlier versions kept"""
+    legacy = Path(CASCADE_STATS_DB).parent / LEGACY_CASCADE_STATS_FILE
+    if not legacy.exists() or conn.execute("SELECT 1 FROM totals").fetchone():
+        return
+    try:
+        with open(legacy, "r", encoding='utf-8') as f:
+            stats = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ Not importing {legacy}: {e}")
+        return
+    conn.executemany(
+        "INSERT OR IGNORE INTO tiers (tier, attempts, accepted, cost_usd) VALUES (?, ?, ?, ?)",
+        [(tier, entry["attempts"], entry["accepted"], entry["cost_usd"]) for tier, entry in stats["tiers"].items()]
+    )
+    conn.execute("INSERT INTO totals (id, requests, cost_usd, baseline_cost_usd) VALUES (1, ?, ?, ?)",
+                 (stats["requests"], stats["cost_usd"], stats["baseline_cost_usd"]))
+    print(f"📥 Imported {stats['requests']} cascade request(s) from {legacy}")
+
+def record_cascade_request(attempts):
+    """Add one request's tier outcomes and costs to the running stats"""
+    # Baseline: the same tokens sent straight to the priciest tier
+    final_usage = next((a["usage"] for a in reversed(attempts) if a["usage"]), None)
+    baseline = baseline_tier()
+    baseline_cost = estimate_cost(baseline.split(":", 1)[1], final_usage) if baseline else 0.0
+
+    with cascade_store() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for attempt in attempts:
+                conn.execute(
+                    "INSERT INTO tiers (tier, attempts, accepted, cost_usd) VALUES (?, 1, ?, ?) "
+                    "ON CONFLICT(tier) DO UPDATE SET attempts = attempts + 1, "
+                    "accepted = accepted + excluded.accepted, cost_usd = cost_usd + excluded.cost_usd",
+                    (attempt["tier"], 0 if attempt["failures"] else 1, attempt["cost"])
+                )
+            conn.execute(
+                "INSERT INTO totals (id, requests, cost_usd, baseline_cost_usd) VALUES (1, 1, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET requests = requests + 1, "
+                "cost_usd = cost_usd + excluded.cost_usd, baseline_cost_usd = baseline_cost_usd + excluded.baseline_cost_usd",
+                (sum(attempt["cost"] for attempt in attempts), baseline_cost)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+def cascade_stats():
+    """Running stats in the shape cascade_report prints, or None before the first request"""
+    with cascade_store() as conn:
+        totals = conn.execute("SELECT requests, cost_usd, baseline_cost_usd FROM totals").fetchone()
+        tiers = conn.execute("SELECT tier, attempts, accepted, cost_usd FROM tiers ORDER BY tier").fetchall()
+    if not totals:
+        return None
+    stats = dict(totals)
+    stats["tiers"] = {row["tier"]: {key: row[key] for key in ("attempts", "accepted", "cost_usd")} for row in tiers}
+    return stats
+
+def cascade_report():
+    """Print per-tier acceptance rates and savings against the priciest tier"""
+    stats = cascade_stats()
+    if not stats:
+        print("📊 No cascade requests recorded yet")
+        return None
+
+    print(f"📊 Model cascade over {stats['requests']} request(s):")
+    for tier, tier_stats in stats["tiers"].items():
+        rate = tier_stats["accepted"] / tier_stats["attempts"] if tier_stats["attempts"] else 0
+        print(f"   {tier}: {tier_stats['accepted']}/{tier_stats['attempts']} accepted ({rate:.0%}), "
+              f"${tier_stats['cost_usd']:.4f}")
+    savings = stats["baseline_cost_usd"] - stats["cost_usd"]
+    print(f"   Spent ${stats['cost_usd']:.4f} vs ${stats['baseline_cost_usd']:.4f} "
+          f"on {baseline_tier() or 'n/a'} alone (saved ${savings:.4f})")
+    return stats
+
+# ===== Token budget =====
+# Offline token estimates so output limits are sized to the requested
+# structure instead of guessed. Estimates are calibrated per model family
+# from the usage each provider reports back.
+TOKEN_CALIBRATION_FILE = f"{STATE_DIR}/token-calibration.json"
+TOKEN_USAGE_LOG = f"{STATE_DIR}/token-usage.jsonl"
+OUTPUT_HEADROOM = 1.25
+# A request whose completions all hit the output limit is retried once with this much more room
+TRUNCATION_RETRY_FACTOR = 2
+WORDS_PER_PARAGRAPH = 110
+TOKENS_PER_CODE_EXAMPLE = 90
+TOKENS_PER_SECTION_OVERHEAD = 40
+
+# (context window, max output tokens per completion)
+MODEL_LIMITS = {
+    "gpt-4o-mini": (128000, 16384),
+    "gpt-4o": (128000, 16384),
+    "gpt-4.1-mini": (1047576, 32768),
+    "gpt-4.1": (1047576, 32768),
+    "gemini-2.5-flash-preview-05-20": (1048576, 65536),
+    "gemini-2.5-flash": (1048576, 65536),
+    "gemini-2.5-pro": (1048576, 65536)
+}
+DEFAULT_MODEL_LIMITS = (128000, 8192)
+
+# Uncalibrated starting points. Gemini 2.5 spends part of its output budget
+# on thinking, so it gets a fixed reserve on top of the visible text.
+TOKEN_FAMILIES = {
+    "openai": {"tokens_per_word": 1.3, "tokens_per_symbol": 0.6, "reserve": 0},
+    "gemini": {"tokens_per_word": 1.35, "tokens_per_symbol": 0.6, "reserve": 2048},
+    "default": {"tokens_per_word": 1.4, "tokens_per_symbol": 0.7, "reserve": 0}
+}
+
+def model_family(model_name):
+    if model_name.startswith(("gpt", "o1", "o3", "o4")):
+        return "openai"
+    if model_name.startswith("gemini"):
+        return "gemini"
+    return "default"
+
+def load_token_calibration():
+    """Per-family correction ratios learned from actual usage"""
+    if Path(TOKEN_CALIBRATION_FILE).exists():
+        try:
+            with open(TOKEN_CALIBRATION_FILE, "r", encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass
+    return {}
+
+def _raw_token_estimate(text, family):
+    coefficients = TOKEN_FAMILIES[family]
+    words = len(re.findall(r'\w+', text))
+    symbols = len(re.findall(r'[^\w\s]', text))
+    return words * coefficients["tokens_per_word"] + symbols * coefficients["tokens_per_symbol"]
+
+def estimate_tokens(text, family, calibration=None):
+    """Calibrated token count of a prompt"""
+    calibration = load_token_calibration() if calibration is None else calibration
+    ratio = calibration.get(family, {}).get("input_ratio", 1.0)
+    return int(math.ceil(_raw_token_estimate(text, family) * ratio))
+
+def _raw_output_estimate(prompt, family):
+    """Tokens one completion should need for the structure the prompt asks for"""
+    paragraph_words = sum(
+        int(high) * WORDS_PER_PARAGRAPH
+        for _, high in re.findall(r'Write (\d+)-(\d+) detailed paragraphs', prompt)
+    )
+    target = re.search(r'(\d{3,5})-(\d{3,5}) words', prompt)
+    target_words = int(target.group(2)) if target else 0
+    words = max(paragraph_words, target_words) or 1500
+
+    code_examples = sum(
+        len(re.findall(r'"(?:[^"\\]|\\.)+"', block))
+        for block in re.findall(r'"code_examples": \[(.*?)\]', prompt)
+    )
+    sections = max(prompt.count('"heading":'), 1)
+    return (words * TOKEN_FAMILIES[family]["tokens_per_word"]
+            + code_examples * TOKENS_PER_CODE_EXAMPLE
+            + sections * TOKENS_PER_SECTION_OVERHEAD)
+
+def plan_token_budget(model_name, prompt, candidates=1):
+    """Size the prompt, predict the output and choose an output limit (or a split)"""
+    family = model_family(model_name)
+    calibration = load_token_calibration()
+    context_window, max_output = MODEL_LIMITS.get(model_name, DEFAULT_MODEL_LIMITS)
+
+    input_tokens = estimate_tokens(prompt, family, calibration)
+    output_ratio = calibration.get(family, {}).get("output_ratio", 1.0)
+    output_tokens = int(math.ceil(_raw_output_estimate(prompt, family) * output_ratio))
+    needed = int(output_tokens * OUTPUT_HEADROOM) + TOKEN_FAMILIES[family]["reserve"]
+
+    # Split when one completion can't hold the post, or the candidates overflow the context
+    parts = max(1, math.ceil(needed / max_output))
+    while parts < 8 and input_tokens + math.ceil(needed / parts) * candidates > context_window:
+        parts += 1
+    output_limit = min(max_output, int(math.ceil(needed / parts)))
+
+    plan = {
+        "model": model_name, "family": family, "input_tokens": input_tokens,
+        "output_tokens": output_tokens, "output_limit": output_limit, "parts": parts,
+        "candidates": candidates
+    }
+    print(f"📏 Token plan for {model_name}: ~{input_tokens} in, ~{output_tokens} out per completion, "
+          f"limit {output_limit}" + (f", split into {parts} requests" if parts > 1 else ""))
+    return plan
+
+def split_prompt(prompt, parts):
+    """Prompts that each ask for a contiguous slice of the sections"""
+    if parts <= 1:
+        return [prompt]
+    total = max(prompt.count('"heading":'), parts)
+    bounds = [round(total * i / parts) for i in range(parts + 1)]
+    return [
+        prompt + f"""
+This request is part {i + 1} of {parts}. Return the same JSON structure, but include only
+sections {bounds[i] + 1} to {bounds[i + 1]} (counting from 1) of the {total} sections listed above.
+"""
+        for i in range(parts)
+    ]
+
+def merge_split_responses(parts):
+    """Join split responses back into whole candidates; sums usage"""
+    usage = combine_usage(*(part_usage for _, part_usage in parts))
+    if len(parts) == 1:
+        return parts[0][0], usage
+
+    merged = []
+    for texts in zip(*(candidates for candidates, _ in parts)):
+        pieces = [extract_structured_data(text) for text in texts]
+        if not all(isinstance(piece, dict) for piece in pieces):
+            continue
+        whole = dict(pieces[0])
+        whole["sections"] = [section for piece in pieces for section in piece.get("sections", [])]
+        merged.append(json.dumps(whole))
+    return merged, usage
+
+def record_token_usage(tier, plan, usage):
+    """Log predicted against actual usage and update the family calibration"""
+    if not usage or not usage.get("output_tokens"):
+        return
+    predicted_output = plan["output_tokens"] * plan["candidates"]
+    print(f"📏 {tier}: predicted {plan['input_tokens']} in / {predicted_output} out, "
+          f"actual {usage['input_tokens']} in / {usage['output_tokens']} out")
+
+    Path(TOKEN_USAGE_LOG).parent.mkdir(parents=True, exist_ok=True)
+    with open(TOKEN_USAGE_LOG, "a", encoding='utf-8') as f:
+        f.write(json.dumps({
+            "at": datetime.datetime.now().isoformat(), "tier": tier,
+            "predicted_input": plan["input_tokens"], "predicted_output": predicted_output,
+            "actual_input": usage["input_tokens"], "actual_output": usage["output_tokens"],
+            "output_limit": plan["output_limit"], "parts": plan["parts"], "truncated": usage.get("truncated", 0)
+        }) + "\n")
+
+    # Exponential moving average of actual/predicted per family
+    calibration = load_token_calibration()
+    family = calibration.setdefault(plan["family"], {"input_ratio": 1.0, "output_ratio": 1.0, "samples": 0})
+    alpha = 0.2
+    if plan["input_tokens"] and usage["input_tokens"]:
+        observed = usage["input_tokens"] / plan["input_tokens"] * family["input_ratio"]
+        family["input_ratio"] = round((1 - alpha) * family["input_ratio"] + alpha * observed, 4)
+    observed = usage["output_tokens"] / predicted_output * family["output_ratio"]
+    if usage.get("truncated"):
+        # The real need is above what was used: grow the ratio by at least the headroom
+        observed = max(observed, family["output_ratio"] * OUTPUT_HEADROOM)
+    family["output_ratio"] = round((1 - alpha) * family["output_ratio"] + alpha * observed, 4)
+    family["samples"] += 1
+    write_json_atomic(TOKEN_CALIBRATION_FILE, calibration)
+
+# ===== Rate limits =====
+# Token buckets for requests and tokens per minute, per provider and per
+# model, kept in SQLite so every thread, process and site on the machine
+# draws from the same budget. A 429 blocks the model until Retry-After and
+# the request is retried rather than failed.
+RATE_LIMIT_DB = f"{STATE_DIR}/ratelimits.db"
+RATE_LIMIT_RETRIES = 3
+MAX_THROTTLE_SLEEP = 60
+
+# Scope ("provider" or "provider:model") -> limits. rpm/tpm refill over a
+# minute; daily_* reset at midnight UTC. Override with BLOG_RATE_LIMITS (JSON).
+DEFAULT_RATE_LIMITS = {
+    "openai": {"rpm": 500},
+    "openai:gpt-4o-mini": {"rpm": 500, "tpm": 200000},
+    "openai:gpt-4.1-mini": {"rpm": 500, "tpm": 200000},
+    "gemini": {"rpm": 15},
+    "gemini:gemini-2.5-flash-preview-05-20": {"rpm": 10, "tpm": 250000, "daily_requests": 500},
+    "gemini:gemini-2.5-flash": {"rpm": 10, "tpm": 250000, "daily_requests": 500}
+}
+RATE_LIMITS = {**DEFAULT_RATE_LIMITS, **json.loads(os.environ.get("BLOG_RATE_LIMITS", "{}"))}
+
+@contextmanager
+def rate_limit_store():
+    """Open the shared limiter database in WAL mode"""
+    Path(RATE_LIMIT_DB).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(RATE_LIMIT_DB, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                key TEXT PRIMARY KEY,
+                level REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS scopes (
+                scope TEXT PRIMARY KEY,
+                blocked_until REAL NOT NULL DEFAULT 0,
+                throttles INTEGER NOT NULL DEFAULT 0,
+                throttled_seconds REAL NOT NULL DEFAULT 0,
+                rejections INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS daily_usage (
+                scope TEXT NOT NULL,
+                day TEXT NOT NULL,
+                requests INTEGER NOT NULL DEFAULT 0,
+                tokens INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (scope, day)
+            )
+        """)
+        yield conn
+    finally:
+        conn.close()
+
+def rate_limit_scopes(tier):
+    """The provider scope and the model scope a tier draws from"""
+    return [tier.split(":", 1)[0], tier]
+
+def _utc_day():
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d")
+
+def _bucket_level(conn, key, capacity, now):
+    row = conn.execute("SELECT level, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+    if not row:
+        return capacity
+    return min(capacity, row["level"] + (now - row["updated"]) * capacity / 60)
+
+def _bump_scope(conn, scope, **columns):
+    conn.execute("INSERT OR IGNORE INTO scopes (scope) VALUES (?)", (scope,))
+    for column, amount in columns.items():
+        conn.execute(f"UPDATE scopes SET {column} = {column} + ? WHERE scope = ?", (amount, scope))
+
+def try_acquire(tier, tokens):
+    """Take one request and `tokens` tokens from every bucket, or return the seconds to wait
+
+    Raises RuntimeError when a daily quota is used up, so the cascade moves on.
+    """
+    now = time.time()
+    day = _utc_day()
+    with rate_limit_store() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            waits, levels = [], {}
+            for scope in rate_limit_scopes(tier):
+                limits = RATE_LIMITS.get(scope, {})
+                state = conn.execute("SELECT blocked_until FROM scopes WHERE scope = ?", (scope,)).fetchone()
+                if state and state["blocked_until"] > now:
+                    waits.append(state["blocked_until"] - now)
+
+                used = conn.execute(
+                    "SELECT requests, tokens FROM daily_usage WHERE scope = ? AND day = ?", (scope, day)
+                ).fetchone()
+                if limits.get("daily_requests") and used and used["requests"] >= limits["daily_requests"]:
+                    raise RuntimeError(f"Daily request quota for {scope} is used up")
+                if limits.get("daily_tokens") and used and used["tokens"] + tokens > limits["daily_tokens"]:
+                    raise RuntimeError(f"Daily token quota for {scope} is used up")
+
+                for kind, amount in (("rpm", 1), ("tpm", tokens)):
+                    capacity = limits.get(kind)
+                    if not capacity:
+                        continue
+                    key = f"{scope}/{kind}"
+                    levels[key] = (_bucket_level(conn, key, capacity, now), min(amount, capacity))
+                    level, needed = levels[key]
+                    if level < needed:
+                        waits.append((needed - level) * 60 / capacity)
+
+            if waits:
+                wait = max(waits)
+                for scope in rate_limit_scopes(tier):
+                    _bump_scope(conn, scope, throttles=1, throttled_seconds=min(wait, MAX_THROTTLE_SLEEP))
+                conn.execute("COMMIT")
+                return wait
+
+            for key, (level, needed) in levels.items():
+                conn.execute("INSERT OR REPLACE INTO buckets (key, level, updated) VALUES (?, ?, ?)",
+                             (key, level - needed, now))
+            for scope in rate_limit_scopes(tier):
+                conn.execute("INSERT OR IGNORE INTO daily_usage (scope, day) VALUES (?, ?)", (scope, day))
+                conn.execute("UPDATE daily_usage SET requests = requests + 1, tokens = tokens + ? "
+                             "WHERE scope = ? AND day = ?", (tokens, scope, day))
+            conn.execute("COMMIT")
+            return 0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+def settle_tokens(tier, reserved, actual, rejected=False):
+    """Correct the token buckets once the real usage is known
+
+    A request the provider rejected also gives back its daily request.
+    """
+    difference = actual - reserved
+    if not difference and not rejected:
+        return
+    now = time.time()
+    with rate_limit_store() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for scope in rate_limit_scopes(tier):
+            capacity = RATE_LIMITS.get(scope, {}).get("tpm")
+            if capacity:
+                key = f"{scope}/tpm"
+                # May go negative: the overrun is paid back before the next request
+                conn.execute("INSERT OR REPLACE INTO buckets (key, level, updated) VALUES (?, ?, ?)",
+                             (key, _bucket_level(conn, key, capacity, now) - difference, now))
+            conn.execute("UPDATE daily_usage SET tokens = MAX(0, tokens + ?), requests = MAX(0, requests - ?) "
+                         "WHERE scope = ? AND day = ?", (difference, int(rejected), scope, _utc_day()))
+        conn.execute("COMMIT")
+
+def block_tier(tier, seconds):
+    """Hold every request to a model until the provider's Retry-After has passed"""
+    with rate_limit_store() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _bump_scope(conn, tier, rejections=1)
+        conn.execute("UPDATE scopes SET blocked_until = MAX(blocked_until, ?) WHERE scope = ?",
+                     (time.time() + seconds, tier))
+        conn.execute("COMMIT")
+
+def is_rate_limit_error(error):
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None) or getattr(error, "code", None)
+    return status == 429 or type(error).__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests")
+
+def retry_after_seconds(error):
+    """Delay the provider asked for, from Retry-After headers or the error text"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if headers.get("retry-after"):
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            try:
+                retry_at = email.utils.parsedate_to_datetime(headers["retry-after"])
+                return max(0.0, retry_at.timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    # Gemini puts the delay in the message ("Please retry in 38.4s") and the details (retry_delay { seconds: 38 })
+    match = re.search(r'retry in (\d+(?:\.\d+)?)\s*s|retry_delay\s*\{\s*seconds:\s*(\d+)', str(error), re.IGNORECASE)
+    return float(match.group(1) or match.group(2)) if match else None
+
+def reserved_tokens(plan):
+    """Tokens to hold for one request of a plan"""
+    return plan["input_tokens"] + math.ceil(plan["output_tokens"] / plan["parts"]) * plan["candidates"]
+
+def rate_limited_call(tier, plan, call):
+    """Run call() inside the tier's rate limits, retrying 429s after Retry-After"""
+    tokens = reserved_tokens(plan)
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        wait = try_acquire(tier, tokens)
+        while wait:
+            print(f"⏳ {tier} at its rate limit, waiting {wait:.1f}s")
+            time.sleep(min(wait, MAX_THROTTLE_SLEEP))
+            wait = try_acquire(tier, tokens)
+        try:
+            result = call()
+        except Exception as e:
+            # Whatever went wrong, the reservation was not used
+            rate_limited = is_rate_limit_error(e)
+            settle_tokens(tier, tokens, 0, rejected=rate_limited)
+            if not rate_limited or attempt == RATE_LIMIT_RETRIES:
+                raise
+            delay = retry_after_seconds(e) or 5 * 2 ** attempt
+            print(f"🚦 {tier} returned 429, retrying in {delay:.1f}s")
+            block_tier(tier, delay)
+            continue
+        usage = result[1] or {}
+        settle_tokens(tier, tokens, usage.get("input_tokens", 0) + usage.get("output_tokens", 0) or tokens)
+        return result
+
+async def rate_limited_call_async(tier, plan, call):
+    """Async version of rate_limited_call; call() returns an awaitable"""
+    tokens = reserved_tokens(plan)
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        wait = await asyncio.to_thread(try_acquire, tier, tokens)
+        while wait:
+            print(f"⏳ {tier} at its rate limit, waiting {wait:.1f}s")
+            await asyncio.sleep(min(wait, MAX_THROTTLE_SLEEP))
+            wait = await asyncio.to_thread(try_acquire, tier, tokens)
+        try:
+            result = await call()
+        except Exception as e:
+            # Whatever went wrong, the reservation was not used
+            rate_limited = is_rate_limit_error(e)
+            await asyncio.to_thread(settle_tokens, tier, tokens, 0, rate_limited)
+            if not rate_limited or attempt == RATE_LIMIT_RETRIES:
+                raise
+            delay = retry_after_seconds(e) or 5 * 2 ** attempt
+            print(f"🚦 {tier} returned 429, retrying in {delay:.1f}s")
+            await asyncio.to_thread(block_tier, tier, delay)
+            continue
+        usage = result[1] or {}
+        await asyncio.to_thread(settle_tokens, tier, tokens,
+                                usage.get("input_tokens", 0) + usage.get("output_tokens", 0) or tokens)
+        return result
+
+def rate_limit_report():
+    """Print bucket utilisation, throttling and daily quota use per scope"""
+    now = time.time()
+    day = _utc_day()
+    metrics = {}
+    with rate_limit_store() as conn:
+        known = {row["scope"] for row in conn.execute("SELECT scope FROM scopes")}
+        known |= {row["scope"] for row in conn.execute("SELECT scope FROM daily_usage WHERE day = ?", (day,))}
+        print("🚦 Rate limits:")
+        for scope in sorted(set(RATE_LIMITS) | known):
+            limits = RATE_LIMITS.get(scope, {})
+            state = conn.execute("SELECT * FROM scopes WHERE scope = ?", (scope,)).fetchone()
+            used = conn.execute("SELECT requests, tokens FROM daily_usage WHERE scope = ? AND day = ?",
+                                (scope, day)).fetchone()
+            entry = {
+                "throttles": state["throttles"] if state else 0,
+                "throttled_seconds": round(state["throttled_seconds"], 1) if state else 0,
+                "rejections": state["rejections"] if state else 0,
+                "blocked_for": round(max(0, state["blocked_until"] - now), 1) if state else 0,
+                "requests_today": used["requests"] if used else 0,
+                "tokens_today": used["tokens"] if used else 0
+            }
+            parts = []
+            for kind in ("rpm", "tpm"):
+                if limits.get(kind):
+                    level = _bucket_level(conn, f"{scope}/{kind}", limits[kind], now)
+                    entry[f"{kind}_utilisation"] = round(1 - level / limits[kind], 3)
+                    parts.append(f"{kind} {entry[f'{kind}_utilisation']:.0%} of {limits[kind]}")
+            for kind, used_key in (("daily_requests", "requests_today"), ("daily_tokens", "tokens_today")):
+                if limits.get(kind):
+                    parts.append(f"{kind} {entry[used_key]}/{limits[kind]}")
+            metrics[scope] = entry
+            print(f"   {scope}: {', '.join(parts) or 'no limits'}; today {entry['requests_today']} req / "
+                  f"{entry['tokens_today']} tok; {entry['throttles']} throttle(s) "
+                  f"({entry['throttled_seconds']}s), {entry['rejections']} 429(s)"
+                  + (f", blocked {entry['blocked_for']}s" if entry["blocked_for"] else ""))
+    return metrics
+
+# ===== Best-of-N candidates =====
+# With BLOG_CANDIDATES > 1 each provider call asks for N completions in one
+# request (OpenAI n, Gemini candidate_count) and the best one is kept.
+BLOG_CANDIDATES = max(1, int(os.environ.get("BLOG_CANDIDATES", "1")))
+TARGET_WORDS = 2500
+
+def score_candidate(blog_content):
+    """Local quality score in [0, 1] for one candidate response"""
+    data = extract_structured_data(blog_content) if blog_content else None
+    if not isinstance(data, dict) or not isinstance(data.get("sections"), list):
+        return {"score": 0.0, "parsed": False}
+
+    sections = [section for section in data["sections"] if isinstance(section, dict)]
+    texts = [str(section.get("content", "")) for section in sections]
+    words = sum(len(text.split()) for text in texts)
+
+    complete = sum(
+        1 for section, text in zip(sections, texts)
+        if section.get("heading") and len(text.split()) >= MIN_WORDS_PER_SECTION
+    )
+    completeness = complete / max(len(sections), MIN_SECTIONS)
+
+    paragraphs = [p.strip().lower() for text in texts for p in text.split('\n\n') if p.strip()]
+    duplicate_ratio = 1 - len(set(paragraphs)) / len(paragraphs) if paragraphs else 1.0
+
+    repetitions = sum(len(re.findall(pattern, text)) for pattern in REPETITIVE_PATTERNS for text in texts)
+    repetition_density = repetitions / max(words / 1000, 1)
+
+    score = (
+        0.3 * min(words / TARGET_WORDS, 1.0)
+        + 0.4 * completeness
+        + 0.15 * (1 - duplicate_ratio)
+        + 0.15 * (1 - min(repetition_density / 5, 1.0))
+    )
+    return {
+        "score": round(score, 4), "parsed": True, "words": words, "sections": len(sections),
+        "completeness": round(completeness, 2), "duplicate_ratio": round(duplicate_ratio, 2),
+        "repetition_density": round(repetition_density, 2)
+    }
+
+def pick_best_candidate(candidates):
+    """Score candidates and return the best one"""
+    if len(candidates) <= 1:
+        return candidates[0] if candidates else None
+
+    # A few milliseconds per candidate: cheaper inline than starting a process pool
+    scores = [score_candidate(candidate) for candidate in candidates]
+
+    for i, score in enumerate(scores):
+        print(f"   🎯 Candidate {i + 1}: score {score['score']:.3f} "
+              f"({score.get('words', 0)} words, completeness {score.get('completeness', 0)})")
+    best = max(range(len(candidates)), key=lambda i: scores[i]["score"])
+    print(f"🏆 Keeping candidate {best + 1} of {len(candidates)}")
+    return candidates[best]
+
+# ===== Shared assets =====
+# Inline <script> and <style> blocks are the same on every page, so the larger
+# ones move to files under blog/assets named after their content. Browsers
+# fetch each once for the whole site, and a changed block gets a new name
+# instead of a stale cached copy. A stylesheet blocks rendering wherever it
+# is, but the template's is shared by every post and costs a single cached
+# request after the first page, so it moves above 1 KB. A script in <head> blocks on every view until cached
+# and runs in order with its neighbours, so it moves only above 4 KB; scripts
+# in <body> move above 1 KB and load deferred. Rendering only works out the
+# references: the files are written when a page is published.
+ASSETS_DIR_NAME = "assets"
+INLINE_BLOCK_PATTERN = re.compile(r'<(script|style)(\s[^>]*)?>(.*?)</\1>', re.DOTALL | re.IGNORECASE)
+# Attributes an extracted block may carry; anything else (src, ld+json, nonce) stays inline
+EXTERNALIZABLE_ATTRIBUTES = re.compile(r'^\s*(type="text/(?:javascript|css)")?\s*$')
+INLINE_BLOCKING_MAX_BYTES = int(os.environ.get("BLOG_INLINE_BLOCKING_MAX_BYTES", "4096"))
+INLINE_SCRIPT_MAX_BYTES = int(os.environ.get("BLOG_INLINE_SCRIPT_MAX_BYTES", "1024"))
+INLINE_STYLE_MAX_BYTES = int(os.environ.get("BLOG_INLINE_STYLE_MAX_BYTES", "1024"))
+
+def assets_dir():
+    return Path(BLOG_DIR) / ASSETS_DIR_NAME
+
+def asset_name(kind, content):
+    """Content-hashed filename of a script or style block"""
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]
+    return f"{'script' if kind == 'script' else 'style'}.{digest}.{'js' if kind == 'script' else 'css'}"
+
+def write_asset(name, content):
+    """Write an asset once; its name already says what it contains"""
+    path = assets_dir() / name
+    if path.exists():
+        return False
+    return write_output(path, content)
+
+def write_assets(assets):
+    """Publish the assets a page refers to; returns the names written"""
+    return [name for name, content in assets.items() if write_asset(name, content)]
+
+def externalizable_blocks(html, shared=None):
+    """Inline blocks worth moving out: (match, kind, content, render_blocking)
+
+    `shared` names the assets other pages use; a stylesheet outside it is
+    only one page's and stays inline below the blocking limit. None counts
+    every block as shared, as for the template.
+    """
+    body = re.search(r'<body\b', html, re.IGNORECASE)
+    body_start = body.start() if body else len(html)
+    blocks = []
+    for match in INLINE_BLOCK_PATTERN.finditer(html):
+        kind, attributes, text = match.group(1).lower(), match.group(2) or "", match.group(3)
+        if not text.strip() or not EXTERNALIZABLE_ATTRIBUTES.match(attributes) or "{{" in text:
+            continue
+        # Dedent so the same block indented differently on two pages is one asset
+        content = textwrap.dedent(text).strip() + "\n"
+        blocking = kind == "style" or match.start() < body_start
+        if kind == "style":
+            shared_style = shared is None or asset_name(kind, content) in shared
+            limit = INLINE_STYLE_MAX_BYTES if shared_style else INLINE_BLOCKING_MAX_BYTES
+        else:
+            limit = INLINE_BLOCKING_MAX_BYTES if blocking else INLINE_SCRIPT_MAX_BYTES
+        if len(content.encode('utf-8')) > limit:
+            blocks.append((match, kind, content, blocking))
+    return blocks
+
+def externalize_inline_assets(html, page_dir=None, shared=None):
+    """Point a page's larger inline blocks at assets; returns (html, {asset name: content})
+
+    Nothing is written; write_assets() publishes them along with the page.
+    """
+    prefix = Path(os.path.relpath(assets_dir(), page_dir or BLOG_DIR)).as_posix()
+    assets = {}
+    parts = []
+    end = 0
+    for match, kind, content, blocking in externalizable_blocks(html, shared):
+        name = asset_name(kind, content)
+        assets[name] = content
+        if kind == "style":
+            reference = f'<link rel="stylesheet" href="{prefix}/{name}">'
+        else:
+            # Head scripts keep their place in the order; body scripts needn't hold up parsing
+            reference = f'<script src="{prefix}/{name}"{"" if blocking else " defer"}></script>'
+        parts += [html[end:match.start()], reference]
+        end = match.end()
+    return "".join(parts) + html[end:], assets
+
+def referenced_assets(root=None):
+    """Asset names referenced from any page under root"""
+    pattern = re.compile(r'(?:src|href)="[^"]*?assets/((?:script|style)\.[0-9a-f]{12}\.(?:js|css))"')
+    names = set()
+    for path in Path(root or BLOG_DIR).rglob("*.html"):
+        with open(path, "r", encoding='utf-8') as f:
+            names.update(pattern.findall(f.read()))
+    return names
+
+def externalize_site_assets(apply=False):
+    """Rewrite saved posts and the index to use shared assets, then drop unreferenced ones"""
+    moved = 0
+    rewritten = 0
+    shared = set(template_assets()) | {path.name for path in assets_dir().glob("*")}
+    for path in sorted(Path(BLOG_DIR).glob("*.html")):
+        if path.name in UNCHECKED_PAGES:
+            continue  # the template stays the editable source of the blocks
+        with open(path, "r", encoding='utf-8') as f:
+            html = f.read()
+        if not apply:
+            blocks = externalizable_blocks(html, shared)
+            size = sum(len(match.group(0).encode('utf-8')) for match, *_ in blocks)
+            if blocks:
+                print(f"📦 {path.name}: {len(blocks)} inline block(s), {size} bytes")
+                moved += size
+            continue
+        new_html, assets = externalize_inline_assets(html, path.parent, shared)
+        write_assets(assets)
+        if assets and write_output(path, new_html):
+            rewritten += 1
+            moved += len(html.encode('utf-8')) - len(new_html.encode('utf-8'))
+
+    if not apply:
+        print(f"📦 {moved} bytes of inline script/style would move to {assets_dir()} (run with --apply)")
+        return 0
+
+    # Keep whatever the template itself needs, even if no saved page uses it yet
+    keep = referenced_assets() | set(template_assets())
+    removed = 0
+    for path in sorted(assets_dir().glob("*")):
+        if path.is_file() and path.name not in keep:
+            path.unlink()
+            removed += 1
+    print(f"📦 Rewrote {rewritten} page(s), {moved} bytes moved to {assets_dir()}"
+          + (f", removed {removed} unused asset(s)" if removed else ""))
+    return rewritten
+
+def asset_output_paths():
+    """Asset files that exist, for staging alongside a post"""
+    return [str(path) for path in sorted(assets_dir().glob("*")) if path.is_file()]
+
+# ===== Functions =====
+
+def get_next_topic():
+    """Read the first topic from topics.md"""
+    if not Path(TOPICS_FILE).exists():
+        print(f"Error: {TOPICS_FILE} not found.")
+        return None
+
+    with open(TOPICS_FILE, "r") as f:
+        topics = [line.strip() for line in f if line.strip()]
+    if not topics:
+        return None
+    
+    return topics[0], topics[1:]
+
+def update_topics_file(remaining_topics):
+    """Save remaining topics back to topics.md"""
+    with open(TOPICS_FILE, "w") as f:
+        for topic in remaining_topics:
+            f.write(topic + "\n")
+
+def gemini_blog_prompt(topic):
+    """Gemini gets its own prompt with concrete code examples"""
+    return f"""
+Generate a comprehensive, detailed blog post about: {topic}
+
+Return ONLY a valid JSON object with this structure:
+{{
+    "title": "Detailed Blog Title",
+    "description": "Comprehensive description of what this blog post covers",
+    "sections": [
+        {{
+            "heading": "Introduction",
+            "content": "Write 3-4 detailed paragraphs introducing the topic, explaining its importance, and setting the context for readers. Make this engaging and informative.",
+            "code_examples": ["const allocateResources = (demand) => {{ return Math.min(demand * 1.5, MAX_RESOURCES); }};", "const monitorPerformance = () => {{ return {{ latency: measureLatency(), throughput: measureThroughput() }}; }};"]
+        }},
+        {{
+            "heading": "Core Concepts and Fundamentals",
+            "content": "Write 4-5 detailed paragraphs explaining the fundamental concepts, principles, and underlying mechanisms. Break down complex ideas into digestible parts with clear explanations.",
+            "code_examples": ["const allocateResources = (demand) => {{ return Math.min(demand * 1.5, MAX_RESOURCES); }};", "const monitorPerformance = () => {{ return {{ latency: measureLatency(), throughput: measureThroughput() }}; }};"]
+        }},
+        {{
+            "heading": "Implementation Strategies and Best Practices",
+            "content": "Write 4-5 detailed paragraphs covering practical implementation approaches, common patterns, best practices, and real-world considerations. Include specific guidance and actionable advice.",
+            "code_examples": ["const isFeatureEnabled = (featureName, userId) => {{ const feature = getFeatureConfig(featureName); return feature.enabled && hashUserId(userId) % 100 < feature.rolloutPercentage; }};", "const handleOperation = async (op) => {{ try {{ const result = await op(); logSuccess(op.name, result); return result; }} catch (error) {{ logError(op.name, error); throw error; }} }};"]
+        }},
+        {{
+            "heading": "Advanced Techniques and Optimization",
+            "content": "Write 3-4 detailed paragraphs covering advanced techniques, performance optimization strategies, scalability considerations, and cutting-edge approaches in this field.",
+            "code_examples": ["const predictScaling = (data) => {{ const patterns = analyzePatterns(data); return applyMLModel(patterns); }};", "const autoRespond = (issue) => {{ const response = determineResponse(issue); if (response.automated) {{ executeResponse(response.action); }} else {{ escalateToHuman(issue); }} }};"]
+        }},
+        {{
+            "heading": "Real-World Applications and Case Studies",
+            "content": "Write 3-4 detailed paragraphs discussing real-world applications, industry use cases, success stories, and lessons learned from practical implementations.",
+            "code_examples": ["const deployWithRollback = async (version) => {{ const health = await monitorHealth(); if (health.failing > THRESHOLD) {{ await rollback(); return false; }} return true; }};", "const generateDashboard = (metrics) => {{ return {{ status: getStatus(), alerts: getAlerts(), recommendations: generateRecs(metrics) }}; }};"]
+        }},
+        {{
+            "heading": "Conclusion and Future Considerations",
+            "content": "Write 2-3 detailed paragraphs summarizing key takeaways, discussing future trends, and providing guidance on next steps for readers.",
+            "code_examples": []
+        }}
+    ],
+    "tags": ["Serverless", "Cloud Computing", "Performance", "Architecture", "Best Practices"],
+    "read_time": 12
+}}
+
+IMPORTANT: 
+- Return ONLY valid JSON, no other text
+- Make each section comprehensive and detailed
+- Aim for 15-20 total paragraphs across all sections
+- Include specific, actionable insights and examples
+- Write content that provides real value to readers
+- For code_examples: Provide actual working code snippets, NOT placeholder comments like "// Example: ..."
+- Code should be real, functional examples that readers can use
+- Avoid generic placeholders - write specific, meaningful code
+"""
+
+def gemini_generation_config(candidate_count=1, max_output_tokens=8000):
+    return GenerationConfig(
+        temperature=0.4,  # Slightly higher for more creative content
+        max_output_tokens=max_output_tokens,  # Sized by plan_token_budget()
+        top_p=0.9,  # Add top_p for better content diversity
+        top_k=40,   # Add top_k for better content selection
+        candidate_count=candidate_count
+    )
+
+GEMINI_FINISH_REASONS = {1: "STOP", 2: "MAX_TOKENS", 3: "SAFETY", 4: "RECITATION", 5: "OTHER"}
+
+def gemini_finish_reason(candidate):
+    """Finish reason name of a Gemini candidate (the SDK returns an enum or a bare int)"""
+    reason = getattr(candidate, 'finish_reason', None)
+    return getattr(reason, 'name', None) or GEMINI_FINISH_REASONS.get(reason, reason)
+
+def gemini_candidate_texts(response):
+    """Text of every candidate in a Gemini response, leaving out those cut off at the limit"""
+    candidates = getattr(response, 'candidates', None) or []
+    if len(candidates) <= 1:
+        if candidates and gemini_finish_reason(candidates[0]) == "MAX_TOKENS":
+            return []
+        text = gemini_response_text(response)
+        return [text] if text else []
+    texts = []
+    for candidate in candidates:
+        if gemini_finish_reason(candidate) == "MAX_TOKENS":
+            continue
+        parts = getattr(candidate.content, 'parts', None) or []
+        text = "".join(getattr(part, 'text', '') for part in parts)
+        if text:
+            texts.append(text)
+    print(f"✅ Gemini returned {len(texts)} candidate(s)")
+    return texts
+
+def gemini_response_text(response):
+    """Return the text of a Gemini response, or None with the reason logged"""
+    if response and response.parts:
+        content = response.text
+        print(f"✅ Gemini generated content: {len(content)} characters")
+        return content
+    else:
+        finish_reason = None
+        if hasattr(response, 'candidates') and response.candidates:
+            finish_reason = gemini_finish_reason(response.candidates[0])
+
+        if finish_reason == "SAFETY":
+            print("❌ Gemini generated no readable text content. Response was likely blocked due to safety concerns or content policy.")
+        else:
+            print(f"❌ Gemini generated no readable text content. Finish reason: {finish_reason}.")
+        return None
+
+def gemini_usage(response):
+    """Token counts reported by Gemini"""
+    metadata = getattr(response, 'usage_metadata', None)
+    return {
+        "input_tokens": getattr(metadata, 'prompt_token_count', 0) or 0,
+        "output_tokens": getattr(metadata, 'candidates_token_count', 0) or 0,
+        "truncated": sum(1 for candidate in getattr(response, 'candidates', None) or []
+                         if gemini_finish_reason(candidate) == "MAX_TOKENS")
+    }
+
+def build_blog_prompt(topic, journal=None, provider="openai"):
+    """Prompt asking the model for the structured JSON post"""
+    if provider == "gemini":
+        prompt = gemini_blog_prompt(topic)
+    else:
+        prompt = f"""
+You are a technical blog writer. Generate a comprehensive, detailed blog post about: {topic}
+
+IMPORTANT: You must return ONLY a valid JSON object. No other text, no explanations, no markdown formatting.
+
+Return this exact JSON structure:
+{{
+    "title": "Your Comprehensive Blog Title Here",
+    "description": "A detailed description of what this blog post covers and what readers will learn",
+    "sections": [
+        {{
+            "heading": "Introduction",
+            "content": "Write 3-4 detailed paragraphs introducing the topic, explaining its importance in modern cloud computing, and setting the context for readers. Make this engaging and informative.",
+            "code_examples": []
+        }},
+        {{
+            "heading": "Core Concepts and Fundamentals",
+            "content": "Write 4-5 detailed paragraphs explaining the fundamental concepts, principles, and underlying mechanisms. Break down complex ideas into digestible parts with clear explanations and examples.",
+            "code_examples": ["// Detailed code example 1 with comprehensive comments", "// Detailed code example 2 with explanations", "// Configuration example with best practices"]
+        }},
+        {{
+            "heading": "Implementation Strategies and Best Practices",
+            "content": "Write 4-5 detailed paragraphs covering practical implementation approaches, common patterns, best practices, and real-world considerations. Include specific guidance and actionable advice.",
+            "code_examples": ["// Best practice implementation with detailed comments", "// Error handling and edge case examples", "// Performance optimization code"]
+        }},
+        {{
+            "heading": "Advanced Techniques and Optimization",
+            "content": "Write 3-4 detailed paragraphs covering advanced techniques, performance optimization strategies, scalability considerations, and cutting-edge approaches in this field.",
+            "code_examples": ["// Advanced optimization example", "// Performance monitoring and tuning code", "// Scalability implementation"]
+        }},
+        {{
+            "heading": "Real-World Applications and Case Studies",
+            "content": "Write 3-4 detailed paragraphs discussing real-world applications, industry use cases, success stories, and lessons learned from practical implementations.",
+            "code_examples": ["// Real-world implementation example", "// Case study code snippet", "// Production deployment code"]
+        }},
+        {{
+            "heading": "Conclusion and Future Considerations",
+            "content": "Write 2-3 detailed paragraphs summarizing key takeaways, discussing future trends, and providing guidance on next steps for readers.",
+            "code_examples": []
+        }}
+    ],
+    "tags": ["Serverless", "Cloud Computing", "Performance", "Architecture", "Best Practices"],
+    "read_time": 15
+}}
+
+Requirements:
+- Focus on cloud computing, serverless, or distributed systems
+- Make content comprehensive, informative, and engaging
+- Include practical examples and code snippets where relevant
+- Target total content: 2000-3000 words across all sections
+- Return ONLY valid JSON, no other text
+- Use technical but accessible language
+- Ensure JSON is properly formatted with no syntax errors
+- Each section should be substantial and provide real value
+- Include specific, actionable insights and implementation guidance
+
+Remember: Return ONLY the JSON object, nothing else.
+"""
+
+    merge_into = journal.get("merge_into") if journal else None
+    if merge_into:
+        prompt += f"""
+This blog already has a closely related post titled "{merge_into['title']}".
+Your sections will be added to the end of that post: do not repeat its introduction
+or fundamentals, and focus on the angles of the topic that post does not cover.
+"""
+    
+    return prompt
+
+OPENAI_SYSTEM_PROMPT = "You are a technical blog writer. You must ALWAYS return ONLY valid JSON. Never include markdown, HTML, or any other formatting. Only return the JSON object."
+
+def openai_messages(prompt):
+    return [
+        {"role": "system", "content": OPENAI_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+def openai_candidate_texts(response):
+    """Text of every OpenAI choice that finished, leaving out those cut off at the limit"""
+    return [choice.message.content for choice in response.choices
+            if choice.message.content and choice.finish_reason != "length"]
+
+def openai_usage(response):
+    """Token counts reported by OpenAI"""
+    usage = getattr(response, 'usage', None)
+    return {
+        "input_tokens": getattr(usage, 'prompt_tokens', 0) or 0,
+        "output_tokens": getattr(usage, 'completion_tokens', 0) or 0,
+        "truncated": sum(1 for choice in response.choices if choice.finish_reason == "length")
+    }
+
+def request_blog_content(topic, journal=None):
+    """Walk the model cascade, returning the first response that passes the local checks"""
+    attempts = []
+    for tier in available_cascade_tiers(async_mode=False):
+        print(f"🔄 Attempting to generate structured content with {tier}...")
+        try:
+            candidates, usage = call_model(tier, topic, journal)
+            blog_content = pick_best_candidate(candidates)
+        except Exception as e:
+            print(f"❌ {tier} failed: {e}")
+            import traceback
+            traceback.print_exc()
+            blog_content, usage = None, None
+        if review_cascade_response(tier, blog_content, usage, attempts):
+            return blog_content
+    return settle_cascade(attempts)
+
+def generate_structured_content(topic, journal=None):
+    """Generate structured content that's easier to format"""
+    # Reuse a response paid for by a previous attempt of this run
+    if stage_done(journal, "generate"):
+        print("⏩ Reusing AI response recorded in the run journal")
+        blog_content = stage_artifact(journal, "generate", "raw_response")
+    else:
+        blog_content = request_blog_content(topic, journal)
+        if blog_content:
+            complete_stage(journal, "generate", raw_response=blog_content)
+
+    return parse_blog_content(blog_content, topic, journal)
+
+def parse_blog_content(blog_content, topic, journal=None):
+    """Turn a raw AI response into (html, title), falling back to canned content"""
+    if not blog_content:
+        print("❌ Both AI services failed. Creating fallback content...")
+        # Create a comprehensive fallback blog post
+        fallback_content = {
+            "title": f"Understanding {topic}: A Comprehensive Guide",
+            "description": f"A comprehensive guide about {topic} and its importance in modern cloud computing and distributed systems.",
+            "sections": [
+                {
+                    "heading": "Introduction",
+                    "content": f"This comprehensive blog post explores the fundamentals of {topic} and why it matters in today's cloud-native world. We'll dive deep into the concepts, implementation strategies, and best practices that can help you build better systems.\n\nUnderstanding {topic} is crucial for developers, architects, and DevOps engineers working in modern cloud environments. As organizations continue to adopt cloud-native architectures, the principles behind {topic} provide a foundation for making informed decisions about system design, resource allocation, and performance optimization.\n\nThe importance of {topic} extends beyond just technical implementation—it represents a fundamental shift in how we think about system architecture, resource management, and scalability in the cloud era. Whether you're working with serverless functions, microservices, or traditional cloud infrastructure, grasping these concepts will help you build better systems.",
+                    "code_examples": []
+                },
+                {
+                    "heading": "Core Concepts and Fundamentals",
+                    "content": f"To understand {topic}, we need to grasp several key concepts. This includes understanding the underlying principles, common patterns, and how it fits into the broader ecosystem of cloud computing and distributed systems.\n\nThe fundamental principles of {topic} revolve around resource management, scalability, and performance optimization. These concepts work together to create systems that can efficiently handle varying workloads while maintaining reliability and cost-effectiveness.\n\nUnderstanding the underlying mechanisms involves grasping concepts like dynamic allocation, adaptive scaling, and intelligent resource management. These mechanisms work together to create systems that can respond intelligently to changing demands while maintaining performance standards.\n\nThe relationship between {topic} and system architecture is crucial—the way you design your system directly impacts how effectively you can implement these concepts. This includes considerations around data flow, component coupling, and the overall system topology.",
+                    "code_examples": ["// Example: Basic resource allocation with dynamic scaling", "// Example: Configuration management with best practices", "// Example: Performance monitoring with comprehensive metrics"]
+                },
+                {
+                    "heading": "Implementation Strategies and Best Practices",
+                    "content": f"Implementing {topic} requires careful consideration of several factors. We'll explore practical approaches, common pitfalls to avoid, and strategies for ensuring your implementation is robust and scalable.\n\nStart by establishing clear metrics and monitoring capabilities that will help you understand how your system is performing. This includes setting up logging, metrics collection, and alerting systems that can provide real-time insights into system behavior.\n\nNext, consider implementing gradual rollout strategies that allow you to test changes in production without affecting all users. This might involve feature flags, canary deployments, or A/B testing approaches that minimize risk while maximizing learning opportunities.\n\nWhen implementing {topic} strategies, it's crucial to consider the operational aspects as well. This includes setting up proper alerting, establishing runbooks for common scenarios, and ensuring your team has the necessary skills and knowledge to operate the system effectively.",
+                    "code_examples": ["// Best practice implementation with comprehensive error handling", "// Feature flag implementation with gradual rollout", "// Canary deployment with health checks"]
+                },
+                {
+                    "heading": "Advanced Techniques and Optimization",
+                    "content": f"Once you have the basic {topic} implementation in place, you can start exploring advanced techniques and optimization strategies. This includes implementing sophisticated monitoring and alerting systems that can detect issues before they impact users.\n\nAdvanced optimization techniques often involve machine learning and predictive analytics. By analyzing historical data and patterns, you can predict when scaling will be needed and proactively allocate resources. This proactive approach can significantly improve system performance and user experience.\n\nPerformance tuning is another critical aspect of advanced {topic} implementation. This involves fine-tuning various parameters, monitoring the impact of changes, and continuously iterating to find the optimal configuration for your specific use case and workload patterns.\n\nScalability considerations become increasingly important as your system grows. Advanced implementations often involve multi-region deployments, load balancing strategies, and sophisticated caching mechanisms that can handle massive scale while maintaining performance.",
+                    "code_examples": ["// Advanced performance monitoring with ML insights", "// Predictive scaling with historical data analysis", "// Automated response system for common issues"]
+                },
+                {
+                    "heading": "Real-World Applications and Case Studies",
                     "content": f"Understanding how {topic} works in theory is one thing, but seeing it in action through real-world applications and case studies provides invaluable insights. Many successful companies have implemented sophisticated {topic} strategies that have enabled them to scale their operations while maintaining high performance and reliability.\n\nOne common pattern in successful implementations is the use of gradual rollout strategies combined with comprehensive monitoring. Companies that excel at {topic} often start with small, controlled deployments and gradually expand based on real-world performance data and user feedback.\n\nAnother key lesson from real-world implementations is the importance of team culture and processes. Successful {topic} implementations often involve cross-functional teams that include developers, operations engineers, and business stakeholders working together to ensure that technical decisions align with business objectives.\n\nCase studies also reveal the importance of learning from failures and continuously improving. Even the most successful implementations have encountered challenges, and the key to long-term success is building systems that can learn from these experiences and adapt accordingly.",
                     "code_examples": ["// Real-world deployment strategy with rollback capability", "// Production monitoring dashboard with business metrics", "// Business impact tracking and correlation analysis"]
                 },
@@ -292,850 +3308,2399 @@ Remember: Return ONLY the JSON object, nothing else.
                     "content": f"Understanding {topic} is crucial for building modern, scalable cloud applications. By following the principles and practices outlined in this post, you'll be better equipped to tackle the challenges of cloud-native development.\n\nAs we've explored throughout this comprehensive post, understanding {topic} is fundamental to building modern, scalable cloud systems. The concepts and strategies we've discussed provide a solid foundation for making architectural decisions that balance performance, reliability, and cost-effectiveness.\n\nLooking forward, the landscape of {topic} will continue to evolve as new technologies and approaches emerge. Staying current with these developments, while maintaining focus on fundamental principles, will be key to building systems that can adapt to changing requirements and scale with your organization's growth.",
                     "code_examples": []
                 }
-            ],
-            "tags": ["Cloud Computing", "Research", "Best Practices", "Architecture", "Performance"],
-            "read_time": 15
-        }
+            ],
+            "tags": ["Cloud Computing", "Research", "Best Practices", "Architecture", "Performance"],
+            "read_time": 15
+        }
+        
+        print("✅ Generated comprehensive fallback content structure")
+        return build_html_from_structure(fallback_content)
+    
+    # Clean the response - remove any markdown formatting
+    blog_content = blog_content.strip()
+    if blog_content.startswith('```json'):
+        blog_content = blog_content[7:]
+    if blog_content.endswith('```'):
+        blog_content = blog_content[:-3]
+    blog_content = blog_content.strip()
+    
+    # Parse JSON and convert to HTML
+    try:
+        structured_data = json.loads(blog_content)
+        complete_stage(journal, "parse", structured=structured_data)
+        html_content, title = build_html_from_structure(structured_data)
+        return html_content, title
+    except json.JSONDecodeError as e:
+        print(f"❌ Failed to parse JSON: {e}")
+        print("📄 Raw content:", blog_content)
+        
+        # Try to extract JSON from the response
+        json_match = re.search(r'\{.*\}', blog_content, re.DOTALL)
+        if json_match:
+            try:
+                extracted_json = json_match.group(0)
+                # Try to fix common JSON issues
+                fixed_json = fix_truncated_json(extracted_json)
+                structured_data = json.loads(fixed_json)
+                complete_stage(journal, "parse", structured=structured_data)
+                print("✅ Successfully parsed extracted and fixed JSON")
+                html_content, title = build_html_from_structure(structured_data)
+                return html_content, title
+            except json.JSONDecodeError as json_error:
+                print(f"❌ Failed to parse extracted JSON: {json_error}")
+        
+        # Try to build content from partial JSON
+        print("🔄 Attempting to build content from partial JSON...")
+        partial_content, partial_title = build_from_partial_json(blog_content, topic)
+        if partial_content:
+            return partial_content, partial_title
+        
+        # Final fallback: treat as plain text
+        print("⚠️ Using final fallback: plain text conversion")
+        return f"<h2>Introduction</h2><p>Error: Could not parse structured content. Please check the AI generation.</p>", f"Understanding {topic}"
+
+# Common repetitive patterns to clean up
+REPETITIVE_PATTERNS = [
+    r'Understanding - ([^,]+) is crucial',
+    r'Understanding - ([^,]+) provides',
+    r'Understanding - ([^,]+) involves',
+    r'Understanding - ([^,]+) requires',
+    r'Understanding - ([^,]+) works',
+    r'Understanding - ([^,]+) extends',
+    r'Understanding - ([^,]+) revolves',
+    r'Understanding - ([^,]+) represents',
+]
+
+def clean_content_content(content):
+    """Clean up content by removing repetitive phrases and improving readability"""
+    if not content:
+        return content
+    
+    # Remove repetitive topic mentions (e.g., "Understanding - Optimizing cold starts in AWS Lambda" repeated multiple times)
+    # This often happens when the AI tries to be too specific in every sentence
+    
+    cleaned_content = content
+    for pattern in REPETITIVE_PATTERNS:
+        # Replace repetitive "Understanding - Topic" patterns with more natural language
+        cleaned_content = re.sub(pattern, r'This concept is crucial', cleaned_content)
+        cleaned_content = re.sub(pattern, r'This concept provides', cleaned_content)
+        cleaned_content = re.sub(pattern, r'This concept involves', cleaned_content)
+        cleaned_content = re.sub(pattern, r'This concept requires', cleaned_content)
+        cleaned_content = re.sub(pattern, r'This concept works', cleaned_content)
+        cleaned_content = re.sub(pattern, r'This concept extends', cleaned_content)
+        cleaned_content = re.sub(pattern, r'This concept revolves', cleaned_content)
+        cleaned_content = re.sub(pattern, r'This concept represents', cleaned_content)
+    
+    # Remove excessive dashes and hyphens
+    cleaned_content = re.sub(r' - ([A-Z][a-z]+)', r' \1', cleaned_content)
+    
+    # Clean up multiple spaces
+    cleaned_content = re.sub(r' +', ' ', cleaned_content)
+    
+    # Clean up multiple newlines
+    cleaned_content = re.sub(r'\n{3,}', '\n\n', cleaned_content)
+    
+    return cleaned_content.strip()
+
+def fix_truncated_json(json_string):
+    """Attempt to fix common JSON truncation issues"""
+    print("🔧 Attempting to fix truncated JSON...")
+    
+    # Remove trailing commas before closing braces/brackets
+    json_string = re.sub(r',(\s*[}\]])', r'\1', json_string)
+    
+    # Try to close unclosed strings
+    json_string = re.sub(r'([^"])\s*$', r'\1"', json_string)
+    
+    # Try to close unclosed objects/arrays
+    open_braces = json_string.count('{') - json_string.count('}')
+    open_brackets = json_string.count('[') - json_string.count(']')
+    
+    if open_braces > 0:
+        json_string += '}' * open_braces
+    if open_brackets > 0:
+        json_string += ']' * open_brackets
+    
+    print(f"🔧 Fixed JSON: {len(json_string)} characters")
+    return json_string
+
+def build_from_partial_json(content, topic):
+    """Build HTML content from partial or malformed JSON"""
+    print("🔄 Building content from partial JSON...")
+    
+    try:
+        # Try to extract what we can from the content
+        title_match = re.search(r'"title":\s*"([^"]+)"', content)
+        title = title_match.group(1) if title_match else f"Understanding {topic}"
+        
+        # Extract sections content
+        sections_match = re.search(r'"sections":\s*\[(.*?)\]', content, re.DOTALL)
+        if sections_match:
+            sections_content = sections_match.group(1)
+            # Try to extract individual sections
+            section_matches = re.findall(r'\{[^{}]*"heading":\s*"([^"]+)"[^{}]*"content":\s*"([^"]*)"', sections_content, re.DOTALL)
+            
+            if section_matches:
+                sections = []
+                for heading, content_text in section_matches:
+                    # Clean up content text
+                    clean_content = content_text.replace('\\n', '\n').replace('\\"', '"')
+                    sections.append({
+                        "heading": heading,
+                        "content": clean_content,
+                        "code_examples": []
+                    })
+                
+                # Create structured content
+                structured_data = {
+                    "title": title,
+                    "description": f"A comprehensive guide about {topic}",
+                    "sections": sections,
+                    "tags": ["Cloud Computing", "Research"],
+                    "read_time": 5
+                }
+                
+                print(f"✅ Built content from {len(sections)} extracted sections")
+                return build_html_from_structure(structured_data)
+        
+        # If we can't extract sections, try to get any content
+        content_match = re.search(r'"content":\s*"([^"]*)"', content)
+        if content_match:
+            content_text = content_match.group(1).replace('\\n', '\n').replace('\\"', '"')
+            fallback_content = {
+                "title": title,
+                "description": f"A comprehensive guide about {topic}",
+                "sections": [
+                    {
+                        "heading": "Introduction",
+                        "content": content_text,
+                        "code_examples": []
+                    }
+                ],
+                "tags": ["Cloud Computing", "Research"],
+                "read_time": 3
+            }
+            
+            print("✅ Built content from extracted content field")
+            return build_html_from_structure(fallback_content)
+            
+    except Exception as e:
+        print(f"❌ Error building from partial JSON: {e}")
+    
+    return None, f"Understanding {topic}"
+
+PLACEHOLDER_CODE_PREFIXES = (
+    '// Example:', '// Basic', '// Best practice', '// Advanced', '// Real-world',
+    '// Performance', '// Predictive', '// Automated', '// Production', '// Business'
+)
+
+def is_placeholder_code(code):
+    """Check for the comment-only code examples models echo back from the prompt"""
+    clean_code = code.strip()
+    return len(clean_code) <= 10 or clean_code.startswith(PLACEHOLDER_CODE_PREFIXES)
+
+def build_html_from_structure(structured_content):
+    """Build HTML from structured content"""
+    html_parts = []
+    
+    # Validate required fields
+    if not isinstance(structured_content, dict):
+        print("❌ Error: structured_content is not a dictionary")
+        return "<h2>Error</h2><p>Invalid content structure</p>", "Error"
+    
+    # Get the actual title from structured content
+    actual_title = structured_content.get('title', 'Untitled Blog Post')
+    
+    # Get sections, default to empty list if missing
+    sections = structured_content.get('sections', [])
+    if not sections:
+        print("❌ Warning: No sections found in structured content")
+        return "<h2>Introduction</h2><p>Content structure is incomplete</p>", actual_title
+    
+    for i, section in enumerate(sections):
+        if not isinstance(section, dict):
+            print(f"❌ Warning: Section {i} is not a dictionary, skipping")
+            continue
+            
+        heading = section.get('heading', f'Section {i+1}')
+        content = section.get('content', 'Content not available')
+        code_examples = section.get('code_examples', [])
+        
+        # Clean up the content to remove repetitive phrases and improve readability
+        content = clean_content_content(content)
+        
+        # Skip sections with no meaningful content
+        if not content or content.strip() == 'Content not available' or len(content.strip()) < 10:
+            print(f"⚠️ Skipping section '{heading}' - no meaningful content")
+            continue
+        
+        # Create heading with ID for TOC
+        heading_id = re.sub(r'[^a-z0-9]+', '-', heading.lower()).strip('-')
+        if not heading_id:
+            heading_id = f'section-{i+1}'
+        
+        html_parts.append(f'<h2 id="{heading_id}">{heading}</h2>')
+        
+        # Process content - split into paragraphs if it contains newlines
+        if '\n\n' in content:
+            # Split by double newlines and create separate paragraphs
+            paragraphs = content.split('\n\n')
+            for para in paragraphs:
+                para = para.strip()
+                if para and len(para) > 10:  # Only add non-empty paragraphs with meaningful content
+                    html_parts.append(f'<p>{para}</p>')
+        else:
+            # Single paragraph - only add if it has meaningful content
+            if len(content.strip()) > 10:
+                html_parts.append(f'<p>{content}</p>')
+        
+        # Add code examples if any - only render non-empty, meaningful code
+        if code_examples and isinstance(code_examples, list):
+            for code in code_examples:
+                if code and isinstance(code, str):
+                    # Clean the code example and check if it's meaningful
+                    clean_code = code.strip()
+                    # Skip code examples that are just comments or placeholders
+                    if not is_placeholder_code(clean_code):
+                        
+                        html_parts.append(f'<pre><code>{clean_code}</code></pre>')
+                    else:
+                        print(f"⚠️ Skipping placeholder code example: {clean_code[:50]}...")
+    
+    if not html_parts:
+        return "<h2>Introduction</h2><p>No content could be generated from the structured data.</p>", actual_title
+    
+    return '\n'.join(html_parts), actual_title
+
+def generate_test_blog(topic):
+    """Generate a test blog post without requiring API keys"""
+    print("🧪 Generating test blog post (no API keys required)...")
+    
+    test_content = {
+        "title": f"Understanding {topic}: A Comprehensive Guide",
+        "description": f"This comprehensive blog post explores the fundamentals of {topic} and its importance in modern cloud computing and distributed systems, providing actionable insights and implementation strategies.",
+        "sections": [
+            {
+                "heading": "Introduction",
+                "content": f"In today's rapidly evolving cloud computing landscape, understanding {topic} has become increasingly important for developers, architects, and DevOps engineers. This concept plays a crucial role in building scalable, reliable, and cost-effective systems that can handle the demands of modern applications.\n\nAs organizations continue to adopt cloud-native architectures, the principles behind {topic} provide a foundation for making informed decisions about system design, resource allocation, and performance optimization. Whether you're working with serverless functions, microservices, or traditional cloud infrastructure, grasping these concepts will help you build better systems.\n\nThe importance of {topic} extends beyond just technical implementation—it represents a fundamental shift in how we think about system architecture, resource management, and scalability in the cloud era. Understanding these principles is essential for anyone looking to build robust, high-performance applications that can scale with business growth.",
+                "code_examples": []
+            },
+            {
+                "heading": "Core Concepts and Fundamentals",
+                "content": f"At its heart, {topic} revolves around several key principles that govern how systems behave and scale. The first concept to understand is the relationship between resource allocation and performance. When we talk about {topic}, we're essentially discussing how systems allocate and manage resources to meet varying demands.\n\nAnother fundamental aspect is the trade-off between efficiency and reliability. Systems that optimize for {topic} often need to balance these competing concerns, making architectural decisions that prioritize certain characteristics over others. This balancing act requires deep understanding of both the technical constraints and business requirements.\n\nUnderstanding the underlying mechanisms of {topic} involves grasping concepts like resource pooling, dynamic allocation, and adaptive scaling. These mechanisms work together to create systems that can respond intelligently to changing workloads while maintaining performance and reliability standards.\n\nThe relationship between {topic} and system architecture is crucial—the way you design your system directly impacts how effectively you can implement these concepts. This includes considerations around data flow, component coupling, and the overall system topology.",
+                "code_examples": [
+                    "const allocateResources = (demand) => {\n  const baseAllocation = demand * 1.5;\n  const maxResources = getMaxAvailableResources();\n  return Math.min(baseAllocation, maxResources);\n};",
+                    "const monitorPerformance = () => {\n  return {\n    latency: measureLatency(),\n    throughput: measureThroughput(),\n    resourceUtilization: getResourceUsage(),\n    errorRate: calculateErrorRate(),\n    responseTime: measureResponseTime()\n  };\n};",
+                    "const getSystemConfig = () => {\n  return {\n    scalingThreshold: process.env.SCALING_THRESHOLD || 0.8,\n    maxInstances: process.env.MAX_INSTANCES || 10,\n    cooldownPeriod: process.env.COOLDOWN_PERIOD || 300\n  };\n};"
+                ]
+            },
+            {
+                "heading": "Implementation Strategies and Best Practices",
+                "content": f"Implementing effective {topic} strategies requires a systematic approach that considers multiple factors. Start by establishing clear metrics and monitoring capabilities that will help you understand how your system is performing. This includes setting up logging, metrics collection, and alerting systems that can provide real-time insights into system behavior.\n\nNext, consider implementing gradual rollout strategies that allow you to test changes in production without affecting all users. This might involve feature flags, canary deployments, or A/B testing approaches that minimize risk while maximizing learning opportunities. Remember that successful {topic} implementation is often iterative, requiring continuous monitoring and adjustment based on real-world performance data.\n\nWhen implementing {topic} strategies, it's crucial to consider the operational aspects as well. This includes setting up proper alerting, establishing runbooks for common scenarios, and ensuring your team has the necessary skills and knowledge to operate the system effectively.\n\nAnother key consideration is the integration with existing infrastructure and tools. Your {topic} implementation should work seamlessly with your current monitoring, logging, and deployment systems, rather than requiring a complete overhaul of your existing toolchain.",
+                "code_examples": [
+                    "const isFeatureEnabled = (featureName, userId) => {\n  const feature = getFeatureConfig(featureName);\n  const userHash = hashUserId(userId);\n  const rolloutPercentage = feature.rolloutPercentage || 0;\n  \n  return feature.enabled && \n         (rolloutPercentage === 100 || \n          userHash % 100 < rolloutPercentage);\n};",
+                    "const shouldUseCanary = (request) => {\n  const canaryHeader = request.headers['x-canary'];\n  const randomRoll = Math.random();\n  const canaryPercentage = getCanaryPercentage();\n  \n  return canaryHeader === 'true' || randomRoll < canaryPercentage;\n};",
+                    "const handleSystemOperation = async (operation) => {\n  try {\n    const startTime = Date.now();\n    const result = await operation();\n    const duration = Date.now() - startTime;\n    \n    logSuccess(operation.name, duration, result);\n    return result;\n  } catch (error) {\n    logError(operation.name, error);\n    throw error;\n  }\n};"
+                ]
+            },
+            {
+                "heading": "Advanced Techniques and Optimization",
+                "content": f"Once you have the basic {topic} implementation in place, you can start exploring advanced techniques and optimization strategies. This includes implementing sophisticated monitoring and alerting systems that can detect issues before they impact users, as well as developing automated response mechanisms that can handle common problems without human intervention.\n\nAdvanced optimization techniques often involve machine learning and predictive analytics. By analyzing historical data and patterns, you can predict when scaling will be needed and proactively allocate resources. This proactive approach can significantly improve system performance and user experience.\n\nPerformance tuning is another critical aspect of advanced {topic} implementation. This involves fine-tuning various parameters, monitoring the impact of changes, and continuously iterating to find the optimal configuration for your specific use case and workload patterns.\n\nScalability considerations become increasingly important as your system grows. Advanced implementations often involve multi-region deployments, load balancing strategies, and sophisticated caching mechanisms that can handle massive scale while maintaining performance.",
+                "code_examples": [
+                    "const predictScalingNeeds = (historicalData) => {\n  const patterns = analyzeUsagePatterns(historicalData);\n  const predictions = applyMLModel(patterns);\n  return predictions.map(prediction => ({\n    timestamp: prediction.time,\n    expectedLoad: prediction.load,\n    recommendedInstances: prediction.instances\n  }));\n};",
+                    "const monitorAdvancedMetrics = () => {\n  return {\n    cpuUtilization: getCPUUsage(),\n    memoryUsage: getMemoryUsage(),\n    networkIO: getNetworkIO(),\n    diskIO: getDiskIO(),\n    customMetrics: getCustomMetrics()\n  };\n};",
+                    "const autoRespondToIssues = (issue) => {\n  const response = determineResponse(issue);\n  if (response.automated) {\n    executeAutomatedResponse(response.action);\n    logAutomatedResponse(issue, response);\n  } else {\n    escalateToHuman(issue, response);\n  }\n};"
+                ]
+            },
+            {
+                "heading": "Real-World Applications and Case Studies",
+                "content": f"Understanding how {topic} works in theory is one thing, but seeing it in action through real-world applications and case studies provides invaluable insights. Many successful companies have implemented sophisticated {topic} strategies that have enabled them to scale their operations while maintaining high performance and reliability.\n\nOne common pattern in successful implementations is the use of gradual rollout strategies combined with comprehensive monitoring. Companies that excel at {topic} often start with small, controlled deployments and gradually expand based on real-world performance data and user feedback.\n\nAnother key lesson from real-world implementations is the importance of team culture and processes. Successful {topic} implementations often involve cross-functional teams that include developers, operations engineers, and business stakeholders working together to ensure that technical decisions align with business objectives.\n\nCase studies also reveal the importance of learning from failures and continuously improving. Even the most successful implementations have encountered challenges, and the key to long-term success is building systems that can learn from these experiences and adapt accordingly.",
+                "code_examples": [
+                    "const deployWithRollback = async (version) => {\n  const deployment = await startDeployment(version);\n  const healthChecks = await monitorHealth(deployment.id);\n  \n  if (healthChecks.failing > HEALTH_CHECK_THRESHOLD) {\n    await rollbackDeployment(deployment.id);\n    notifyTeam('Deployment rolled back due to health check failures');\n    return false;\n  }\n  \n  return true;\n};",
+                    "const generateDashboard = (metrics) => {\n  return {\n    currentStatus: getSystemStatus(),\n    performanceMetrics: getPerformanceMetrics(),\n    alerts: getActiveAlerts(),\n    recommendations: generateRecommendations(metrics)\n  };\n};",
+                    "const trackBusinessImpact = (technicalMetrics) => {\n  return {\n    userExperience: calculateUserExperienceScore(technicalMetrics),\n    businessMetrics: getBusinessMetrics(),\n    correlation: analyzeCorrelation(technicalMetrics, businessMetrics)\n  };\n};"
+                ]
+            },
+            {
+                "heading": "Conclusion and Future Considerations",
+                "content": f"As we've explored throughout this comprehensive post, understanding {topic} is fundamental to building modern, scalable cloud systems. The concepts and strategies we've discussed provide a solid foundation for making architectural decisions that balance performance, reliability, and cost-effectiveness.\n\nLooking forward, the landscape of {topic} will continue to evolve as new technologies and approaches emerge. Staying current with these developments, while maintaining focus on fundamental principles, will be key to building systems that can adapt to changing requirements and scale with your organization's growth.\n\nThe future of {topic} likely involves even more sophisticated automation, machine learning integration, and intelligent decision-making systems. As these technologies mature, they will provide new opportunities to optimize system performance and resource utilization in ways that weren't possible before.",
+                "code_examples": []
+            }
+        ],
+        "tags": ["Cloud Computing", "System Design", "Performance", "Best Practices", "Architecture"],
+        "read_time": 15
+    }
+    
+    print("✅ Test blog content generated successfully")
+    html_content, title = build_html_from_structure(test_content)
+    return html_content, title
+
+def generate_blog_html(topic, journal=None):
+    """Generate blog content using structured approach"""
+    # Check if we have any API keys configured
+    if not OPENAI_API_KEY and not GEMINI_API_KEY:
+        print("⚠️ No API keys configured. Running in test mode...")
+        html_content, title = generate_test_blog(topic)
+        return html_content, title
+    
+    # Generate structured content
+    structured_content, actual_title = generate_structured_content(topic, journal)
+    
+    # Format it using the template
+    if structured_content:
+        print("🔄 Formatting content with template...")
+        return render_post(topic, structured_content, actual_title, journal)
+    else:
+        print("❌ No structured content generated")
+        return None, None
+
+_template_cache = {}
+
+def _compiled_template(path=None):
+    """(parts, assets) for a template, cached until the file changes"""
+    template_path = Path(path or TEMPLATE_FILE)
+    if not template_path.exists():
+        return None
+    key = (str(template_path.resolve()), template_path.stat().st_mtime_ns)
+    if key not in _template_cache:
+        with open(template_path, 'r', encoding='utf-8') as f:
+            # Pages reference the template's script/style blocks as shared assets
+            html, assets = externalize_inline_assets(f.read())
+        # Even indexes are literal text, odd indexes placeholder names
+        _template_cache[key] = (re.split(r'\{\{([A-Z_]+)\}\}', html), assets)
+    return _template_cache[key]
+
+def load_template(path=None):
+    """TEMPLATE.html split into literal text and {{PLACEHOLDER}} names"""
+    compiled = _compiled_template(path)
+    return compiled[0] if compiled else None
+
+def template_assets(path=None):
+    """Assets that pages rendered from the template refer to, by name"""
+    compiled = _compiled_template(path)
+    return compiled[1] if compiled else {}
+
+def render_template(parts, values):
+    """Fill a compiled template in one pass; unknown placeholders are left as they were"""
+    return "".join(
+        part if i % 2 == 0 else str(values.get(part, f"{{{{{part}}}}}"))
+        for i, part in enumerate(parts)
+    )
+
+def format_blog_with_template(topic, content_html, title):
+    """Format the AI-generated content using TEMPLATE.html"""
+    
+    # Use the compiled template (re-read only when the file changes)
+    template = load_template()
+    if template is None:
+        print(f"Warning: {TEMPLATE_FILE} not found. Using raw content.")
+        return content_html
+    
+    # Use the passed title instead of extracting from content
+    # Extract description (first paragraph)
+    desc_match = re.search(r'<p[^>]*>(.*?)</p>', content_html, re.IGNORECASE)
+    description = desc_match.group(1).strip() if desc_match else f"Comprehensive guide about {topic}"
+    
+    # Clean description (remove HTML tags)
+    description = re.sub(r'<[^>]+>', '', description)
+    
+    # Tag from the whole article, not just the topic string
+    tags = render_tags(extract_tags(f"{title} {topic}", re.sub(r'<[^>]+>', ' ', content_html)))
+    
+    # Get current date and time
+    current_date = datetime.datetime.now().strftime("%B %d, %Y")
+    
+    # Estimate read time (rough calculation: 200 words per minute)
+    word_count = len(content_html.split())
+    read_time = max(1, round(word_count / 200))
+    
+    # Generate table of contents from headings
+    toc = generate_table_of_contents(content_html)
+
+    # Link the most similar existing posts
+    try:
+        related = find_related_posts(f"{title} {re.sub(r'<[^>]+>', ' ', content_html)}")
+    except Exception as e:
+        print(f"⚠️ Could not compute related posts: {e}")
+        related = []
+    
+    # Fill template placeholders (double curly braces as in your template)
+    formatted_content = render_template(template, {
+        "TITLE": title,
+        "DESCRIPTION": description,
+        "CONTENT": content_html,
+        "TAGS": tags,
+        "DATE": current_date,
+        "READ_TIME": read_time,
+        "CATEGORY": "Research",
+        "TOC": toc,
+        "RELATED_POSTS": render_related_posts(related)
+    })
+    
+    return formatted_content
+
+def render_post(topic, content_html, title, journal=None):
+    """(page, title) for generated content: a new post, or the post it is merged into"""
+    merge_into = journal.get("merge_into") if journal else None
+    if merge_into:
+        merged = merge_into_post(merge_into["filename"], content_html, title)
+        if merged:
+            print(f"🔀 Merged the new sections into {merge_into['filename']}")
+            journal["merged_into"] = merge_into["filename"]
+            # Kept so a shard merge can apply them to the post as it is then
+            journal["merged_sections"] = {"title": title, "html": content_html}
+            return merged, merge_into["title"]
+        print(f"⚠️ {merge_into['filename']} doesn't follow the template; publishing a separate follow-up")
+    return format_blog_with_template(topic, content_html, title), title
+
+def merge_into_post(filename, content_html, title):
+    """The existing post with the generated sections appended under one heading, or None"""
+    path = Path(BLOG_DIR) / filename
+    template = load_template()
+    if template is None or not path.exists():
+        return None
+    with open(path, "r", encoding='utf-8') as f:
+        html = f.read()
+    values = extract_post_source(html)
+    if values is None or not follows_template(html, values):
+        return None
+
+    # One level down, with ids that can't clash with the post's own sections
+    prefix = re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')[:40] or "follow-up"
+    sections = re.sub(r'<(/?)h([23])\b', lambda m: f"<{m.group(1)}h{int(m.group(2)) + 1}", content_html)
+    sections = re.sub(r'\b(id="|href="#)([^"]+)"', lambda m: f'{m.group(1)}{prefix}-{m.group(2)}"', sections)
+    values["CONTENT"] = f'{values["CONTENT"]}\n<h2 id="{prefix}">{title}</h2>\n{sections}'
+
+    text = re.sub(r'<[^>]+>', ' ', values["CONTENT"])
+    values["TAGS"] = render_tags(extract_tags(values["TITLE"], text))
+    values["TOC"] = generate_table_of_contents(values["CONTENT"])
+    minutes = str(max(1, round(len(values["CONTENT"].split()) / 200)))
+    values["READ_TIME"] = re.sub(r'^\d+', minutes, values["READ_TIME"]) if values["READ_TIME"][:1].isdigit() else minutes
+    return render_template(template, values)
+
+def generate_table_of_contents(content):
+    """Generate table of contents from HTML content"""
+    # Find all headings (h2, h3)
+    headings = re.findall(r'<h([23])([^>]*)>(.*?)</h[23]>', content, re.IGNORECASE)
+    
+    if not headings:
+        return '<ul><li><a href="#introduction">Introduction</a></li></ul>'
+    
+    toc_items = []
+    for level, attributes, heading_text in headings:
+        # Link to the heading's own id; only derive one if it has none
+        id_match = re.search(r'\bid="([^"]+)"', attributes)
+        anchor = id_match.group(1) if id_match else re.sub(r'[^a-z0-9]+', '-', heading_text.lower()).strip('-')
+        
+        # Clean heading text (remove HTML tags)
+        clean_text = re.sub(r'<[^>]+>', '', heading_text)
+        
+        # Add to TOC
+        toc_items.append(f'<li><a href="#{anchor}">{clean_text}</a></li>')
+    
+    return f'<ul>{"".join(toc_items)}</ul>'
+
+def send_to_slack(message_html):
+    """Send draft to Slack."""
+    if not SLACK_WEBHOOK_URL:
+        print("Slack Webhook URL not configured. Skipping Slack notification.")
+        return
+
+    # Convert HTML to plain text for Slack
+    import re
+    
+    def html_to_text(html_content):
+        """Convert HTML to readable plain text"""
+        # Remove HTML tags
+        text = re.sub(r'<[^>]+>', '', html_content)
+        # Decode HTML entities
+        text = text.replace('&nbsp;', ' ')
+        text = text.replace('&amp;', '&')
+        text = text.replace('&lt;', '<')
+        text = text.replace('&gt;', '>')
+        text = text.replace('&quot;', '"')
+        # Clean up whitespace
+        text = re.sub(r'\s+', ' ', text)
+        text = text.strip()
+        # Limit length to avoid Slack limits
+        if len(text) > 2000:
+            text = text[:1997] + "..."
+        return text
+    
+    # Convert HTML to plain text
+    plain_text = html_to_text(message_html)
+    
+    # Create a better Slack message structure
+    payload = {
+        "text": "📝 New Blog Draft Generated!",
+        "blocks": [
+            {
+                "type": "header",
+                "text": {
+                    "type": "plain_text",
+                    "text": "🚀 New Blog Post Draft"
+                }
+            },
+            {
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": f"*Topic:* {plain_text[:100]}..."
+                }
+            },
+            {
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": f"*Preview:* {plain_text[:500]}..."
+                }
+            },
+            {
+                "type": "divider"
+            },
+            {
+                "type": "context",
+                "elements": [
+                    {
+                        "type": "mrkdwn",
+                        "text": "Check your local files for the complete draft"
+                    }
+                ]
+            }
+        ]
+    }
+    
+    try:
+        response = requests.post(SLACK_WEBHOOK_URL, json=payload)
+        response.raise_for_status()
+        print("Blog draft sent to Slack successfully.")
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to send blog draft to Slack: {e}")
+        # Try a simpler fallback message
+        try:
+            simple_payload = {
+                "text": f"📝 Blog draft generated for topic: {plain_text[:100]}...",
+                "blocks": [
+                    {
+                        "type": "section",
+                        "text": {
+                            "type": "mrkdwn",
+                            "text": f"*New Blog Draft:* {plain_text[:200]}..."
+                        }
+                    }
+                ]
+            }
+            response = requests.post(SLACK_WEBHOOK_URL, json=simple_payload)
+            response.raise_for_status()
+            print("Fallback Slack message sent successfully.")
+        except Exception as fallback_error:
+            print(f"Fallback Slack message also failed: {fallback_error}")
+
+def commit_blog_and_index(blog_file, index_file, title):
+    """Commit both the new blog post and updated index file together"""
+    # Posts whose related blocks now list the new one (also after a resume)
+    pending = [entry["path"] for entry in pending_outputs()
+               if entry["path"].endswith(".html") and Path(entry["path"]).exists()]
+    paths = [blog_file, index_file] + feed_output_paths() + asset_output_paths() + pending
+    return commit_site_files(list(dict.fromkeys(paths)), f"Add blog post and update index: {title}")
+
+def commit_site_files(paths, commit_message):
+    """Stage paths, commit them in one commit and push"""
+    try:
+        import subprocess
+        
+        # Configure git for the workflow
+        subprocess.run(["git", "config", "--global", "user.name", "GitHub Actions"], check=True)
+        subprocess.run(["git", "config", "--global", "user.email", "actions@github.com"], check=True)
+        
+        # Add every file
+        subprocess.run(["git", "add", *paths], check=True)
+        
+        # Commit the changes together (a resumed run may have committed already)
+        staged = subprocess.run(["git", "diff", "--cached", "--quiet"])
+        if staged.returncode != 0:
+            subprocess.run(["git", "commit", "-m", commit_message], check=True)
+        else:
+            print("⏩ Nothing new to commit, retrying push")
+        
+        # Push to the current branch
+        subprocess.run(["git", "push"], check=True)
+        
+        print(f"✅ Blog files committed and pushed to Git")
+        mark_outputs_deployed(paths)
+        return True
+        
+    except subprocess.CalledProcessError as e:
+        print(f"Git operations failed: {e}")
+        print("Files saved locally but not committed to Git")
+        return False
+    except Exception as e:
+        print(f"Unexpected error during git operations: {e}")
+        print("Files saved locally but not committed to Git")
+        return False
+
+def post_filename(title):
+    """Dated, slugged filename for a post (without the blog directory)"""
+    date_str = datetime.date.today().strftime("%Y-%m-%d")
+    # Clean title for filename slug
+    filename_slug = re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')
+    if not filename_slug: # Fallback if title becomes empty after sanitization
+        filename_slug = "untitled-blog-post"
+    return f"{date_str}-{filename_slug}.html"
+
+def save_blog_file(title, content_html, name=None):
+    """Save the generated blog as HTML in blog folder."""
+    # Ensure BLOG_DIR exists
+    Path(BLOG_DIR).mkdir(parents=True, exist_ok=True)
+
+    filename = f"{BLOG_DIR}/{name or post_filename(title)}"
+    
+    # Save the file locally, with the shared assets it links to
+    write_output(filename, content_html)
+    write_assets(template_assets())
+    
+    print(f"Blog post saved locally: {filename}")
+
+    try:
+        index_post_for_duplicates(filename, content_html)
+    except Exception as e:
+        print(f"⚠️ Could not update duplicate index: {e}")
+
+    try:
+        add_post_vectors(filename, content_html)
+    except Exception as e:
+        print(f"⚠️ Could not update related-posts vectors: {e}")
+
+    try:
+        add_post_to_feeds(filename, content_html, title)
+    except Exception as e:
+        print(f"⚠️ Could not update feeds and sitemap: {e}")
+
+    try:
+        save_post_source(filename, content_html)
+    except Exception as e:
+        print(f"⚠️ Could not record post source: {e}")
+    
+    return filename
+
+def ensure_placeholder_exists():
+    """Ensure the BLOG-ENTRIES placeholder exists in the index file"""
+    if not Path(INDEX_FILE).exists():
+        print(f"❌ {INDEX_FILE} not found. Cannot ensure placeholder.")
+        return False
+
+    with open(INDEX_FILE, "r", encoding='utf-8') as f:
+        html = f.read()
+
+    if "<!-- BLOG-ENTRIES -->" in html:
+        print("✅ BLOG-ENTRIES placeholder found")
+        return True
+    else:
+        print("⚠️ BLOG-ENTRIES placeholder missing. Adding it back...")
         
-        print("✅ Generated comprehensive fallback content structure")
-        return build_html_from_structure(fallback_content)
-    
-    # Clean the response - remove any markdown formatting
-    blog_content = blog_content.strip()
-    if blog_content.startswith('```json'):
-        blog_content = blog_content[7:]
-    if blog_content.endswith('```'):
-        blog_content = blog_content[:-3]
-    blog_content = blog_content.strip()
-    
-    # Parse JSON and convert to HTML
-    try:
-        structured_data = json.loads(blog_content)
-        html_content, title = build_html_from_structure(structured_data)
-        return html_content, title
-    except json.JSONDecodeError as e:
-        print(f"❌ Failed to parse JSON: {e}")
-        print("📄 Raw content:", blog_content)
+        # Find the "Coming Soon" card and add the placeholder before it
+        coming_soon_pattern = '''                <div class="blog-card rounded-xl p-6 border border-gray-800 card-hover">
+                    <div class="flex items-center mb-3">
+                        <span class="text-gray-400 text-sm">Coming Soon</span>
+                    </div>
+                    <h3 class="text-xl font-bold text-primary mb-3">
+                        🚀 More Blog Posts Coming Soon!
+                    </h3>
+                    <p class="text-gray-300 mb-4">
+                        I'm working on more articles about cloud computing, serverless optimization, and distributed systems research. Stay tuned!
+                    </p>
+                    <div class="flex flex-wrap gap-2 mb-4">
+                        <span class="tag">Coming Soon</span>
+                        <span class="tag">Cloud Computing</span>
+                        <span class="tag">Research</span>
+                    </div>
+                    <div class="flex items-center justify-between">
+                        <span class="text-gray-400 text-sm">📖 More content soon</span>
+                        <span class="text-gray-500">Stay tuned!</span>
+                    </div>
+                </div>'''
         
-        # Try to extract JSON from the response
-        json_match = re.search(r'\{.*\}', blog_content, re.DOTALL)
-        if json_match:
-            try:
-                extracted_json = json_match.group(0)
-                # Try to fix common JSON issues
-                fixed_json = fix_truncated_json(extracted_json)
-                structured_data = json.loads(fixed_json)
-                print("✅ Successfully parsed extracted and fixed JSON")
-                html_content, title = build_html_from_structure(structured_data)
-                return html_content, title
-            except json.JSONDecodeError as json_error:
-                print(f"❌ Failed to parse extracted JSON: {json_error}")
+        # Add the placeholder before the Coming Soon card
+        placeholder_html = '''                <!-- BLOG-ENTRIES -->
+                <div class="blog-card rounded-xl p-6 border border-gray-800 card-hover">
+                    <div class="flex items-center mb-3">
+                        <span class="text-gray-400 text-sm">Coming Soon</span>
+                    </div>
+                    <h3 class="text-xl font-bold text-primary mb-3">
+                        🚀 More Blog Posts Coming Soon!
+                    </h3>
+                    <p class="text-gray-300 mb-4">
+                        I'm working on more articles about cloud computing, serverless optimization, and distributed systems research. Stay tuned!
+                    </p>
+                    <div class="flex flex-wrap gap-2 mb-4">
+                        <span class="tag">Coming Soon</span>
+                        <span class="tag">Cloud Computing</span>
+                        <span class="tag">Research</span>
+                    </div>
+                    <div class="flex items-center justify-between">
+                        <span class="text-gray-400 text-sm">📖 More content soon</span>
+                        <span class="text-gray-500">Stay tuned!</span>
+                    </div>
+                </div>'''
         
-        # Try to build content from partial JSON
-        print("🔄 Attempting to build content from partial JSON...")
-        partial_content, partial_title = build_from_partial_json(blog_content, topic)
-        if partial_content:
-            return partial_content, partial_title
+        html = html.replace(coming_soon_pattern, placeholder_html)
         
-        # Final fallback: treat as plain text
-        print("⚠️ Using final fallback: plain text conversion")
-        return f"<h2>Introduction</h2><p>Error: Could not parse structured content. Please check the AI generation.</p>", f"Understanding {topic}"
+        write_output(INDEX_FILE, html)
+        
+        print("✅ BLOG-ENTRIES placeholder restored")
+        return True
 
-def clean_content_content(content):
-    """Clean up content by removing repetitive phrases and improving readability"""
-    if not content:
-        return content
-    
-    # Remove repetitive topic mentions (e.g., "Understanding - Optimizing cold starts in AWS Lambda" repeated multiple times)
-    # This often happens when the AI tries to be too specific in every sentence
-    
-    # Common repetitive patterns to clean up
-    repetitive_patterns = [
-        r'Understanding - ([^,]+) is crucial',
-        r'Understanding - ([^,]+) provides',
-        r'Understanding - ([^,]+) involves',
-        r'Understanding - ([^,]+) requires',
-        r'Understanding - ([^,]+) works',
-        r'Understanding - ([^,]+) extends',
-        r'Understanding - ([^,]+) revolves',
-        r'Understanding - ([^,]+) represents',
-    ]
-    
-    cleaned_content = content
-    for pattern in repetitive_patterns:
-        # Replace repetitive "Understanding - Topic" patterns with more natural language
-        cleaned_content = re.sub(pattern, r'This concept is crucial', cleaned_content)
-        cleaned_content = re.sub(pattern, r'This concept provides', cleaned_content)
-        cleaned_content = re.sub(pattern, r'This concept involves', cleaned_content)
-        cleaned_content = re.sub(pattern, r'This concept requires', cleaned_content)
-        cleaned_content = re.sub(pattern, r'This concept works', cleaned_content)
-        cleaned_content = re.sub(pattern, r'This concept extends', cleaned_content)
-        cleaned_content = re.sub(pattern, r'This concept revolves', cleaned_content)
-        cleaned_content = re.sub(pattern, r'This concept represents', cleaned_content)
-    
-    # Remove excessive dashes and hyphens
-    cleaned_content = re.sub(r' - ([A-Z][a-z]+)', r' \1', cleaned_content)
+def index_card_html(title, filename):
+    """The blog index card for a post, tagged like the post page"""
+    current_date = datetime.datetime.now().strftime("%B %d, %Y")
+    read_time = "5 min read"  # Default read time
+
+    # Show the same tags as the post page
+    tags = DEFAULT_TAGS
+    if Path(filename).exists():
+        with open(filename, "r", encoding='utf-8') as f:
+            tags = post_tags(f.read()) or DEFAULT_TAGS
+
+    return f'''                <div class="blog-card rounded-xl p-6 border border-gray-800 card-hover">
+                    <div class="flex items-center mb-3">
+                        <span class="text-gray-400 text-sm">{current_date}</span>
+                    </div>
+                    <h3 class="text-xl font-bold text-primary mb-3">
+                        🚀 {title}
+                    </h3>
+                    <p class="text-gray-300 mb-4">
+                        A comprehensive guide about {title.lower()}. Click to read the full article.
+                    </p>
+                    <div class="flex flex-wrap gap-2 mb-4">
+{render_card_tags(tags)}
+                    </div>
+                    <div class="flex items-center justify-between">
+                        <span class="text-gray-400 text-sm">📖 {read_time}</span>
+                        <a href="{Path(filename).name}" class="bg-primary text-white px-6 py-3 rounded-lg hover:bg-primary/80 transition-colors">
+                            Read Full Article →
+                        </a>
+                    </div>
+                </div>'''
+
+def update_index(title, filename):
+    """Update blog/index.html with new blog entry"""
+    print(f"🔄 Updating blog index with: {title}")
     
-    # Clean up multiple spaces
-    cleaned_content = re.sub(r' +', ' ', cleaned_content)
+    # Read the current index file
+    with open(INDEX_FILE, "r", encoding='utf-8') as f:
+        html = f.read()
     
-    # Clean up multiple newlines
-    cleaned_content = re.sub(r'\n{3,}', '\n\n', cleaned_content)
+    # Ensure the placeholder exists at the top of the grid
+    ensure_placeholder_exists()
     
-    return cleaned_content.strip()
+    # Generate the HTML for the new blog post
+    post_html = index_card_html(title, filename) + "\n\n                <!-- BLOG-ENTRIES -->"
+
+    # Check if the placeholder exists
+    if "<!-- BLOG-ENTRIES -->" in html:
+        print(f"🔍 Found BLOG-ENTRIES placeholder, replacing with new post...")
+        # Replace the placeholder with new post + placeholder (preserving it for future posts)
+        html = html.replace("<!-- BLOG-ENTRIES -->", post_html)
+        
+        # Write the updated HTML back to the file
+        write_output(INDEX_FILE, html)
+        
+        print(f"✅ Updated {INDEX_FILE} with new blog entry: {title}")
+        print(f"📝 Blog post added to index: {filename}")
+        print(f"🔍 BLOG-ENTRIES placeholder preserved for future posts")
+        
+        # Verify the update worked
+        with open(INDEX_FILE, "r", encoding='utf-8') as f:
+            updated_html = f.read()
+        if title in updated_html:
+            print(f"✅ Verification: Title '{title}' found in updated index")
+        else:
+            print(f"❌ Warning: Title '{title}' not found in updated index")
+            
+    else:
+        print(f"❌ Warning: '<!-- BLOG-ENTRIES -->' placeholder not found in {INDEX_FILE}")
+        print("🔍 Looking for alternative insertion points...")
+        
+        # Try to find a good place to insert (before the "Coming Soon" card)
+        if "Coming Soon" in html:
+            # Insert before the "Coming Soon" card and add the placeholder back
+            coming_soon_section = '''                <div class="blog-card rounded-xl p-6 border border-gray-800 card-hover">
+                    <div class="flex items-center mb-3">
+                        <span class="text-gray-400 text-sm">Coming Soon</span>
+                    </div>
+                    <h3 class="text-xl font-bold text-primary mb-3">
+                        🚀 More Blog Posts Coming Soon!
+                    </h3>
+                    <p class="text-gray-300 mb-4">
+                        I'm working on more articles about cloud computing, serverless optimization, and distributed systems research. Stay tuned!
+                    </p>
+                    <div class="flex flex-wrap gap-2 mb-4">
+                        <span class="tag">Coming Soon</span>
+                        <span class="tag">Cloud Computing</span>
+                        <span class="tag">Research</span>
+                    </div>
+                    <div class="flex items-center justify-between">
+                        <span class="text-gray-400 text-sm">📖 More content soon</span>
+                        <span class="text-gray-500">Stay tuned!</span>
+                    </div>
+                </div>'''
+            
+            # Insert new post + placeholder before the Coming Soon section
+            new_content = post_html + '\n' + coming_soon_section
+            
+            html = html.replace(
+                coming_soon_section,
+                new_content,
+                1
+            )
+            
+            write_output(INDEX_FILE, html)
+            
+            print(f"✅ Updated {INDEX_FILE} by inserting before 'Coming Soon' card")
+            print(f"🔍 BLOG-ENTRIES placeholder added back for future posts")
+        else:
+            print(f"❌ Could not find suitable insertion point in {INDEX_FILE}")
+            print("📋 New blog post HTML (copy manually if needed):")
+            print(post_html)
+
+# ===== Pipeline =====
+
+def run_pipeline(journal):
+    """Run every stage for the journaled topic, skipping completed stages"""
+    print(f"📝 Generating blog for topic: '{journal['topic']}'")
+
+    # 1. Generate draft HTML
+    result = generate_stage(journal)
+    if not result:
+        return False
+    return publish_stage(journal, *result)
+
+def generate_stage(journal):
+    """Step 1: produce the rendered page, or reuse it from the journal"""
+    if stage_done(journal, "render"):
+        print("⏩ Step 1: Reusing rendered draft from run journal")
+        return stage_artifact(journal, "render", "html"), stage_artifact(journal, "render", "title")
+
+    print("🔄 Step 1: Generating structured content...")
+    result = generate_blog_html(journal["topic"], journal)
+    return record_render(journal, result)
+
+def record_render(journal, result):
+    """Journal the rendered page so later steps never regenerate it"""
+    if not result or result[0] is None:
+        print("❌ Error: No blog content generated")
+        return None
+
+    blog_html, actual_title = result
+    complete_stage(journal, "render", html=blog_html, title=actual_title)
+    print(f"✅ Content generated successfully. Length: {len(blog_html)} characters")
+    return blog_html, actual_title
+
+def publish_stage(journal, blog_html, actual_title):
+    """Steps 2-7: notify, save, update topics and index, commit and verify"""
+    print(f"📝 Blog title: {actual_title}")
+    print("📄 Preview of generated content:")
+    print("-" * 50)
+    print(blog_html[:200] + "..." if len(blog_html) > 200 else blog_html)
+    print("-" * 50)
+
+    # 2. Send draft to Slack
+    print("\n🔄 Step 2: Sending draft to Slack...")
+    if stage_done(journal, "slack"):
+        print("⏩ Draft already sent to Slack")
+    else:
+        send_to_slack(blog_html)
+        complete_stage(journal, "slack")
+
+    # 3. Save draft locally
+    print("\n🔄 Step 3: Saving draft locally...")
+    if stage_done(journal, "save"):
+        draft_file = stage_artifact(journal, "save", "filename")
+        print(f"⏩ Draft already saved to: {draft_file}")
+    else:
+        begin_stage(journal, "save")
+        # A merged topic rewrites the post it was merged into
+        draft_file = save_blog_file(actual_title, blog_html, journal.get("merged_into"))
+        complete_stage(journal, "save", filename=draft_file)
+        print(f"✅ Draft saved to: {draft_file}")
+
+    # 4. Update topics.md
+    print("\n🔄 Step 4: Updating topics file...")
+    if stage_done(journal, "topics"):
+        print("⏩ Topic already removed from topics file")
+    else:
+        begin_stage(journal, "topics")
+        if journal.get("queue_id"):
+            renew_lease(journal["queue_id"], journal["worker_id"])
+        export_topics_file()
+        complete_stage(journal, "topics")
+        print("✅ Topics file updated")
+
+    # 5. Update blog/index.html
+    print("\n🔄 Step 5: Updating blog index...")
+    if stage_done(journal, "index"):
+        print("⏩ Blog index already updated")
+    else:
+        # A merged post already has its card
+        already_indexed = bool(journal.get("merged_into"))
+        if not already_indexed and stage_started(journal, "index") and Path(INDEX_FILE).exists():
+            # A previous attempt died mid-stage; don't add the card twice
+            with open(INDEX_FILE, "r", encoding='utf-8') as f:
+                already_indexed = f'href="{Path(draft_file).name}"' in f.read()
+        begin_stage(journal, "index")
+        if already_indexed:
+            print("⏩ Blog index already contains this post")
+        else:
+            update_index(actual_title, draft_file)
+        with open(INDEX_FILE, "rb") as f:
+            index_sha256 = hashlib.sha256(f.read()).hexdigest()
+        complete_stage(journal, "index", index_file=INDEX_FILE, index_sha256=index_sha256)
+        print("✅ Blog index updated")
+
+    # The new post can now be a neighbour of existing posts
+    refreshed = refresh_related_posts() if np is not None else []
+
+    # Only what this publish wrote; `check` and `perf` cover the whole site
+    written = [draft_file, INDEX_FILE] + refreshed
+    report_site_check(written)
+    if not report_perf_budget(written):
+        print("⚠️ Pages are over their performance budget; not committing (BLOG_PERF_ACTION=fail)")
+        print("♻️ Fix the pages or budgets and re-run to resume from the commit step")
+        return False
+    write_deploy_manifest()
+
+    # 6. Commit both blog post and updated index to Git
+    print("\n🔄 Step 6: Committing blog post and updated index to Git...")
+    if stage_done(journal, "git"):
+        print("⏩ Blog post and index already committed")
+    else:
+        begin_stage(journal, "git")
+        if commit_blog_and_index(draft_file, INDEX_FILE, actual_title):
+            complete_stage(journal, "git")
+            print("✅ Both files committed and pushed successfully")
+        else:
+            print("⚠️ Warning: Git commit failed, files only saved locally")
+            print("♻️ Re-run to resume this post from the commit step")
+            return False
+
+    # 7. Verify placeholder is preserved
+    print("\n🔄 Step 7: Verifying placeholder preservation...")
+    if ensure_placeholder_exists():
+        print("✅ BLOG-ENTRIES placeholder verified and preserved")
+    else:
+        print("⚠️ Warning: Could not verify placeholder preservation")
+    complete_stage(journal, "verify")
+
+    finish_journal(journal)
+    print(f"\n🎉 Blog generation complete! New post: {draft_file}")
+    return True
+
+# ===== Async pipeline =====
+# Generation is I/O-bound on the provider while publishing is serial (one
+# index, one git tree). Generators feed a bounded queue that a single
+# publisher drains, so topic N+1 generates while topic N is published and
+# at most max_pending finished drafts wait in memory.
+
+async def request_blog_content_async(topic, journal=None):
+    """Async walk of the model cascade"""
+    attempts = []
+    for tier in available_cascade_tiers(async_mode=True):
+        print(f"🔄 [{topic}] Generating with {tier}...")
+        try:
+            candidates, usage = await call_model_async(tier, topic, journal)
+            blog_content = await asyncio.to_thread(pick_best_candidate, candidates)
+        except Exception as e:
+            print(f"❌ [{topic}] {tier} failed: {e}")
+            blog_content, usage = None, None
+        if review_cascade_response(tier, blog_content, usage, attempts):
+            return blog_content
+    return settle_cascade(attempts)
+
+async def generate_stage_async(journal):
+    """Async step 1: the provider call is awaited, parsing and rendering run in a thread"""
+    if stage_done(journal, "render"):
+        return stage_artifact(journal, "render", "html"), stage_artifact(journal, "render", "title")
+
+    topic = journal["topic"]
+    if not OPENAI_API_KEY and not GEMINI_API_KEY:
+        result = await asyncio.to_thread(generate_blog_html, topic, journal)
+        return record_render(journal, result)
+
+    if stage_done(journal, "generate"):
+        blog_content = stage_artifact(journal, "generate", "raw_response")
+    else:
+        blog_content = await request_blog_content_async(topic, journal)
+        if blog_content:
+            complete_stage(journal, "generate", raw_response=blog_content)
+
+    def render():
+        structured_content, actual_title = parse_blog_content(blog_content, topic, journal)
+        if not structured_content:
+            return None, None
+        return render_post(topic, structured_content, actual_title, journal)
+
+    return record_render(journal, await asyncio.to_thread(render))
+
+async def run_async_pipeline(max_topics=None, generators=2, max_pending=2):
+    """Generate several topics concurrently and publish them one at a time"""
+    warm_task = asyncio.create_task(warm_async_clients())
+    import_topics_file()
+    worker_id = queue_worker_id()
+    ready = asyncio.Queue(maxsize=max_pending)
+    lease_lock = asyncio.Lock()
+    stats = {"leased": 0, "published": 0, "failed": 0}
+    started = time.monotonic()
 
-def fix_truncated_json(json_string):
-    """Attempt to fix common JSON truncation issues"""
-    print("🔧 Attempting to fix truncated JSON...")
-    
-    # Remove trailing commas before closing braces/brackets
-    json_string = re.sub(r',(\s*[}\]])', r'\1', json_string)
-    
-    # Try to close unclosed strings
-    json_string = re.sub(r'([^"])\s*$', r'\1"', json_string)
-    
-    # Try to close unclosed objects/arrays
-    open_braces = json_string.count('{') - json_string.count('}')
-    open_brackets = json_string.count('[') - json_string.count(']')
-    
-    if open_braces > 0:
-        json_string += '}' * open_braces
-    if open_brackets > 0:
-        json_string += ']' * open_brackets
-    
-    print(f"🔧 Fixed JSON: {len(json_string)} characters")
-    return json_string
+    async def settle(journal, ok, error):
+        try:
+            await asyncio.to_thread(settle_topic, journal, ok, error)
+        except Exception as e:
+            print(f"⚠️ Could not settle '{journal['topic']}' (its lease will expire): {e}")
 
-def build_from_partial_json(content, topic):
-    """Build HTML content from partial or malformed JSON"""
-    print("🔄 Building content from partial JSON...")
-    
+    async def next_journal():
+        async with lease_lock:
+            claim_errors = 0
+            while max_topics is None or stats["leased"] < max_topics:
+                try:
+                    journal = await asyncio.to_thread(claim_next_topic, worker_id)
+                except Exception as e:
+                    # claim_next_topic released the topic; give up only if claiming keeps failing
+                    print(f"❌ Could not claim a topic: {e}")
+                    stats["failed"] += 1
+                    claim_errors += 1
+                    if claim_errors >= MAX_ATTEMPTS:
+                        return None
+                    continue
+                if journal is None:
+                    return None
+                if journal.get("skipped"):
+                    continue
+                stats["leased"] += 1
+                return journal
+            return None
+
+    async def generator():
+        while True:
+            journal = await next_journal()
+            if journal is None:
+                return
+            try:
+                result = await generate_stage_async(journal)
+            except Exception as e:
+                print(f"❌ Generation failed for '{journal['topic']}': {e}")
+                result = None
+            if not result:
+                stats["failed"] += 1
+                await settle(journal, False, "generation failed")
+                continue
+            # Blocks while max_pending drafts are already waiting to publish
+            await ready.put((journal, result))
+
+    async def publisher():
+        while True:
+            item = await ready.get()
+            if item is None:
+                return
+            journal, (blog_html, actual_title) = item
+            try:
+                ok = await asyncio.to_thread(publish_stage, journal, blog_html, actual_title)
+                error = "pipeline stopped before completion"
+            except Exception as e:
+                ok, error = False, e
+            stats["published" if ok else "failed"] += 1
+            await settle(journal, ok, error)
+
+    publish_task = asyncio.create_task(publisher())
     try:
-        # Try to extract what we can from the content
-        title_match = re.search(r'"title":\s*"([^"]+)"', content)
-        title = title_match.group(1) if title_match else f"Understanding {topic}"
-        
-        # Extract sections content
-        sections_match = re.search(r'"sections":\s*\[(.*?)\]', content, re.DOTALL)
-        if sections_match:
-            sections_content = sections_match.group(1)
-            # Try to extract individual sections
-            section_matches = re.findall(r'\{[^{}]*"heading":\s*"([^"]+)"[^{}]*"content":\s*"([^"]*)"', sections_content, re.DOTALL)
-            
-            if section_matches:
-                sections = []
-                for heading, content_text in section_matches:
-                    # Clean up content text
-                    clean_content = content_text.replace('\\n', '\n').replace('\\"', '"')
-                    sections.append({
-                        "heading": heading,
-                        "content": clean_content,
-                        "code_examples": []
-                    })
-                
-                # Create structured content
-                structured_data = {
-                    "title": title,
-                    "description": f"A comprehensive guide about {topic}",
-                    "sections": sections,
-                    "tags": ["Cloud Computing", "Research"],
-                    "read_time": 5
-                }
-                
-                print(f"✅ Built content from {len(sections)} extracted sections")
-                return build_html_from_structure(structured_data)
-        
-        # If we can't extract sections, try to get any content
-        content_match = re.search(r'"content":\s*"([^"]*)"', content)
-        if content_match:
-            content_text = content_match.group(1).replace('\\n', '\n').replace('\\"', '"')
-            fallback_content = {
-                "title": title,
-                "description": f"A comprehensive guide about {topic}",
-                "sections": [
-                    {
-                        "heading": "Introduction",
-                        "content": content_text,
-                        "code_examples": []
-                    }
-                ],
-                "tags": ["Cloud Computing", "Research"],
-                "read_time": 3
-            }
-            
-            print("✅ Built content from extracted content field")
-            return build_html_from_structure(fallback_content)
-            
-    except Exception as e:
-        print(f"❌ Error building from partial JSON: {e}")
-    
-    return None, f"Understanding {topic}"
+        await asyncio.gather(*(generator() for _ in range(generators)))
+        await ready.put(None)
+        await publish_task
+        await warm_task
+    finally:
+        await close_async_clients()
 
-def build_html_from_structure(structured_content):
-    """Build HTML from structured content"""
-    html_parts = []
-    
-    # Validate required fields
-    if not isinstance(structured_content, dict):
-        print("❌ Error: structured_content is not a dictionary")
-        return "<h2>Error</h2><p>Invalid content structure</p>", "Error"
-    
-    # Get the actual title from structured content
-    actual_title = structured_content.get('title', 'Untitled Blog Post')
-    
-    # Get sections, default to empty list if missing
-    sections = structured_content.get('sections', [])
-    if not sections:
-        print("❌ Warning: No sections found in structured content")
-        return "<h2>Introduction</h2><p>Content structure is incomplete</p>", actual_title
-    
-    for i, section in enumerate(sections):
-        if not isinstance(section, dict):
-            print(f"❌ Warning: Section {i} is not a dictionary, skipping")
+    elapsed = time.monotonic() - started
+    rate = stats["published"] / elapsed * 60 if elapsed else 0
+    print(f"\n🏁 Async run: {stats['published']} published, {stats['failed']} failed "
+          f"in {elapsed:.1f}s ({rate:.1f} posts/min)")
+    return stats["failed"] == 0
+
+# ===== Shards =====
+# topics.md is split deterministically into K shards. Each runner renders its
+# shard into an isolated directory without touching the index, topics or git;
+# merge_shards() then folds every shard into the site with one index rewrite
+# and one commit.
+SHARD_DIR = os.environ.get("BLOG_SHARD_DIR", "shards")
+SHARD_MANIFEST = "shard.json"
+
+def shard_of(topic, shards):
+    """Stable shard number for a topic, independent of file order"""
+    digest = hashlib.sha256(" ".join(topic.lower().split()).encode('utf-8')).hexdigest()
+    return int(digest[:16], 16) % shards
+
+def shard_topics(shard, shards):
+    """Topics from topics.md that belong to one shard, in file order"""
+    next_topic_info = get_next_topic()
+    if not next_topic_info:
+        return []
+    first, rest = next_topic_info
+    return [topic for topic in [first] + rest if shard_of(topic, shards) == shard]
+
+def shard_path(out_dir, shard):
+    return Path(out_dir) / f"shard-{shard}"
+
+def run_shard(shard, shards, out_dir=SHARD_DIR, max_topics=None):
+    """Render one shard's topics into its own directory; re-runs skip finished topics"""
+    target = shard_path(out_dir, shard)
+    target.mkdir(parents=True, exist_ok=True)
+    manifest_file = target / SHARD_MANIFEST
+    manifest = {"shard": shard, "shards": shards, "posts": [], "skipped": [], "failed": []}
+    if manifest_file.exists():
+        with open(manifest_file, "r", encoding='utf-8') as f:
+            manifest.update(json.load(f))
+        manifest["failed"] = []
+    finished = {post["topic"] for post in manifest["posts"]} | {entry["topic"] for entry in manifest["skipped"]}
+
+    warm_provider_clients()
+    topics = [topic for topic in shard_topics(shard, shards) if topic not in finished][:max_topics]
+    print(f"🧩 Shard {shard}/{shards}: {len(topics)} topic(s) to generate into {target}")
+    for topic in topics:
+        # Journaled like a queued run, so a crashed shard reuses what it already paid for
+        journal = find_incomplete_journal(topic) or start_journal(topic)
+        duplicate = check_duplicate(journal)
+        if duplicate and DUPLICATE_ACTION == "skip":
+            print(f"⏭️ [{topic}] near-duplicate of {duplicate['filename']}")
+            manifest["skipped"].append({"topic": topic, "duplicate_of": duplicate["filename"]})
+            write_json_atomic(manifest_file, manifest)
+            finish_journal(journal)
             continue
-            
-        heading = section.get('heading', f'Section {i+1}')
-        content = section.get('content', 'Content not available')
-        code_examples = section.get('code_examples', [])
-        
-        # Clean up the content to remove repetitive phrases and improve readability
-        content = clean_content_content(content)
-        
-        # Skip sections with no meaningful content
-        if not content or content.strip() == 'Content not available' or len(content.strip()) < 10:
-            print(f"⚠️ Skipping section '{heading}' - no meaningful content")
+
+        try:
+            result = generate_stage(journal)
+        except Exception as e:
+            print(f"❌ [{topic}] generation failed: {e}")
+            result = None
+        if not result:
+            manifest["failed"].append(topic)
+            write_json_atomic(manifest_file, manifest)
             continue
-        
-        # Create heading with ID for TOC
-        heading_id = re.sub(r'[^a-z0-9]+', '-', heading.lower()).strip('-')
-        if not heading_id:
-            heading_id = f'section-{i+1}'
-        
-        html_parts.append(f'<h2 id="{heading_id}">{heading}</h2>')
-        
-        # Process content - split into paragraphs if it contains newlines
-        if '\n\n' in content:
-            # Split by double newlines and create separate paragraphs
-            paragraphs = content.split('\n\n')
-            for para in paragraphs:
-                para = para.strip()
-                if para and len(para) > 10:  # Only add non-empty paragraphs with meaningful content
-                    html_parts.append(f'<p>{para}</p>')
-        else:
-            # Single paragraph - only add if it has meaningful content
-            if len(content.strip()) > 10:
-                html_parts.append(f'<p>{content}</p>')
-        
-        # Add code examples if any - only render non-empty, meaningful code
-        if code_examples and isinstance(code_examples, list):
-            for code in code_examples:
-                if code and isinstance(code, str):
-                    # Clean the code example and check if it's meaningful
-                    clean_code = code.strip()
-                    # Skip code examples that are just comments or placeholders
-                    if (clean_code and 
-                        len(clean_code) > 10 and 
-                        not clean_code.startswith('// Example:') and
-                        not clean_code.startswith('// Basic') and
-                        not clean_code.startswith('// Best practice') and
-                        not clean_code.startswith('// Advanced') and
-                        not clean_code.startswith('// Real-world') and
-                        not clean_code.startswith('// Performance') and
-                        not clean_code.startswith('// Predictive') and
-                        not clean_code.startswith('// Automated') and
-                        not clean_code.startswith('// Production') and
-                        not clean_code.startswith('// Business')):
-                        
-                        html_parts.append(f'<pre><code>{clean_code}</code></pre>')
-                    else:
-                        print(f"⚠️ Skipping placeholder code example: {clean_code[:50]}...")
-    
-    if not html_parts:
-        return "<h2>Introduction</h2><p>No content could be generated from the structured data.</p>", actual_title
-    
-    return '\n'.join(html_parts), actual_title
 
-def generate_test_blog(topic):
-    """Generate a test blog post without requiring API keys"""
-    print("🧪 Generating test blog post (no API keys required)...")
-    
-    test_content = {
-        "title": f"Understanding {topic}: A Comprehensive Guide",
-        "description": f"This comprehensive blog post explores the fundamentals of {topic} and its importance in modern cloud computing and distributed systems, providing actionable insights and implementation strategies.",
-        "sections": [
-            {
-                "heading": "Introduction",
-                "content": f"In today's rapidly evolving cloud computing landscape, understanding {topic} has become increasingly important for developers, architects, and DevOps engineers. This concept plays a crucial role in building scalable, reliable, and cost-effective systems that can handle the demands of modern applications.\n\nAs organizations continue to adopt cloud-native architectures, the principles behind {topic} provide a foundation for making informed decisions about system design, resource allocation, and performance optimization. Whether you're working with serverless functions, microservices, or traditional cloud infrastructure, grasping these concepts will help you build better systems.\n\nThe importance of {topic} extends beyond just technical implementation—it represents a fundamental shift in how we think about system architecture, resource management, and scalability in the cloud era. Understanding these principles is essential for anyone looking to build robust, high-performance applications that can scale with business growth.",
-                "code_examples": []
-            },
-            {
-                "heading": "Core Concepts and Fundamentals",
-                "content": f"At its heart, {topic} revolves around several key principles that govern how systems behave and scale. The first concept to understand is the relationship between resource allocation and performance. When we talk about {topic}, we're essentially discussing how systems allocate and manage resources to meet varying demands.\n\nAnother fundamental aspect is the trade-off between efficiency and reliability. Systems that optimize for {topic} often need to balance these competing concerns, making architectural decisions that prioritize certain characteristics over others. This balancing act requires deep understanding of both the technical constraints and business requirements.\n\nUnderstanding the underlying mechanisms of {topic} involves grasping concepts like resource pooling, dynamic allocation, and adaptive scaling. These mechanisms work together to create systems that can respond intelligently to changing workloads while maintaining performance and reliability standards.\n\nThe relationship between {topic} and system architecture is crucial—the way you design your system directly impacts how effectively you can implement these concepts. This includes considerations around data flow, component coupling, and the overall system topology.",
-                "code_examples": [
-                    "const allocateResources = (demand) => {\n  const baseAllocation = demand * 1.5;\n  const maxResources = getMaxAvailableResources();\n  return Math.min(baseAllocation, maxResources);\n};",
-                    "const monitorPerformance = () => {\n  return {\n    latency: measureLatency(),\n    throughput: measureThroughput(),\n    resourceUtilization: getResourceUsage(),\n    errorRate: calculateErrorRate(),\n    responseTime: measureResponseTime()\n  };\n};",
-                    "const getSystemConfig = () => {\n  return {\n    scalingThreshold: process.env.SCALING_THRESHOLD || 0.8,\n    maxInstances: process.env.MAX_INSTANCES || 10,\n    cooldownPeriod: process.env.COOLDOWN_PERIOD || 300\n  };\n};"
-                ]
-            },
-            {
-                "heading": "Implementation Strategies and Best Practices",
-                "content": f"Implementing effective {topic} strategies requires a systematic approach that considers multiple factors. Start by establishing clear metrics and monitoring capabilities that will help you understand how your system is performing. This includes setting up logging, metrics collection, and alerting systems that can provide real-time insights into system behavior.\n\nNext, consider implementing gradual rollout strategies that allow you to test changes in production without affecting all users. This might involve feature flags, canary deployments, or A/B testing approaches that minimize risk while maximizing learning opportunities. Remember that successful {topic} implementation is often iterative, requiring continuous monitoring and adjustment based on real-world performance data.\n\nWhen implementing {topic} strategies, it's crucial to consider the operational aspects as well. This includes setting up proper alerting, establishing runbooks for common scenarios, and ensuring your team has the necessary skills and knowledge to operate the system effectively.\n\nAnother key consideration is the integration with existing infrastructure and tools. Your {topic} implementation should work seamlessly with your current monitoring, logging, and deployment systems, rather than requiring a complete overhaul of your existing toolchain.",
-                "code_examples": [
-                    "const isFeatureEnabled = (featureName, userId) => {\n  const feature = getFeatureConfig(featureName);\n  const userHash = hashUserId(userId);\n  const rolloutPercentage = feature.rolloutPercentage || 0;\n  \n  return feature.enabled && \n         (rolloutPercentage === 100 || \n          userHash % 100 < rolloutPercentage);\n};",
-                    "const shouldUseCanary = (request) => {\n  const canaryHeader = request.headers['x-canary'];\n  const randomRoll = Math.random();\n  const canaryPercentage = getCanaryPercentage();\n  \n  return canaryHeader === 'true' || randomRoll < canaryPercentage;\n};",
-                    "const handleSystemOperation = async (operation) => {\n  try {\n    const startTime = Date.now();\n    const result = await operation();\n    const duration = Date.now() - startTime;\n    \n    logSuccess(operation.name, duration, result);\n    return result;\n  } catch (error) {\n    logError(operation.name, error);\n    throw error;\n  }\n};"
-                ]
-            },
-            {
-                "heading": "Advanced Techniques and Optimization",
-                "content": f"Once you have the basic {topic} implementation in place, you can start exploring advanced techniques and optimization strategies. This includes implementing sophisticated monitoring and alerting systems that can detect issues before they impact users, as well as developing automated response mechanisms that can handle common problems without human intervention.\n\nAdvanced optimization techniques often involve machine learning and predictive analytics. By analyzing historical data and patterns, you can predict when scaling will be needed and proactively allocate resources. This proactive approach can significantly improve system performance and user experience.\n\nPerformance tuning is another critical aspect of advanced {topic} implementation. This involves fine-tuning various parameters, monitoring the impact of changes, and continuously iterating to find the optimal configuration for your specific use case and workload patterns.\n\nScalability considerations become increasingly important as your system grows. Advanced implementations often involve multi-region deployments, load balancing strategies, and sophisticated caching mechanisms that can handle massive scale while maintaining performance.",
-                "code_examples": [
-                    "const predictScalingNeeds = (historicalData) => {\n  const patterns = analyzeUsagePatterns(historicalData);\n  const predictions = applyMLModel(patterns);\n  return predictions.map(prediction => ({\n    timestamp: prediction.time,\n    expectedLoad: prediction.load,\n    recommendedInstances: prediction.instances\n  }));\n};",
-                    "const monitorAdvancedMetrics = () => {\n  return {\n    cpuUtilization: getCPUUsage(),\n    memoryUsage: getMemoryUsage(),\n    networkIO: getNetworkIO(),\n    diskIO: getDiskIO(),\n    customMetrics: getCustomMetrics()\n  };\n};",
-                    "const autoRespondToIssues = (issue) => {\n  const response = determineResponse(issue);\n  if (response.automated) {\n    executeAutomatedResponse(response.action);\n    logAutomatedResponse(issue, response);\n  } else {\n    escalateToHuman(issue, response);\n  }\n};"
-                ]
-            },
-            {
-                "heading": "Real-World Applications and Case Studies",
-                "content": f"Understanding how {topic} works in theory is one thing, but seeing it in action through real-world applications and case studies provides invaluable insights. Many successful companies have implemented sophisticated {topic} strategies that have enabled them to scale their operations while maintaining high performance and reliability.\n\nOne common pattern in successful implementations is the use of gradual rollout strategies combined with comprehensive monitoring. Companies that excel at {topic} often start with small, controlled deployments and gradually expand based on real-world performance data and user feedback.\n\nAnother key lesson from real-world implementations is the importance of team culture and processes. Successful {topic} implementations often involve cross-functional teams that include developers, operations engineers, and business stakeholders working together to ensure that technical decisions align with business objectives.\n\nCase studies also reveal the importance of learning from failures and continuously improving. Even the most successful implementations have encountered challenges, and the key to long-term success is building systems that can learn from these experiences and adapt accordingly.",
-                "code_examples": [
-                    "const deployWithRollback = async (version) => {\n  const deployment = await startDeployment(version);\n  const healthChecks = await monitorHealth(deployment.id);\n  \n  if (healthChecks.failing > HEALTH_CHECK_THRESHOLD) {\n    await rollbackDeployment(deployment.id);\n    notifyTeam('Deployment rolled back due to health check failures');\n    return false;\n  }\n  \n  return true;\n};",
-                    "const generateDashboard = (metrics) => {\n  return {\n    currentStatus: getSystemStatus(),\n    performanceMetrics: getPerformanceMetrics(),\n    alerts: getActiveAlerts(),\n    recommendations: generateRecommendations(metrics)\n  };\n};",
-                    "const trackBusinessImpact = (technicalMetrics) => {\n  return {\n    userExperience: calculateUserExperienceScore(technicalMetrics),\n    businessMetrics: getBusinessMetrics(),\n    correlation: analyzeCorrelation(technicalMetrics, businessMetrics)\n  };\n};"
-                ]
-            },
-            {
-                "heading": "Conclusion and Future Considerations",
-                "content": f"As we've explored throughout this comprehensive post, understanding {topic} is fundamental to building modern, scalable cloud systems. The concepts and strategies we've discussed provide a solid foundation for making architectural decisions that balance performance, reliability, and cost-effectiveness.\n\nLooking forward, the landscape of {topic} will continue to evolve as new technologies and approaches emerge. Staying current with these developments, while maintaining focus on fundamental principles, will be key to building systems that can adapt to changing requirements and scale with your organization's growth.\n\nThe future of {topic} likely involves even more sophisticated automation, machine learning integration, and intelligent decision-making systems. As these technologies mature, they will provide new opportunities to optimize system performance and resource utilization in ways that weren't possible before.",
-                "code_examples": []
-            }
-        ],
-        "tags": ["Cloud Computing", "System Design", "Performance", "Best Practices", "Architecture"],
-        "read_time": 15
-    }
-    
-    print("✅ Test blog content generated successfully")
-    html_content, title = build_html_from_structure(test_content)
-    return html_content, title
+        blog_html, title = result
+        name = journal.get("merged_into") or post_filename(title)
+        with open(target / name, "w", encoding='utf-8') as f:
+            f.write(blog_html)
+        post = {"topic": topic, "title": title, "file": name,
+                "sha256": hashlib.sha256(blog_html.encode('utf-8')).hexdigest()}
+        if journal.get("merged_into"):
+            # The merge step re-applies the sections to the site's copy of the post
+            post["merge_into"] = journal["merge_into"]
+            post["sections"] = journal["merged_sections"]
+        manifest["posts"].append(post)
+        write_json_atomic(manifest_file, manifest)
+        # Publishing is merge_shards' job; the journal must not resume it here
+        finish_journal(journal)
+        print(f"✅ [{topic}] rendered to {target / name}")
+
+    connection_report()
+    return not manifest["failed"]
+
+def run_shards_locally(shards, out_dir=SHARD_DIR, max_topics=None):
+    """Run every shard as its own process, the way K runners would"""
+    import subprocess
+
+    processes = []
+    for shard in range(shards):
+        command = [sys.executable, os.path.abspath(__file__), "shard",
+                   "--shards", str(shards), "--index", str(shard), "--out", out_dir]
+        if max_topics is not None:
+            command += ["--max-topics", str(max_topics)]
+        processes.append(subprocess.Popen(command))
+    codes = [process.wait() for process in processes]
+    print(f"🧩 {shards} shard process(es) finished: {codes.count(0)} ok, {shards - codes.count(0)} failed")
+    return not any(codes)
+
+def load_shard_manifests(out_dir=SHARD_DIR):
+    """Every shard manifest under out_dir, checked for a consistent shard count"""
+    manifests = []
+    for manifest_file in sorted(Path(out_dir).glob(f"shard-*/{SHARD_MANIFEST}")):
+        with open(manifest_file, "r", encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest["dir"] = manifest_file.parent
+        manifests.append(manifest)
+
+    counts = {manifest["shards"] for manifest in manifests}
+    if len(counts) > 1:
+        raise ValueError(f"Shard outputs disagree on the shard count: {sorted(counts)}")
+    if manifests:
+        missing = set(range(counts.pop())) - {manifest["shard"] for manifest in manifests}
+        if missing:
+            print(f"⚠️ No output for shard(s) {sorted(missing)}; their topics stay queued")
+    return manifests
+
+def add_index_cards(posts):
+    """Insert cards for several posts with a single index rewrite"""
+    ensure_placeholder_exists()
+    with open(INDEX_FILE, "r", encoding='utf-8') as f:
+        html = f.read()
+    if "<!-- BLOG-ENTRIES -->" not in html:
+        for title, filename in posts:
+            update_index(title, filename)
+        return
+
+    cards = [index_card_html(title, filename) for title, filename in posts]
+    html = html.replace("<!-- BLOG-ENTRIES -->", "\n\n                ".join(cards + ["<!-- BLOG-ENTRIES -->"]), 1)
+    write_output(INDEX_FILE, html)
+    print(f"✅ Added {len(cards)} card(s) to {INDEX_FILE}")
+
+def retire_topics(topics, status="done"):
+    """Mark topics finished outside the lease flow and rewrite topics.md"""
+    with topic_queue() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "UPDATE topics SET status = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE topic = ? AND status IN ('queued', 'leased')",
+            [(status, time.time(), topic) for topic in topics]
+        )
+        export_topics_file(conn)
+        conn.execute("COMMIT")
+
+def merge_shards(out_dir=SHARD_DIR, commit=True):
+    """Fold every shard's posts into the site in topics.md order, then index and commit once"""
+    manifests = load_shard_manifests(out_dir)
+    if not manifests:
+        print(f"❌ No shard output found in {out_dir}")
+        return False
+
+    import_topics_file()
+    next_topic_info = get_next_topic()
+    order = {topic: i for i, topic in enumerate([next_topic_info[0]] + next_topic_info[1]
+                                                if next_topic_info else [])}
+    posts = sorted(
+        ((post, manifest["dir"]) for manifest in manifests for post in manifest["posts"]),
+        key=lambda item: (order.get(item[0]["topic"], len(order)), item[0]["topic"])
+    )
+
+    with open(INDEX_FILE, "r", encoding='utf-8') as f:
+        index_html = f.read()
+    with topic_queue() as conn:
+        done = {row["topic"] for row in conn.execute("SELECT topic FROM topics WHERE status = 'done'")}
+    saved = set()
+
+    def taken(name):
+        return name in saved or (Path(BLOG_DIR) / name).exists() or f'href="{name}"' in index_html
+
+    merged = []
+    followups = []
+    on_site = []
+    for post, directory in posts:
+        with open(directory / post["file"], "r", encoding='utf-8') as f:
+            blog_html = f.read()
+        if hashlib.sha256(blog_html.encode('utf-8')).hexdigest() != post["sha256"]:
+            print(f"⚠️ Skipping {post['file']}: content does not match its shard manifest")
+            continue
+        if post["topic"] in done:
+            print(f"⏩ {post['file']} is already on the site")
+            on_site.append(post["topic"])
+            continue
 
-def generate_blog_html(topic):
-    """Generate blog content using structured approach"""
-    # Check if we have any API keys configured
-    if not OPENAI_API_KEY and not GEMINI_API_KEY:
-        print("⚠️ No API keys configured. Running in test mode...")
-        html_content, title = generate_test_blog(topic)
-        return html_content, title
-    
-    # Generate structured content
-    structured_content, actual_title = generate_structured_content(topic)
-    
-    # Format it using the template
-    if structured_content:
-        print("🔄 Formatting content with template...")
-        formatted_content = format_blog_with_template(topic, structured_content, actual_title)
-        return formatted_content, actual_title
+        if post.get("merge_into"):
+            # Apply the sections to the post as it is now, so merges from several shards all land
+            journal = {"merge_into": post["merge_into"]}
+            blog_html, title = render_post(post["topic"], post["sections"]["html"], post["sections"]["title"],
+                                           journal)
+            if journal.get("merged_into"):
+                send_to_slack(blog_html)
+                followups.append((post, save_blog_file(title, blog_html, journal["merged_into"])))
+                saved.add(journal["merged_into"])
+                continue
+            post = dict(post, title=title, file=post_filename(title))
+
+        name = post["file"]
+        if taken(name):
+            existing = Path(BLOG_DIR) / name
+            if existing.exists() and hashlib.sha256(existing.read_bytes()).hexdigest() == post["sha256"]:
+                # Saved by an earlier merge that stopped before retiring the topic
+                print(f"⏩ {name} is already on the site")
+                on_site.append(post["topic"])
+                continue
+            stem, number = name[:-len(".html")], 2
+            while taken(f"{stem}-{number}.html"):
+                number += 1
+            print(f"⚠️ {name} belongs to another post; saving '{post['topic']}' as {stem}-{number}.html")
+            name = f"{stem}-{number}.html"
+        send_to_slack(blog_html)
+        merged.append((post, save_blog_file(post["title"], blog_html, name)))
+        saved.add(name)
+
+    if merged:
+        add_index_cards([(post["title"], filename) for post, filename in merged])
+    # Posts that failed verification stay queued for the next run
+    retire_topics([post["topic"] for post, _ in merged + followups] + on_site)
+    retire_topics([entry["topic"] for manifest in manifests for entry in manifest["skipped"]], "skipped")
+    refreshed = refresh_related_posts() if (merged or followups) and np is not None else []
+    written = [filename for _, filename in merged + followups] + [INDEX_FILE] + refreshed
+    report_site_check(written)
+    within_budget = report_perf_budget(written)
+    write_deploy_manifest()
+    print(f"🧩 Merged {len(merged)} post(s) and {len(followups)} follow-up(s) from {len(manifests)} shard(s)")
+
+    if not within_budget:
+        print("⚠️ Pages are over their performance budget; not committing (BLOG_PERF_ACTION=fail)")
+        return False
+    if not (merged or followups) or not commit:
+        return True
+    titles = ", ".join(post["title"] for post, _ in merged + followups)
+    return commit_site_files([BLOG_DIR], f"Add {len(merged) + len(followups)} blog post(s) and update index: {titles}")
+
+# ===== Sites =====
+# One process can serve several blogs. A site names its own templates,
+# output tree, topics and state directory; the provider clients, token
+# calibration and cascade statistics stay shared between sites.
+SITES_FILE = os.environ.get("BLOG_SITES_FILE", "sites.json")
+
+# Site config key -> module setting it replaces
+SITE_SETTINGS = {
+    "blog_dir": "BLOG_DIR",
+    "template_file": "TEMPLATE_FILE",
+    "index_file": "INDEX_FILE",
+    "topics_file": "TOPICS_FILE",
+    "taxonomy_file": "TAXONOMY_FILE",
+    "openai_model": "OPENAI_MODEL",
+    "gemini_model": "GEMINI_MODEL",
+    "duplicate_action": "DUPLICATE_ACTION",
+    "max_tags": "MAX_TAGS",
+    "site_url": "SITE_URL",
+    "feed_author": "FEED_AUTHOR",
+    "perf_action": "PERF_ACTION"
+}
+# Per-site state, relative to the site's state_dir
+SITE_STATE_FILES = {
+    "JOURNAL_DIR": "journal",
+    "OUTPUT_MANIFEST_DB": "outputs.db",
+    "DEPLOY_MANIFEST_FILE": "deploy-manifest.json",
+    "QUEUE_DB": "topics.db",
+    "DEDUPE_INDEX_FILE": "minhash.json",
+    "RELATED_DIR": "related",
+    "FEED_STATE_FILE": "feeds.json",
+    "SITE_CHECK_FILE": "site-check.json",
+    "PERF_REPORT_FILE": "perf-budget.json",
+    "PERF_HISTORY_FILE": "perf-history.jsonl",
+    "POST_SOURCES_DIR": "sources",
+    "PREVIEW_DIR": "preview"
+}
+SHARED_STATE_FILES = ["CASCADE_STATS_DB", "TOKEN_CALIBRATION_FILE", "TOKEN_USAGE_LOG", "RATE_LIMIT_DB"]
+
+_default_site = None
+
+def load_sites():
+    """Site definitions from SITES_FILE, with roots resolved against the file"""
+    sites_path = Path(SITES_FILE)
+    if not sites_path.exists():
+        raise FileNotFoundError(f"{SITES_FILE} not found")
+    with open(sites_path, "r", encoding='utf-8') as f:
+        sites = json.load(f).get("sites", [])
+
+    names = [site.get("name") for site in sites]
+    if not all(names) or len(set(names)) != len(names):
+        raise ValueError(f"Every site in {SITES_FILE} needs a unique name")
+    for site in sites:
+        site["root"] = str((sites_path.resolve().parent / site.get("root", ".")).resolve())
+    return sites
+
+def site_settings(site):
+    """Module settings for a site, falling back to the defaults this process started with"""
+    settings = {setting: site.get(key, _default_site[setting]) for key, setting in SITE_SETTINGS.items()}
+
+    # Files default to living inside the site's blog directory
+    blog_dir = settings["BLOG_DIR"]
+    for key, setting, leaf in [("template_file", "TEMPLATE_FILE", "TEMPLATE.html"),
+                               ("index_file", "INDEX_FILE", "index.html"),
+                               ("topics_file", "TOPICS_FILE", "topics.md"),
+                               ("taxonomy_file", "TAXONOMY_FILE", "taxonomy.json")]:
+        if key not in site and "blog_dir" in site:
+            settings[setting] = f"{blog_dir}/{leaf}"
+
+    state_dir = site.get("state_dir", _default_site["STATE_DIR"])
+    settings["STATE_DIR"] = state_dir
+    for setting, leaf in SITE_STATE_FILES.items():
+        settings[setting] = f"{state_dir}/{leaf}"
+
+    if "model_cascade" in site:
+        settings["MODEL_CASCADE"] = list(site["model_cascade"])
+    elif "openai_model" in site or "gemini_model" in site:
+        settings["MODEL_CASCADE"] = default_cascade(settings["OPENAI_MODEL"], settings["GEMINI_MODEL"])
     else:
-        print("❌ No structured content generated")
-        return None, None
+        settings["MODEL_CASCADE"] = _default_site["MODEL_CASCADE"]
 
-def format_blog_with_template(topic, content_html, title):
-    """Format the AI-generated content using TEMPLATE.html"""
-    
-    # Read the template file
-    template_path = Path(TEMPLATE_FILE)
-    if not template_path.exists():
-        print(f"Warning: {TEMPLATE_FILE} not found. Using raw content.")
-        return content_html
-    
-    with open(template_path, 'r', encoding='utf-8') as f:
-        template = f.read()
-    
-    # Use the passed title instead of extracting from content
-    # Extract description (first paragraph)
-    desc_match = re.search(r'<p[^>]*>(.*?)</p>', content_html, re.IGNORECASE)
-    description = desc_match.group(1).strip() if desc_match else f"Comprehensive guide about {topic}"
-    
-    # Clean description (remove HTML tags)
-    description = re.sub(r'<[^>]+>', '', description)
-    
-    # Generate tags based on topic
-    tags = generate_tags_from_topic(topic)
-    
-    # Get current date and time
-    current_date = datetime.datetime.now().strftime("%B %d, %Y")
-    
-    # Estimate read time (rough calculation: 200 words per minute)
-    word_count = len(content_html.split())
-    read_time = max(1, round(word_count / 200))
-    
-    # Generate table of contents from headings
-    toc = generate_table_of_contents(content_html)
-    
-    # Replace template placeholders (using double curly braces as in your template)
-    formatted_content = template
-    formatted_content = formatted_content.replace('{{TITLE}}', title)
-    formatted_content = formatted_content.replace('{{DESCRIPTION}}', description)
-    formatted_content = formatted_content.replace('{{CONTENT}}', content_html)
-    formatted_content = formatted_content.replace('{{TAGS}}', tags)
-    formatted_content = formatted_content.replace('{{DATE}}', current_date)
-    formatted_content = formatted_content.replace('{{READ_TIME}}', str(read_time))
-    formatted_content = formatted_content.replace('{{CATEGORY}}', 'Research')
-    formatted_content = formatted_content.replace('{{TOC}}', toc)
-    
-    return formatted_content
+    webhook_env = site.get("slack_webhook_env")
+    settings["SLACK_WEBHOOK_URL"] = os.environ.get(webhook_env) if webhook_env else _default_site["SLACK_WEBHOOK_URL"]
+    return settings
 
-def generate_tags_from_topic(topic):
-    """Generate relevant tags based on the topic"""
-    topic_lower = topic.lower()
-    tags = []
-    
-    # Define tag mappings
-    tag_mappings = {
-        'serverless': 'Serverless',
-        'cloud': 'Cloud Computing',
-        'aws': 'AWS',
-        'lambda': 'AWS Lambda',
-        'performance': 'Performance',
-        'optimization': 'Optimization',
-        'scaling': 'Scaling',
-        'architecture': 'Architecture',
-        'distributed': 'Distributed Systems',
-        'research': 'Research',
-        'function': 'Functions',
-        'cold': 'Cold Start',
-        'start': 'Cold Start',
-        'autoscaling': 'Auto-scaling',
-        'faas': 'FaaS'
-    }
-    
-    for keyword, tag in tag_mappings.items():
-        if keyword in topic_lower:
-            tags.append(f'<span class="tag">{tag}</span>')
-    
-    # Add default tags if none found
-    if not tags:
-        tags = [
-            '<span class="tag">Cloud Computing</span>',
-            '<span class="tag">Research</span>'
-        ]
-    
-    return ' '.join(tags)
+def use_site(site):
+    """Point the module at a site: its working directory, paths and settings"""
+    global _default_site, _tag_automaton
+    if _default_site is None:
+        names = list(SITE_SETTINGS.values()) + list(SITE_STATE_FILES) + \
+            ["STATE_DIR", "MODEL_CASCADE", "SLACK_WEBHOOK_URL"]
+        _default_site = {name: globals()[name] for name in names}
+        # Shared state must not move when the working directory does
+        for name in SHARED_STATE_FILES:
+            globals()[name] = os.path.abspath(globals()[name])
 
-def generate_table_of_contents(content):
-    """Generate table of contents from HTML content"""
-    # Find all headings (h2, h3)
-    headings = re.findall(r'<h([23])[^>]*>(.*?)</h[23]>', content, re.IGNORECASE)
-    
-    if not headings:
-        return '<ul><li><a href="#introduction">Introduction</a></li></ul>'
-    
-    toc_items = []
-    for level, heading_text in headings:
-        # Create anchor ID
-        anchor = re.sub(r'[^a-z0-9]+', '-', heading_text.lower()).strip('-')
-        
-        # Clean heading text (remove HTML tags)
-        clean_text = re.sub(r'<[^>]+>', '', heading_text)
-        
-        # Add to TOC
-        toc_items.append(f'<li><a href="#{anchor}">{clean_text}</a></li>')
-    
-    return f'<ul>{"".join(toc_items)}</ul>'
+    os.chdir(site["root"])
+    globals().update(site_settings(site))
+    _tag_automaton = None
+    print(f"\n🌐 Site '{site['name']}': {site['root']} ({BLOG_DIR})")
 
-def send_to_slack(message_html):
-    """Send draft to Slack."""
-    if not SLACK_WEBHOOK_URL:
-        print("Slack Webhook URL not configured. Skipping Slack notification.")
-        return
+def run_sites(names=None, max_topics=1, use_async=False):
+    """Publish up to max_topics queued topics for each site, one site at a time"""
+    sites = load_sites()
+    if names:
+        unknown = set(names) - {site["name"] for site in sites}
+        if unknown:
+            raise ValueError(f"Unknown site(s): {', '.join(sorted(unknown))}")
+        sites = [site for site in sites if site["name"] in names]
 
-    # Convert HTML to plain text for Slack
-    import re
-    
-    def html_to_text(html_content):
-        """Convert HTML to readable plain text"""
-        # Remove HTML tags
-        text = re.sub(r'<[^>]+>', '', html_content)
-        # Decode HTML entities
-        text = text.replace('&nbsp;', ' ')
-        text = text.replace('&amp;', '&')
-        text = text.replace('&lt;', '<')
-        text = text.replace('&gt;', '>')
-        text = text.replace('&quot;', '"')
-        # Clean up whitespace
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
-        # Limit length to avoid Slack limits
-        if len(text) > 2000:
-            text = text[:1997] + "..."
-        return text
-    
-    # Convert HTML to plain text
-    plain_text = html_to_text(message_html)
-    
-    # Create a better Slack message structure
-    payload = {
-        "text": "📝 New Blog Draft Generated!",
-        "blocks": [
-            {
-                "type": "header",
-                "text": {
-                    "type": "plain_text",
-                    "text": "🚀 New Blog Post Draft"
-                }
-            },
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"*Topic:* {plain_text[:100]}..."
-                }
-            },
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"*Preview:* {plain_text[:500]}..."
-                }
-            },
-            {
-                "type": "divider"
-            },
-            {
-                "type": "context",
-                "elements": [
-                    {
-                        "type": "mrkdwn",
-                        "text": "Check your local files for the complete draft"
-                    }
-                ]
-            }
-        ]
-    }
-    
+    launch_dir = os.getcwd()
+    results = {}
     try:
-        response = requests.post(SLACK_WEBHOOK_URL, json=payload)
-        response.raise_for_status()
-        print("Blog draft sent to Slack successfully.")
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to send blog draft to Slack: {e}")
-        # Try a simpler fallback message
+        for site in sites:
+            use_site(site)
+            try:
+                if use_async:
+                    ok = asyncio.run(run_async_pipeline(max_topics))
+                else:
+                    ok = True
+                    for _ in range(max_topics):
+                        import_topics_file()
+                        with topic_queue() as conn:
+                            queued = conn.execute("SELECT COUNT(*) FROM topics WHERE status = 'queued'").fetchone()[0]
+                        if not queued:
+                            print("📭 No queued topics")
+                            break
+                        ok = run_next_topic() and ok
+            except Exception as e:
+                print(f"❌ Site '{site['name']}' failed: {e}")
+                ok = False
+            results[site["name"]] = ok
+    finally:
+        os.chdir(launch_dir)
+
+    connection_report()
+    print("\n🌐 Sites: " + ", ".join(f"{name} {'✅' if ok else '❌'}" for name, ok in results.items()))
+    return all(results.values())
+
+# ===== Daemon =====
+# A long-lived process that keeps clients, the compiled template, the tag
+# automaton, the output manifest and the post indexes warm between posts. Posts are generated
+# on a cron schedule or on request over a local control socket, which speaks
+# one JSON object per line.
+DAEMON_SOCKET = f"{STATE_DIR}/daemon.sock"
+DAEMON_SCHEDULE = os.environ.get("BLOG_SCHEDULE", "0 9 * * 1")
+DAEMON_TICK_SECONDS = 30
+CRON_FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]  # weekday 7 is Sunday too
+
+def parse_cron(expression):
+    """Five-field cron expression -> list of allowed values per field"""
+    fields = expression.split()
+    if len(fields) != 5:
+        raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+
+    parsed = []
+    for field, (low, high) in zip(fields, CRON_FIELD_RANGES):
+        values = set()
+        for item in field.split(","):
+            spec, _, step = item.partition("/")
+            if spec == "*":
+                start, end = low, high
+            elif "-" in spec:
+                start, end = (int(value) for value in spec.split("-", 1))
+            else:
+                start = end = int(spec)
+                if step:
+                    end = high
+            values.update(range(start, end + 1, int(step) if step else 1))
+        if not values or min(values) < low or max(values) > high:
+            raise ValueError(f"Cron field {field!r} is out of range {low}-{high}")
+        if high == 7:
+            values = {value % 7 for value in values}
+        parsed.append(values)
+    return parsed
+
+def cron_matches(fields, moment):
+    minutes, hours, days, months, weekdays = fields
+    weekday = (moment.weekday() + 1) % 7  # cron counts from Sunday
+    # Like cron: if both day fields are restricted, either may match
+    if len(days) < 31 and len(weekdays) < 7:
+        day_ok = moment.day in days or weekday in weekdays
+    else:
+        day_ok = moment.day in days and weekday in weekdays
+    return moment.minute in minutes and moment.hour in hours and moment.month in months and day_ok
+
+def next_cron_time(fields, after):
+    """First minute after `after` that the schedule fires, within a year"""
+    moment = after.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+    limit = moment + datetime.timedelta(days=366)
+    while moment < limit:
+        if moment.month not in fields[3] or not cron_matches([set(range(60)), set(range(24))] + fields[2:], moment):
+            moment = (moment + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+        elif moment.hour not in fields[1]:
+            moment = (moment + datetime.timedelta(hours=1)).replace(minute=0)
+        elif moment.minute not in fields[0]:
+            moment += datetime.timedelta(minutes=1)
+        else:
+            return moment
+    return None
+
+class BlogDaemon:
+    """Scheduler plus control socket around run_next_topic()"""
+
+    def __init__(self, schedule=DAEMON_SCHEDULE, socket_path=DAEMON_SOCKET):
+        self.schedule = schedule
+        self.fields = parse_cron(schedule) if schedule else None
+        self.socket_path = socket_path
+        self.paused = False
+        self.pending = 0
+        self.running = False
+        self.started = time.time()
+        self.runs = {"ok": 0, "failed": 0}
+        self.last_run = None
+        self.next_run = None
+        self.wake = None
+        self.stopping = None
+
+    def warm(self):
+        """Load everything a run needs once, up front"""
+        warm_provider_clients()
+        load_template()
+        with output_store():
+            pass  # creates the manifest, importing a legacy one, before the first run
+        scan_tags("")
+        load_duplicate_index()
+        load_related_index()
+        import_topics_file()
+
+    def status(self):
+        with topic_queue() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM topics GROUP BY status").fetchall())
+        return {
+            "paused": self.paused, "running": self.running, "pending": self.pending,
+            "schedule": self.schedule, "next_run": self.next_run.isoformat() if self.next_run else None,
+            "last_run": self.last_run, "runs": self.runs, "queue": counts,
+            "uptime_seconds": round(time.time() - self.started)
+        }
+
+    def stop(self):
+        self.stopping.set()
+        self.wake.set()
+
+    def trigger(self, count=1):
+        self.pending += count
+        self.wake.set()
+
+    async def handle_command(self, command):
+        action = command.get("cmd")
+        if action == "status":
+            return {"ok": True, **self.status()}
+        if action == "enqueue":
+            if not command.get("topic"):
+                return {"ok": False, "error": "enqueue needs a topic"}
+            added = enqueue_topic(command["topic"], int(command.get("priority", 0)))
+            if command.get("now"):
+                self.trigger()
+            return {"ok": True, "added": added}
+        if action == "run":
+            count = int(command.get("count", 1))
+            if count < 1:
+                return {"ok": False, "error": f"run count must be at least 1, not {count}"}
+            self.trigger(count)
+            return {"ok": True, "pending": self.pending}
+        if action in ("pause", "resume"):
+            self.paused = action == "pause"
+            if not self.paused:
+                self.wake.set()
+            return {"ok": True, "paused": self.paused}
+        if action == "stop":
+            self.stop()
+            return {"ok": True, "stopping": True}
+        return {"ok": False, "error": f"unknown command {action!r}"}
+
+    async def serve_client(self, reader, writer):
         try:
-            simple_payload = {
-                "text": f"📝 Blog draft generated for topic: {plain_text[:100]}...",
-                "blocks": [
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": f"*New Blog Draft:* {plain_text[:200]}..."
-                        }
-                    }
-                ]
-            }
-            response = requests.post(SLACK_WEBHOOK_URL, json=simple_payload)
-            response.raise_for_status()
-            print("Fallback Slack message sent successfully.")
-        except Exception as fallback_error:
-            print(f"Fallback Slack message also failed: {fallback_error}")
+            while line := await reader.readline():
+                try:
+                    response = await self.handle_command(json.loads(line))
+                except (json.JSONDecodeError, ValueError, TypeError) as e:
+                    response = {"ok": False, "error": str(e)}
+                writer.write((json.dumps(response) + "\n").encode('utf-8'))
+                await writer.drain()
+        except (asyncio.CancelledError, ConnectionError):
+            pass  # client went away or the daemon is shutting down
+        finally:
+            writer.close()
 
-def commit_blog_and_index(blog_file, index_file, title):
-    """Commit both the new blog post and updated index file together"""
-    try:
-        import subprocess
-        
-        # Configure git for the workflow
-        subprocess.run(["git", "config", "--global", "user.name", "GitHub Actions"], check=True)
-        subprocess.run(["git", "config", "--global", "user.email", "actions@github.com"], check=True)
-        
-        # Add both files
-        subprocess.run(["git", "add", blog_file], check=True)
-        subprocess.run(["git", "add", index_file], check=True)
-        
-        # Commit both changes together
-        commit_message = f"Add blog post and update index: {title}"
-        subprocess.run(["git", "commit", "-m", commit_message], check=True)
-        
-        # Push to the current branch
-        subprocess.run(["git", "push"], check=True)
-        
-        print(f"✅ Blog post and index committed and pushed to Git")
+    async def scheduler(self):
+        self.next_run = next_cron_time(self.fields, datetime.datetime.now()) if self.fields else None
+        while not self.stopping.is_set():
+            now = datetime.datetime.now()
+            if self.next_run and now >= self.next_run:
+                print(f"⏰ Scheduled run ({self.schedule})")
+                self.trigger()
+                # Count from the run just fired, so a clock that steps back
+                # (DST, NTP) can't make the same slot come round again
+                self.next_run = next_cron_time(self.fields, max(self.next_run, now))
+                continue
+            # Sleep in short chunks and re-check the wall clock rather than trust one long timer
+            delay = min(DAEMON_TICK_SECONDS, (self.next_run - now).total_seconds()) if self.next_run \
+                else DAEMON_TICK_SECONDS
+            try:
+                await asyncio.wait_for(self.stopping.wait(), timeout=max(0.05, delay))
+            except asyncio.TimeoutError:
+                pass
+
+    async def worker(self):
+        while not self.stopping.is_set():
+            await self.wake.wait()
+            self.wake.clear()
+            while self.pending > 0 and not self.paused and not self.stopping.is_set():
+                self.pending -= 1
+                self.running = True
+                started = time.monotonic()
+                try:
+                    ok = await asyncio.to_thread(run_next_topic)
+                except Exception as e:
+                    print(f"❌ Daemon run failed: {e}")
+                    ok = False
+                self.running = False
+                self.runs["ok" if ok else "failed"] += 1
+                self.last_run = {"at": datetime.datetime.now().isoformat(), "ok": ok,
+                                 "seconds": round(time.monotonic() - started, 2)}
+                connection_report()
+
+    async def run(self):
+        if daemon_listening(self.socket_path):
+            print(f"❌ A daemon is already listening on {self.socket_path}")
+            return False
+        self.wake, self.stopping = asyncio.Event(), asyncio.Event()
+        await asyncio.to_thread(self.warm)
+
+        Path(self.socket_path).parent.mkdir(parents=True, exist_ok=True)
+        # Left behind by a daemon that didn't shut down cleanly
+        Path(self.socket_path).unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(self.serve_client, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.stop)
+
+        print(f"👂 Daemon listening on {self.socket_path}"
+              + (f", schedule '{self.schedule}'" if self.schedule else ", no schedule"))
+        async with server:
+            tasks = [asyncio.create_task(self.scheduler()), asyncio.create_task(self.worker())]
+            await self.stopping.wait()
+            await asyncio.gather(*tasks)
+        Path(self.socket_path).unlink(missing_ok=True)
+        print(f"👋 Daemon stopped after {self.runs['ok']} ok / {self.runs['failed']} failed run(s)")
+        return self.runs["failed"] == 0
+
+def daemon_listening(socket_path=DAEMON_SOCKET):
+    """Whether something accepts connections on the control socket"""
+    if not Path(socket_path).exists():
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+def send_daemon_command(command, socket_path=DAEMON_SOCKET):
+    """Send one control command to a running daemon and return its reply"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(command) + "\n").encode('utf-8'))
+        reply = b""
+        while not reply.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            reply += chunk
+    return json.loads(reply)
+
+# ===== Preview server =====
+# `serve` renders posts from their stored template values into a preview
+# tree, so template or source edits show up without calling a provider.
+# A polling watcher re-renders only the pages an edit affects and tells open
+# browsers to reload; responses carry precompressed bodies and the caching
+# headers production would use.
+POST_SOURCES_DIR = f"{STATE_DIR}/sources"
+PREVIEW_DIR = f"{STATE_DIR}/preview"
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = f'''<script>
+new EventSource("{LIVE_RELOAD_PATH}").onmessage = function (event) {{
+    var paths = JSON.parse(event.data);
+    if (paths.indexOf("*") >= 0 || paths.indexOf(location.pathname) >= 0) location.reload();
+}};
+</script>
+'''
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "application/xml",
+                      "application/atom+xml", "application/rss+xml", "image/svg+xml")
+HASHED_ASSET_PATTERN = re.compile(r'\.[0-9a-f]{8,}\.[a-z0-9]+$')
+# Share of a page's lines the template must reproduce for it to be previewed
+# from its values; hand-written pages below this are served as they are.
+TEMPLATE_MATCH_RATIO = float(os.environ.get("BLOG_TEMPLATE_MATCH_RATIO", "0.9"))
+
+def element_inner_html(html, start_pattern):
+    """Inner HTML of the <div> whose start tag matches start_pattern, nesting included"""
+    start = re.search(start_pattern, html, re.DOTALL)
+    if not start:
+        return None
+    depth = 1
+    for tag in re.finditer(r'<(/?)div\b[^>]*>', html[start.end():]):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return html[start.end():start.end() + tag.start()]
+    return None
+
+def extract_post_source(html):
+    """Template placeholder values of a rendered post, or None if it doesn't follow the template"""
+    title, _ = extract_post_text(html)
+    content = element_inner_html(html, r'<div class="blog-content">')
+    if not title or content is None:
+        return None
+
+    def first(pattern, default="", group=1):
+        match = re.search(pattern, html, re.DOTALL)
+        return match.group(group).strip() if match else default
+
+    toc = element_inner_html(html, r'<div class="table-of-contents">') or ""
+    related = re.search(re.escape(RELATED_MARKER_START) + r'.*?' + re.escape(RELATED_MARKER_END), html, re.DOTALL)
+    return {
+        "TITLE": title,
+        "DESCRIPTION": first(r'<p class="text-xl text-secondary mb-8">(.*?)</p>'),
+        "CONTENT": content.strip(),
+        "TAGS": first(TAG_ROW_PATTERN, group=2),
+        "DATE": first(r'<span>📅 (.*?)</span>'),
+        "READ_TIME": first(r'<span>📖 (.*?)</span>'),
+        "CATEGORY": first(r'<span>🔬 (.*?)</span>', "Research"),
+        "TOC": re.sub(r'^\s*<h3[^>]*>.*?</h3>', '', toc, count=1, flags=re.DOTALL).strip(),
+        "RELATED_POSTS": related.group(0) if related else render_related_posts([])
+    }
+
+def post_source_path(filename):
+    return Path(POST_SOURCES_DIR) / f"{Path(filename).stem}.json"
+
+def follows_template(html, values):
+    """True if rendering values through the template reproduces the page (give or take template edits)"""
+    template = load_template()
+    if template is None:
         return True
-        
-    except subprocess.CalledProcessError as e:
-        print(f"Git operations failed: {e}")
-        print("Files saved locally but not committed to Git")
+    rendered = render_template(template, values)
+    matcher = difflib.SequenceMatcher(None, html.splitlines(), rendered.splitlines(), autojunk=False)
+    return matcher.ratio() >= TEMPLATE_MATCH_RATIO
+
+def save_post_source(filename, content_html):
+    """Keep the template values of a saved post so it can be re-rendered later"""
+    values = extract_post_source(content_html)
+    if values is None or not follows_template(content_html, values):
         return False
+    path = post_source_path(filename)
+    if path.exists():
+        with open(path, "r", encoding='utf-8') as f:
+            if json.load(f) == values:
+                return False
+    write_json_atomic(path, values)
+    return True
+
+def compress_variants(data):
+    """Encoded bodies of data keyed by Content-Encoding ('' is identity)"""
+    variants = {"": data, "gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli:
+        variants["br"] = brotli.compress(data)
+    return variants
+
+def cache_control(path):
+    if HASHED_ASSET_PATTERN.search(path.name):
+        return "public, max-age=31536000, immutable"
+    if path.suffix in (".html", ".xml"):
+        return "no-cache"  # always revalidate, the ETag makes that cheap
+    return "public, max-age=3600"
+
+class PreviewSite:
+    """Preview build of the site plus the state the watcher and server share"""
+
+    def __init__(self, live_reload=True):
+        self.live_reload = live_reload
+        self.output_hashes = {}
+        self.static_cache = {}
+        self.version = 0
+        self.changed_paths = []
+        self.changed = threading.Condition()
+        self.lock = threading.Lock()
+
+    def url_path(self, filename):
+        return "/" + Path(BLOG_DIR, Path(filename).name).as_posix().lstrip("/")
+
+    def preview_path(self, filename):
+        return Path(PREVIEW_DIR) / BLOG_DIR / Path(filename).name
+
+    def inject(self, data):
+        if not self.live_reload:
+            return data
+        return data.replace(b"</body>", LIVE_RELOAD_SCRIPT.encode('utf-8') + b"</body>", 1)
+
+    def sync_sources(self):
+        """Record sources for posts that have none yet (posts saved before sources existed)"""
+        added = 0
+        for path in sorted(Path(BLOG_DIR).glob("*.html")):
+            if path.name in NON_POST_FILES or post_source_path(path.name).exists():
+                continue
+            with open(path, "r", encoding='utf-8') as f:
+                added += save_post_source(path.name, f.read())
+        return added
+
+    def source_names(self):
+        return sorted(path.stem for path in Path(POST_SOURCES_DIR).glob("*.json")
+                      if Path(BLOG_DIR, f"{path.stem}.html").exists())
+
+    def render(self, names):
+        """Render the named posts into the preview tree; returns the URL paths whose output changed"""
+        template = load_template()
+        # The assets a new template refers to aren't published yet; serve them from the preview tree
+        for name, content in template_assets().items():
+            target = Path(PREVIEW_DIR) / assets_dir() / name
+            if not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_text(content, encoding='utf-8')
+        changed = []
+        for name in names:
+            source = post_source_path(name)
+            try:
+                with open(source, "r", encoding='utf-8') as f:
+                    values = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠️ Skipping {source}: {e}")
+                continue
+            data = self.inject(render_template(template, values).encode('utf-8'))
+            digest = hashlib.sha256(data).hexdigest()
+            if self.output_hashes.get(name) == digest:
+                continue
+            target = self.preview_path(f"{name}.html")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with self.lock:
+                for encoding, body in compress_variants(data).items():
+                    suffix = {"": "", "gzip": ".gz", "br": ".br"}[encoding]
+                    tmp_path = target.with_name(f"{target.name}{suffix}.{os.getpid()}.tmp")
+                    tmp_path.write_bytes(body)
+                    os.replace(tmp_path, target.with_name(target.name + suffix))
+                self.output_hashes[name] = digest
+            changed.append(self.url_path(f"{name}.html"))
+        return changed
+
+    def notify(self, paths):
+        if not paths:
+            return
+        with self.changed:
+            self.version += 1
+            self.changed_paths = paths
+            self.changed.notify_all()
+
+    def watched_files(self):
+        """mtime of every input the preview depends on"""
+        files = {}
+        for path in [Path(TEMPLATE_FILE), Path(TAXONOMY_FILE)]:
+            if path.exists():
+                files[str(path)] = path.stat().st_mtime_ns
+        for pattern_dir, pattern in ((POST_SOURCES_DIR, "*.json"), (BLOG_DIR, "*")):
+            for path in Path(pattern_dir).glob(pattern):
+                if path.is_file():
+                    files[str(path)] = path.stat().st_mtime_ns
+        for path in Path(".").glob("*.html"):
+            files[str(path)] = path.stat().st_mtime_ns
+        return files
+
+    def rebuild(self, changed_files):
+        """Re-render what a set of changed inputs affects"""
+        global _tag_automaton
+        changed_files = set(changed_files)
+        names = set()
+        static = []
+        if str(Path(TAXONOMY_FILE)) in changed_files:
+            _tag_automaton = None
+            for name in self.source_names():
+                with open(post_source_path(name), "r", encoding='utf-8') as f:
+                    values = json.load(f)
+                body = re.sub(r'<[^>]+>', ' ', values["CONTENT"])
+                values["TAGS"] = render_tags(extract_tags(values["TITLE"], body))
+                write_json_atomic(post_source_path(name), values)
+                names.add(name)
+        if str(Path(TEMPLATE_FILE)) in changed_files:
+            names.update(self.source_names())
+        for changed_file in changed_files:
+            path = Path(changed_file)
+            if path.parent == Path(POST_SOURCES_DIR) and path.suffix == ".json":
+                names.add(path.stem)
+            elif path.parent == Path(BLOG_DIR) and path.suffix == ".html" and path.name not in NON_POST_FILES:
+                # A post saved by the generator or edited by hand: refresh its source
+                with open(path, "r", encoding='utf-8') as f:
+                    if not save_post_source(path.name, f.read()) and path.stem not in self.output_hashes:
+                        static.append(path)
+                names.add(path.stem)
+            elif path.exists() and path != Path(TEMPLATE_FILE) and path != Path(TAXONOMY_FILE):
+                static.append(path)
+
+        started = time.monotonic()
+        paths = self.render(sorted(name for name in names if post_source_path(name).exists()))
+        paths += ["/" + path.as_posix() for path in static]
+        if paths:
+            print(f"🔁 Re-rendered {len(paths)} page(s) in {time.monotonic() - started:.3f}s: "
+                  + ", ".join(paths[:5]) + (" ..." if len(paths) > 5 else ""))
+        # Hand-edited pages, the index or other assets: reload everyone showing them
+        self.notify(["*"] if any(path.suffix != ".html" for path in static) else paths)
+
+    def watch(self, interval=0.5, stop=None):
+        seen = self.watched_files()
+        while not (stop and stop.is_set()):
+            time.sleep(interval)
+            current = self.watched_files()
+            changed = {path for path, mtime in current.items() if seen.get(path) != mtime}
+            seen = current
+            if changed:
+                try:
+                    self.rebuild(changed)
+                except Exception as e:
+                    print(f"⚠️ Re-render failed: {e}")
+
+    def resolve(self, url_path):
+        """File behind a URL path: the preview build if it has one, else the site tree
+
+        The site tree is the top-level pages plus BLOG_DIR; the rest of the
+        checkout (.git, .blog_state, blog.py, ...) is never served.
+        """
+        relative = unquote(url_path.split("?", 1)[0]).lstrip("/")
+        relative = os.path.normpath(relative) if relative else "."
+        path = Path(relative)
+        if relative.startswith("..") or "\0" in relative or any(part.startswith(".") for part in path.parts):
+            return None
+        if path == Path(".") or path.is_dir():
+            path = path / "index.html"
+        if not (Path(BLOG_DIR) in path.parents or (len(path.parts) == 1 and path.suffix == ".html")):
+            return None
+        preview = Path(PREVIEW_DIR) / path
+        return preview if preview.is_file() else (path if path.is_file() else None)
+
+    def variants(self, path):
+        """Encoded bodies of a file, from the precompressed build or compressed once per mtime"""
+        if Path(PREVIEW_DIR) in path.parents:
+            with self.lock:
+                variants = {"": path.read_bytes()}
+                for encoding, suffix in (("gzip", ".gz"), ("br", ".br")):
+                    encoded = path.with_name(path.name + suffix)
+                    if encoded.exists():
+                        variants[encoding] = encoded.read_bytes()
+            return variants
+
+        mtime = path.stat().st_mtime_ns
+        cached = self.static_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        data = path.read_bytes()
+        if path.suffix == ".html":
+            data = self.inject(data)
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        variants = compress_variants(data) if content_type.startswith(COMPRESSIBLE_TYPES) else {"": data}
+        self.static_cache[path] = (mtime, variants)
+        return variants
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the production CDN
+    site = None
+
+    def log_message(self, format, *args):
+        pass  # the watcher's output is the interesting part
+
+    def do_HEAD(self):
+        self.send_file(head=True)
+
+    def do_GET(self):
+        if self.path == LIVE_RELOAD_PATH:
+            return self.stream_reloads()
+        self.send_file()
+
+    def send_file(self, head=False):
+        path = self.site.resolve(self.path)
+        if path is None:
+            return self.send_error(404)
+
+        variants = self.site.variants(path)
+        accepted = {part.split(";")[0].strip() for part in self.headers.get("Accept-Encoding", "").split(",")}
+        encoding = next((name for name in ("br", "gzip") if name in variants and name in accepted), "")
+        body = variants[encoding]
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+        status = 304 if etag in self.headers.get("If-None-Match", "") else 200
+        self.send_response(status)
+        self.send_header("Content-Type", mimetypes.guess_type(path.name)[0] or "application/octet-stream")
+        self.send_header("Cache-Control", cache_control(path))
+        self.send_header("ETag", etag)
+        if len(variants) > 1:
+            self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if status == 304:
+            return self.end_headers()
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def stream_reloads(self):
+        """Server-sent events: one message per rebuild, listing the changed URL paths"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        version = self.site.version
+        try:
+            while True:
+                with self.site.changed:
+                    self.site.changed.wait_for(lambda: self.site.version != version, timeout=15)
+                    paths = self.site.changed_paths if self.site.version != version else None
+                    version = self.site.version
+                # A comment line doubles as a keep-alive
+                self.wfile.write((f"data: {json.dumps(paths)}\n\n" if paths else ": ping\n\n").encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+def serve_preview(host="127.0.0.1", port=8000, watch=True, live_reload=True):
+    """Build the preview, then serve it until interrupted"""
+    site = PreviewSite(live_reload=live_reload and watch)
+    started = time.monotonic()
+    added = site.sync_sources()
+    if added:
+        print(f"📝 Recorded sources for {added} existing post(s) in {POST_SOURCES_DIR}")
+    rendered = site.render(site.source_names())
+    print(f"🏗️ Rendered {len(rendered)} post(s) into {PREVIEW_DIR} in {time.monotonic() - started:.3f}s")
+
+    stop = threading.Event()
+    if watch:
+        threading.Thread(target=site.watch, kwargs={"stop": stop}, daemon=True).start()
+
+    handler = type("BoundPreviewHandler", (PreviewHandler,), {"site": site})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    print(f"🌐 Serving http://{host}:{server.server_address[1]}/{BLOG_DIR}/"
+          + (" with live reload" if site.live_reload else ""))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Preview server stopped")
+    finally:
+        stop.set()
+        server.server_close()
+    return True
+
+# ===== Main =====
+
+def claim_next_topic(worker_id):
+    """Lease the next topic and open (or resume) its journal
+
+    Returns None when the queue is empty. Topics retired as duplicates come
+    back with journal["skipped"] set.
+    """
+    leased = lease_topic(worker_id)
+    if not leased:
+        return None
+    try:
+        return _open_leased_journal(leased, worker_id)
     except Exception as e:
-        print(f"Unexpected error during git operations: {e}")
-        print("Files saved locally but not committed to Git")
-        return False
+        # Hand the lease back rather than leaving it to expire
+        fail_topic(leased["id"], worker_id, e)
+        raise
 
-def save_blog_file(title, content_html):
-    """Save the generated blog as HTML in blog folder."""
-    # Ensure BLOG_DIR exists
-    Path(BLOG_DIR).mkdir(parents=True, exist_ok=True)
+def _open_leased_journal(leased, worker_id):
+    journal = find_incomplete_journal(leased["topic"])
+    if journal:
+        print(f"♻️ Resuming unfinished run {journal['run_id']}")
+    else:
+        journal = start_journal(leased["topic"])
+    journal["queue_id"] = leased["id"]
+    journal["worker_id"] = worker_id
+    save_journal(journal)
 
-    date_str = datetime.date.today().strftime("%Y-%m-%d")
-    # Clean title for filename slug
-    filename_slug = re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')
-    if not filename_slug: # Fallback if title becomes empty after sanitization
-        filename_slug = "untitled-blog-post"
-    filename = f"{BLOG_DIR}/{date_str}-{filename_slug}.html"
-    
-    # Save the file locally
-    with open(filename, "w", encoding='utf-8') as f:
-        f.write(content_html)
-    
-    print(f"Blog post saved locally: {filename}")
-    
-    return filename
+    duplicate = check_duplicate(journal)
+    if duplicate and DUPLICATE_ACTION == "skip":
+        skip_topic(leased["id"], worker_id, f"near-duplicate of {duplicate['filename']}")
+        journal["skipped"] = True
+        finish_journal(journal)
+    return journal
 
-def ensure_placeholder_exists():
-    """Ensure the BLOG-ENTRIES placeholder exists in the index file"""
-    if not Path(INDEX_FILE).exists():
-        print(f"❌ {INDEX_FILE} not found. Cannot ensure placeholder.")
-        return False
+def check_duplicate(journal):
+    """Look for an existing post like the journal's topic before any provider is called
 
-    with open(INDEX_FILE, "r", encoding='utf-8') as f:
-        html = f.read()
+    Records it as duplicate_of (and as merge_into when merging) and returns
+    it; the caller decides what skipping means.
+    """
+    if stage_done(journal, "generate") or stage_done(journal, "render"):
+        return None
+    duplicate = find_duplicate_topic(journal["topic"])
+    if not duplicate:
+        return None
+    print(f"⚠️ Topic looks like existing post '{duplicate['title']}' "
+          f"({duplicate['filename']}, similarity {duplicate['similarity']:.2f})")
+    journal["duplicate_of"] = duplicate
+    if DUPLICATE_ACTION == "merge":
+        print("🔀 Generating new sections to merge into the existing post")
+        journal["merge_into"] = duplicate
+    save_journal(journal)
+    return duplicate
 
-    if "<!-- BLOG-ENTRIES -->" in html:
-        print("✅ BLOG-ENTRIES placeholder found")
-        return True
+def settle_topic(journal, ok, error="pipeline stopped before completion"):
+    """Report the outcome of a run back to the topic queue"""
+    if ok:
+        complete_topic(journal["queue_id"], journal["worker_id"])
     else:
-        print("⚠️ BLOG-ENTRIES placeholder missing. Adding it back...")
-        
-        # Find the "Coming Soon" card and add the placeholder before it
-        coming_soon_pattern = '''                <div class="blog-card rounded-xl p-6 border border-gray-800 card-hover">
-                    <div class="flex items-center mb-3">
-                        <span class="text-gray-400 text-sm">Coming Soon</span>
-                    </div>
-                    <h3 class="text-xl font-bold text-primary mb-3">
-                        🚀 More Blog Posts Coming Soon!
-                    </h3>
-                    <p class="text-gray-300 mb-4">
-                        I'm working on more articles about cloud computing, serverless optimization, and distributed systems research. Stay tuned!
-                    </p>
-                    <div class="flex flex-wrap gap-2 mb-4">
-                        <span class="tag">Coming Soon</span>
-                        <span class="tag">Cloud Computing</span>
-                        <span class="tag">Research</span>
-                    </div>
-                    <div class="flex items-center justify-between">
-                        <span class="text-gray-400 text-sm">📖 More content soon</span>
-                        <span class="text-gray-500">Stay tuned!</span>
-                    </div>
-                </div>'''
-        
-        # Add the placeholder before the Coming Soon card
-        placeholder_html = '''                <!-- BLOG-ENTRIES -->
-                <div class="blog-card rounded-xl p-6 border border-gray-800 card-hover">
-                    <div class="flex items-center mb-3">
-                        <span class="text-gray-400 text-sm">Coming Soon</span>
-                    </div>
-                    <h3 class="text-xl font-bold text-primary mb-3">
-                        🚀 More Blog Posts Coming Soon!
-                    </h3>
-                    <p class="text-gray-300 mb-4">
-                        I'm working on more articles about cloud computing, serverless optimization, and distributed systems research. Stay tuned!
-                    </p>
-                    <div class="flex flex-wrap gap-2 mb-4">
-                        <span class="tag">Coming Soon</span>
-                        <span class="tag">Cloud Computing</span>
-                        <span class="tag">Research</span>
-                    </div>
-                    <div class="flex items-center justify-between">
-                        <span class="text-gray-400 text-sm">📖 More content soon</span>
-                        <span class="text-gray-500">Stay tuned!</span>
-                    </div>
-                </div>'''
-        
-        html = html.replace(coming_soon_pattern, placeholder_html)
-        
-        with open(INDEX_FILE, "w", encoding='utf-8') as f:
-            f.write(html)
-        
-        print("✅ BLOG-ENTRIES placeholder restored")
+        fail_topic(journal["queue_id"], journal["worker_id"], error)
+
+def run_next_topic():
+    """Lease the next topic (resuming its journal if one exists) and run it"""
+    warm_provider_clients()
+    import_topics_file()
+    journal = claim_next_topic(queue_worker_id())
+    if not journal:
+        print("❌ Exiting: No topics found or topics.md is missing.")
+        return True
+    if journal.get("skipped"):
         return True
 
-def update_index(title, filename):
-    """Update blog/index.html with new blog entry"""
-    print(f"🔄 Updating blog index with: {title}")
-    
-    # Read the current index file
-    with open(INDEX_FILE, "r", encoding='utf-8') as f:
-        html = f.read()
-    
-    # Ensure the placeholder exists at the top of the grid
-    ensure_placeholder_exists()
-    
-    # Generate the HTML for the new blog post
-    current_date = datetime.datetime.now().strftime("%B %d, %Y")
-    read_time = "5 min read"  # Default read time
-    
-    post_html = f'''                <div class="blog-card rounded-xl p-6 border border-gray-800 card-hover">
-                    <div class="flex items-center mb-3">
-                        <span class="text-gray-400 text-sm">{current_date}</span>
-                    </div>
-                    <h3 class="text-xl font-bold text-primary mb-3">
-                        🚀 {title}
-                    </h3>
-                    <p class="text-gray-300 mb-4">
-                        A comprehensive guide about {title.lower()}. Click to read the full article.
-                    </p>
-                    <div class="flex flex-wrap gap-2 mb-4">
-                        <span class="tag">Serverless</span>
-                        <span class="tag">Cloud Computing</span>
-                        <span class="tag">Research</span>
-                    </div>
-                    <div class="flex items-center justify-between">
-                        <span class="text-gray-400 text-sm">📖 {read_time}</span>
-                        <a href="{Path(filename).name}" class="bg-primary text-white px-6 py-3 rounded-lg hover:bg-primary/80 transition-colors">
-                            Read Full Article →
-                        </a>
-                    </div>
-                </div>
+    try:
+        ok = run_pipeline(journal)
+    except Exception as e:
+        settle_topic(journal, False, e)
+        raise
 
-                <!-- BLOG-ENTRIES -->'''
+    settle_topic(journal, ok)
+    return ok
 
-    # Check if the placeholder exists
-    if "<!-- BLOG-ENTRIES -->" in html:
-        print(f"🔍 Found BLOG-ENTRIES placeholder, replacing with new post...")
-        # Replace the placeholder with new post + placeholder (preserving it for future posts)
-        html = html.replace("<!-- BLOG-ENTRIES -->", post_html)
-        
-        # Write the updated HTML back to the file
-        with open(INDEX_FILE, "w", encoding='utf-8') as f:
-            f.write(html)
-        
-        print(f"✅ Updated {INDEX_FILE} with new blog entry: {title}")
-        print(f"📝 Blog post added to index: {filename}")
-        print(f"🔍 BLOG-ENTRIES placeholder preserved for future posts")
-        
-        # Verify the update worked
-        with open(INDEX_FILE, "r", encoding='utf-8') as f:
-            updated_html = f.read()
-        if title in updated_html:
-            print(f"✅ Verification: Title '{title}' found in updated index")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate and publish blog posts")
+    subparsers = parser.add_subparsers(dest="command")
+
+    generate_parser = subparsers.add_parser("generate", help="Generate the next queued topic (default)")
+    generate_parser.add_argument("--async", dest="use_async", action="store_true",
+                                 help="Work through the queue with overlapping generate/publish stages")
+    generate_parser.add_argument("--max-topics", type=int, default=None, help="Stop after this many topics")
+    generate_parser.add_argument("--generators", type=int, default=2, help="Concurrent provider calls")
+    generate_parser.add_argument("--max-pending", type=int, default=2,
+                                 help="Generated drafts allowed to wait for publishing")
+
+    queue_parser = subparsers.add_parser("queue", help="Manage the topic queue")
+    queue_parser.add_argument("action", choices=["status", "import", "export", "add", "requeue-dead"])
+    queue_parser.add_argument("topic", nargs="?", help="Topic to add")
+    queue_parser.add_argument("--priority", type=int, default=0, help="Higher priorities are served first")
+
+    subparsers.add_parser("cascade", help="Report model cascade acceptance rates and savings")
+
+    subparsers.add_parser("limits", help="Show rate limit utilisation, throttling and daily quota use")
+
+    tokens_parser = subparsers.add_parser("tokens", help="Show the token plan for each cascade tier")
+    tokens_parser.add_argument("topic", nargs="?", default="Serverless cold starts")
+
+    tags_parser = subparsers.add_parser("tags", help="Re-derive tags for every post from its full text")
+    tags_parser.add_argument("--apply", action="store_true", help="Rewrite post headers and index cards")
+
+    daemon_parser = subparsers.add_parser("daemon", help="Stay running: generate on a schedule or on request")
+    daemon_parser.add_argument("--schedule", default=DAEMON_SCHEDULE,
+                               help="Cron expression for scheduled runs ('' to disable)")
+    daemon_parser.add_argument("--socket", default=DAEMON_SOCKET, help="Control socket path")
+
+    ctl_parser = subparsers.add_parser("ctl", help="Control a running daemon")
+    ctl_parser.add_argument("action", choices=["status", "enqueue", "run", "pause", "resume", "stop"])
+    ctl_parser.add_argument("topic", nargs="?", help="Topic to enqueue")
+    ctl_parser.add_argument("--priority", type=int, default=0)
+    ctl_parser.add_argument("--count", type=int, default=1, help="Topics to generate for 'run'")
+    ctl_parser.add_argument("--now", action="store_true", help="Generate the enqueued topic right away")
+    ctl_parser.add_argument("--socket", default=DAEMON_SOCKET, help="Control socket path")
+
+    sites_parser = subparsers.add_parser("sites", help="Generate for every site in the sites file from one process")
+    sites_parser.add_argument("names", nargs="*", help="Sites to run (default: all)")
+    sites_parser.add_argument("--max-topics", type=int, default=1, help="Topics to publish per site")
+    sites_parser.add_argument("--async", dest="use_async", action="store_true",
+                              help="Use the async pipeline within each site")
+
+    shard_parser = subparsers.add_parser("shard", help="Generate one shard of topics.md into an isolated directory")
+    shard_parser.add_argument("--shards", type=int, required=True, help="Total number of shards")
+    shard_parser.add_argument("--index", type=int, help="Shard to generate (0-based)")
+    shard_parser.add_argument("--local", action="store_true", help="Run every shard as a local process")
+    shard_parser.add_argument("--out", default=SHARD_DIR, help="Directory for shard output")
+    shard_parser.add_argument("--max-topics", type=int, default=None, help="Stop each shard after this many topics")
+
+    merge_parser = subparsers.add_parser("merge", help="Publish shard output with one index update and one commit")
+    merge_parser.add_argument("--out", default=SHARD_DIR, help="Directory holding shard output")
+    merge_parser.add_argument("--no-commit", action="store_true", help="Update the site without committing")
+
+    check_parser = subparsers.add_parser("check", help="Check every page for broken anchors, links and markup")
+    check_parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    check_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+
+    serve_parser = subparsers.add_parser("serve", help="Preview the site locally, re-rendering on edits")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--no-watch", action="store_true", help="Serve the initial build without watching")
+    serve_parser.add_argument("--no-reload", action="store_true", help="Don't inject the live-reload script")
+
+    perf_parser = subparsers.add_parser("perf", help="Audit page weight against the performance budgets")
+    perf_parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    perf_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    perf_parser.add_argument("--trend", type=int, nargs="?", const=10, default=None,
+                             help="Show the site-wide totals of the last N audits instead")
+    perf_parser.add_argument("--no-record", action="store_true", help="Don't add this audit to the history")
+
+    assets_parser = subparsers.add_parser("assets", help="Move inline script/style blocks of saved pages into shared assets")
+    assets_parser.add_argument("--apply", action="store_true", help="Rewrite the pages (default: report only)")
+
+    subparsers.add_parser("feeds", help="Rebuild the Atom/RSS feeds and sitemap from every post")
+
+    subparsers.add_parser("manifest", help="Hash every site file and list those changed since the last manifest")
+
+    related_parser = subparsers.add_parser("related", help="Recompute related-post links in every page")
+    related_parser.add_argument("--top-k", type=int, default=RELATED_POSTS_COUNT)
+
+    dedupe_parser = subparsers.add_parser("dedupe", help="Check topics or posts for near-duplicates")
+    dedupe_parser.add_argument("topic", nargs="?", help="Topic to check (omit to report duplicate posts)")
+    dedupe_parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "queue":
+        if args.action == "status":
+            queue_status()
+        elif args.action == "import":
+            import_topics_file()
+        elif args.action == "export":
+            print(f"📤 Exported {export_topics_file()} queued topic(s) to {TOPICS_FILE}")
+        elif args.action == "add":
+            if not args.topic:
+                parser.error("queue add needs a topic")
+            import_topics_file()
+            if enqueue_topic(args.topic, args.priority):
+                print(f"✅ Queued: {args.topic}")
+            else:
+                print(f"⚠️ Already known: {args.topic}")
+        elif args.action == "requeue-dead":
+            print(f"↩️ Requeued {requeue_dead_topics()} dead topic(s)")
+        return 0
+
+    if args.command == "related":
+        refresh_related_posts(args.top_k)
+        write_deploy_manifest()
+        return 0
+
+    if args.command == "cascade":
+        cascade_report()
+        return 0
+
+    if args.command == "limits":
+        rate_limit_report()
+        return 0
+
+    if args.command == "tokens":
+        for tier in MODEL_CASCADE:
+            provider, model_name = tier.split(":", 1)
+            request_text = build_blog_prompt(args.topic, provider=provider)
+            plan_token_budget(model_name, request_text, BLOG_CANDIDATES)
+        print(f"📐 Calibration: {load_token_calibration() or 'none yet'}")
+        return 0
+
+    if args.command == "daemon":
+        return 0 if asyncio.run(BlogDaemon(args.schedule or None, args.socket).run()) else 1
+
+    if args.command == "ctl":
+        command = {"cmd": args.action, "topic": args.topic, "priority": args.priority,
+                   "count": args.count, "now": args.now}
+        try:
+            reply = send_daemon_command(command, args.socket)
+        except OSError as e:
+            print(f"❌ No daemon on {args.socket}: {e}")
+            return 1
+        print(json.dumps(reply, indent=2))
+        return 0 if reply.get("ok") else 1
+
+    if args.command == "sites":
+        return 0 if run_sites(args.names, args.max_topics, args.use_async) else 1
+
+    if args.command == "shard":
+        if args.local:
+            return 0 if run_shards_locally(args.shards, args.out, args.max_topics) else 1
+        if args.index is None or not 0 <= args.index < args.shards:
+            parser.error("shard needs --index between 0 and --shards - 1, or --local")
+        return 0 if run_shard(args.index, args.shards, args.out, args.max_topics) else 1
+
+    if args.command == "merge":
+        return 0 if merge_shards(args.out, commit=not args.no_commit) else 1
+
+    if args.command == "check":
+        report = check_site(workers=args.workers)
+        if args.json:
+            print(json.dumps(report, indent=2))
         else:
-            print(f"❌ Warning: Title '{title}' not found in updated index")
-            
-    else:
-        print(f"❌ Warning: '<!-- BLOG-ENTRIES -->' placeholder not found in {INDEX_FILE}")
-        print("🔍 Looking for alternative insertion points...")
-        
-        # Try to find a good place to insert (before the "Coming Soon" card)
-        if "Coming Soon" in html:
-            # Insert before the "Coming Soon" card and add the placeholder back
-            coming_soon_section = '''                <div class="blog-card rounded-xl p-6 border border-gray-800 card-hover">
-                    <div class="flex items-center mb-3">
-                        <span class="text-gray-400 text-sm">Coming Soon</span>
-                    </div>
-                    <h3 class="text-xl font-bold text-primary mb-3">
-                        🚀 More Blog Posts Coming Soon!
-                    </h3>
-                    <p class="text-gray-300 mb-4">
-                        I'm working on more articles about cloud computing, serverless optimization, and distributed systems research. Stay tuned!
-                    </p>
-                    <div class="flex flex-wrap gap-2 mb-4">
-                        <span class="tag">Coming Soon</span>
-                        <span class="tag">Cloud Computing</span>
-                        <span class="tag">Research</span>
-                    </div>
-                    <div class="flex items-center justify-between">
-                        <span class="text-gray-400 text-sm">📖 More content soon</span>
-                        <span class="text-gray-500">Stay tuned!</span>
-                    </div>
-                </div>'''
-            
-            # Insert new post + placeholder before the Coming Soon section
-            new_content = post_html + '\n' + coming_soon_section
-            
-            html = html.replace(
-                coming_soon_section,
-                new_content,
-                1
-            )
-            
-            with open(INDEX_FILE, "w", encoding='utf-8') as f:
-                f.write(html)
-            
-            print(f"✅ Updated {INDEX_FILE} by inserting before 'Coming Soon' card")
-            print(f"🔍 BLOG-ENTRIES placeholder added back for future posts")
+            print_site_check(report)
+        return 1 if report["errors"] else 0
+
+    if args.command == "serve":
+        return 0 if serve_preview(args.host, args.port, watch=not args.no_watch,
+                                  live_reload=not args.no_reload) else 1
+
+    if args.command == "perf":
+        if args.trend is not None:
+            print_perf_trend(args.trend)
+            return 0
+        report = audit_site(workers=args.workers, record=not args.no_record)
+        if args.json:
+            print(json.dumps(report, indent=2))
         else:
-            print(f"❌ Could not find suitable insertion point in {INDEX_FILE}")
-            print("📋 New blog post HTML (copy manually if needed):")
-            print(post_html)
+            print_perf_audit(report, verbose=True)
+        return 1 if report["errors"] else 0
 
-# ===== Main =====
-if __name__ == "__main__":
-    print("🚀 Starting blog generation process...")
-    
-    next_topic_info = get_next_topic()
-    if not next_topic_info:
-        print("❌ Exiting: No topics found or topics.md is missing.")
-        exit(0)
+    if args.command == "assets":
+        externalize_site_assets(apply=args.apply)
+        return 0
 
-    topic, remaining_topics = next_topic_info
-    print(f"📝 Generating blog for topic: '{topic}'")
+    if args.command == "feeds":
+        rebuild_feeds()
+        return 0
 
-    try:
-        # 1. Generate draft HTML
-        print("🔄 Step 1: Generating structured content...")
-        result = generate_blog_html(topic)
-        
-        if not result or result[0] is None:
-            print("❌ Error: No blog content generated")
-            exit(1)
-        
-        blog_html, actual_title = result
-        print(f"✅ Content generated successfully. Length: {len(blog_html)} characters")
-        print(f"📝 Blog title: {actual_title}")
-        print("📄 Preview of generated content:")
-        print("-" * 50)
-        print(blog_html[:200] + "..." if len(blog_html) > 200 else blog_html)
-        print("-" * 50)
-
-        # 2. Send draft to Slack
-        print("\n🔄 Step 2: Sending draft to Slack...")
-        if blog_html:
-            send_to_slack(blog_html)
-        else:
-            print("⚠️ Skipping Slack notification as no blog content was generated.")
+    if args.command == "tags":
+        retag_posts(apply=args.apply)
+        return 0
 
-        # 3. Save draft locally
-        print("\n🔄 Step 3: Saving draft locally...")
-        if blog_html:
-            draft_file = save_blog_file(actual_title, blog_html)
-            print(f"✅ Draft saved to: {draft_file}")
-            
-            # 4. Update topics.md
-            print("\n🔄 Step 4: Updating topics file...")
-            update_topics_file(remaining_topics)
-            print("✅ Topics file updated")
-            
-            # 5. Update blog/index.html
-            print("\n🔄 Step 5: Updating blog index...")
-            update_index(actual_title, draft_file)
-            print("✅ Blog index updated")
-            
-            # 6. Commit both blog post and updated index to Git
-            print("\n🔄 Step 6: Committing blog post and updated index to Git...")
-            if commit_blog_and_index(draft_file, INDEX_FILE, actual_title):
-                print("✅ Both files committed and pushed successfully")
-            else:
-                print("⚠️ Warning: Git commit failed, files only saved locally")
-            
-            # 7. Verify placeholder is preserved
-            print("\n🔄 Step 7: Verifying placeholder preservation...")
-            if ensure_placeholder_exists():
-                print("✅ BLOG-ENTRIES placeholder verified and preserved")
+    if args.command == "manifest":
+        scan_outputs()
+        write_deploy_manifest()
+        return 0
+
+    if args.command == "dedupe":
+        if args.topic:
+            duplicate = find_duplicate_topic(args.topic, args.threshold)
+            if duplicate:
+                print(f"⚠️ Similar to '{duplicate['title']}' ({duplicate['filename']}, {duplicate['similarity']:.2f})")
             else:
-                print("⚠️ Warning: Could not verify placeholder preservation")
-            
-            print(f"\n🎉 Blog generation complete! New post: {draft_file}")
+                print("✅ No near-duplicate posts found")
+        else:
+            duplicate_report(args.threshold)
+        return 0
+
+    print("🚀 Starting blog generation process...")
+    try:
+        if getattr(args, "use_async", False):
+            ok = asyncio.run(run_async_pipeline(args.max_topics, args.generators, args.max_pending))
         else:
-            print("❌ Skipping local save and index update as no blog content was generated.")
+            ok = run_next_topic()
+        connection_report()
+        if not ok:
+            return 1
 
     except RuntimeError as e:
         print(f"❌ Critical error during blog generation: {e}")
@@ -1143,4 +5708,8 @@ if __name__ == "__main__":
         print(f"❌ An unexpected error occurred: {e}")
         import traceback
         traceback.print_exc()
-        exit(1)
\ No newline at end of file
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
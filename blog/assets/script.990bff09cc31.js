@@ -0,0 +1,78 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Initialize EmailJS
+    emailjs.init("YOUR_PUBLIC_KEY"); // You'll replace this with your actual key
+
+    // Smooth scrolling for navigation links
+    document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+        anchor.addEventListener('click', function (e) {
+            e.preventDefault();
+            const target = document.querySelector(this.getAttribute('href'));
+            if (target) {
+                target.scrollIntoView({
+                    behavior: 'smooth',
+                    block: 'start'
+                });
+            }
+        });
+    });
+
+    // Newsletter subscription form
+    const newsletterForm = document.getElementById('newsletter-form');
+    const emailInput = document.getElementById('newsletter-email');
+    const subscribeBtn = document.getElementById('subscribe-btn');
+    const btnText = document.getElementById('btn-text');
+    const btnLoading = document.getElementById('btn-loading');
+    const subscriptionMessage = document.getElementById('subscription-message');
+
+    newsletterForm.addEventListener('submit', function(e) {
+        e.preventDefault();
+
+        const email = emailInput.value.trim();
+        if (!email) return;
+
+        // Show loading state
+        subscribeBtn.disabled = true;
+        btnText.classList.add('hidden');
+        btnLoading.classList.remove('hidden');
+
+        // EmailJS template parameters
+        const templateParams = {
+            to_email: 'agasa@unimelb.edu.au', // Your email address
+            from_email: email,
+            message: `New newsletter subscription from: ${email}`,
+            subject: 'New Blog Newsletter Subscription'
+        };
+
+        // Send email using EmailJS
+        emailjs.send('YOUR_SERVICE_ID', 'YOUR_TEMPLATE_ID', templateParams)
+            .then(function(response) {
+                console.log('SUCCESS!', response.status, response.text);
+                showMessage('✅ Successfully subscribed! You\'ll receive updates about new blog posts.', 'success');
+                emailInput.value = '';
+            }, function(error) {
+                console.log('FAILED...', error);
+                showMessage('❌ Something went wrong. Please try again or contact me directly.', 'error');
+            })
+            .finally(function() {
+                // Reset button state
+                subscribeBtn.disabled = false;
+                btnText.classList.remove('hidden');
+                btnLoading.classList.add('hidden');
+            });
+    });
+
+    function showMessage(message, type) {
+        subscriptionMessage.textContent = message;
+        subscriptionMessage.className = `mt-4 p-3 rounded-lg ${
+            type === 'success' 
+                ? 'bg-green-900/20 border border-green-700 text-green-300' 
+                : 'bg-red-900/20 border border-red-700 text-red-300'
+        }`;
+        subscriptionMessage.classList.remove('hidden');
+
+        // Hide message after 5 seconds
+        setTimeout(() => {
+            subscriptionMessage.classList.add('hidden');
+        }, 5000);
+    }
+});
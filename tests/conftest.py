@@ -0,0 +1,18 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import blog as blog_module
+
+
+@pytest.fixture
+def blog(monkeypatch):
+    """The blog module, with any globals a test rebinds restored afterwards"""
+    saved = dict(vars(blog_module))
+    monkeypatch.chdir(Path.cwd())
+    yield blog_module
+    vars(blog_module).clear()
+    vars(blog_module).update(saved)
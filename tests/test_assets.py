@@ -0,0 +1,46 @@
+from pathlib import Path
+
+
+def test_small_and_render_blocking_blocks_stay_inline(blog, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = "tailwind.config = {darkMode: 'class'};"
+    big_script = "console.log('x');\n" * 100
+    html = (f"<html><head><script>{config}</script><style>.a {{ color: red; }}</style></head>"
+            f"<body><p>x</p><script>{big_script}</script></body></html>")
+
+    new_html, assets = blog.externalize_inline_assets(html)
+    assert f"<script>{config}</script>" in new_html
+    assert "<style>" in new_html
+    names = list(assets)
+    assert names == [blog.asset_name("script", big_script.strip() + "\n")]
+    assert f'<script src="assets/{names[0]}" defer></script>' in new_html
+    # Rendering alone writes nothing; publishing does
+    assert not (tmp_path / "blog" / "assets").exists()
+    assert blog.write_assets(assets) == names
+    assert (tmp_path / "blog" / "assets" / names[0]).exists()
+
+    metrics = blog.audit_page(_write(tmp_path / "page.html", new_html))
+    assert metrics["render_blocking"] == 0
+
+
+def test_shared_stylesheet_moves_out(blog, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    css = ".a { color: red; }\n" * 80
+    new_html, assets = blog.externalize_inline_assets(f"<html><head><style>{css}</style></head><body></body></html>")
+    assert list(assets) == [blog.asset_name("style", css.strip() + "\n")]
+    assert f'<link rel="stylesheet" href="assets/{list(assets)[0]}">' in new_html
+
+
+def test_generated_posts_share_the_template_stylesheet(blog):
+    template_css = [name for name in blog.template_assets() if name.endswith(".css")]
+    assert len(template_css) == 1
+    for path in sorted(Path(blog.BLOG_DIR).glob("20*.html")):
+        html = path.read_text(encoding="utf-8")
+        assert f'href="assets/{template_css[0]}"' in html
+        assert "<style>" not in html
+        assert blog.audit_page(path)["render_blocking"] <= blog.PERF_BUDGETS["render_blocking"]
+
+
+def _write(path, html):
+    path.write_text(html, encoding="utf-8")
+    return path
@@ -0,0 +1,47 @@
+import json
+import threading
+
+
+def attempt(tier, accepted, cost):
+    usage = {"input_tokens": 1000, "output_tokens": 4000}
+    return {"tier": tier, "content": "{}", "usage": usage, "cost": cost, "failures": [] if accepted else ["thin"]}
+
+
+def test_default_cascade_escalates_to_a_pricier_tier(blog):
+    tiers = blog.default_cascade()
+    assert blog.tier_price(tiers[-1]) > max(blog.tier_price(tier) for tier in tiers[:-1])
+
+
+def test_concurrent_requests_are_all_counted(blog, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(blog, "available_cascade_tiers", lambda async_mode=False: ["openai:gpt-4o-mini", "openai:gpt-4o"])
+
+    threads = [threading.Thread(target=blog.record_cascade_request,
+                                args=([attempt("openai:gpt-4o-mini", True, 0.001)],))
+               for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = blog.cascade_stats()
+    assert stats["requests"] == 16
+    tier = stats["tiers"]["openai:gpt-4o-mini"]
+    assert (tier["attempts"], tier["accepted"]) == (16, 16)
+    assert abs(tier["cost_usd"] - 0.016) < 1e-9
+    # The same tokens on gpt-4o: 1000 * 2.50 + 4000 * 10.00 per million, per request
+    assert abs(stats["baseline_cost_usd"] - 16 * 0.0425) < 1e-9
+
+
+def test_legacy_stats_are_imported_once(blog, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".blog_state").mkdir()
+    legacy = {"tiers": {"gemini:x": {"attempts": 3, "accepted": 2, "cost_usd": 0.5}},
+              "requests": 2, "cost_usd": 0.5, "baseline_cost_usd": 1.0}
+    (tmp_path / ".blog_state" / "cascade-stats.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    assert blog.cascade_stats() == legacy
+    blog.record_cascade_request([attempt("gemini:x", False, 0.25)])
+    stats = blog.cascade_stats()
+    assert stats["requests"] == 3
+    assert stats["tiers"]["gemini:x"] == {"attempts": 4, "accepted": 2, "cost_usd": 0.75}
@@ -0,0 +1,51 @@
+import asyncio
+import gc
+
+
+class Stream:
+    pass
+
+
+class Response:
+    def __init__(self, stream):
+        self.extensions = {"network_stream": stream}
+
+
+class FakeAsyncClient:
+    closed = 0
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def close(self):
+        FakeAsyncClient.closed += 1
+
+
+def test_reused_streams_count_once(blog, monkeypatch):
+    monkeypatch.setitem(blog.connection_stats, "requests", 0)
+    monkeypatch.setitem(blog.connection_stats, "connections", 0)
+    stream = Stream()
+    for _ in range(3):
+        blog._track_connection(Response(stream))
+    assert blog.connection_stats == {"requests": 3, "connections": 1}
+
+    # A finished connection drops out of the set instead of pinning its id
+    del stream
+    gc.collect()
+    assert len(blog._seen_streams) == 0
+
+
+def test_async_clients_are_closed_with_their_loop(blog, monkeypatch):
+    monkeypatch.setattr(blog, "AsyncOpenAI", FakeAsyncClient)
+    monkeypatch.setattr(blog, "build_http_client", lambda async_mode=False: None)
+    FakeAsyncClient.closed = 0
+
+    async def use_client():
+        client = blog.openai_async_client()
+        assert blog.openai_async_client() is client
+        await blog.close_async_clients()
+
+    asyncio.run(use_client())
+    asyncio.run(use_client())
+    assert FakeAsyncClient.closed == 2
+    assert len(blog._async_clients) == 0
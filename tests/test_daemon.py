@@ -0,0 +1,97 @@
+import asyncio
+import datetime
+import socket
+
+import pytest
+
+
+def at(*args):
+    return datetime.datetime(*args)
+
+
+def test_parse_cron_fields(blog):
+    minutes, hours, days, months, weekdays = blog.parse_cron("*/15 9-11 1,15 * 7")
+    assert minutes == {0, 15, 30, 45}
+    assert hours == {9, 10, 11}
+    assert days == {1, 15}
+    assert months == set(range(1, 13))
+    assert weekdays == {0}  # 7 is Sunday, like 0
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *",
+                                        "* * * * 8", "0 9 * * 1-14"])
+def test_parse_cron_rejects_bad_expressions(blog, expression):
+    with pytest.raises(ValueError):
+        blog.parse_cron(expression)
+
+
+@pytest.mark.parametrize("expression, after, expected", [
+    ("0 9 * * 1", at(2026, 10, 19, 9, 0), at(2026, 10, 26, 9, 0)),     # Monday, just fired
+    ("0 9 * * 1", at(2026, 10, 19, 8, 59, 59), at(2026, 10, 19, 9, 0)),
+    ("*/15 * * * *", at(2026, 10, 19, 9, 31), at(2026, 10, 19, 9, 45)),
+    ("30 6 1 * *", at(2026, 10, 19, 9, 31), at(2026, 11, 1, 6, 30)),
+    ("0 0 31 12 *", at(2026, 12, 31, 0, 0), at(2027, 12, 31, 0, 0)),
+    ("0 12 13 * 5", at(2026, 10, 19), at(2026, 10, 23, 12, 0)),          # day OR weekday
+])
+def test_next_cron_time(blog, expression, after, expected):
+    assert blog.next_cron_time(blog.parse_cron(expression), after) == expected
+
+
+def test_scheduler_fires_once_when_the_clock_steps_back(blog, monkeypatch):
+    # Fires at 09:00, then the clock falls back an hour and passes 09:00 again
+    readings = [at(2026, 10, 26, 8, 59), at(2026, 10, 26, 9, 0, 0, 5)] \
+        + [at(2026, 10, 26, 8, 0)] * 5 + [at(2026, 10, 26, 9, 0, 30)]
+
+    class FakeDatetime(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return readings.pop(0) if len(readings) > 1 else readings[0]
+
+    monkeypatch.setattr(blog.datetime, "datetime", FakeDatetime)
+    monkeypatch.setattr(blog, "DAEMON_TICK_SECONDS", 0)
+    daemon = blog.BlogDaemon("0 9 * * 1", "unused.sock")
+
+    async def run():
+        daemon.wake, daemon.stopping = asyncio.Event(), asyncio.Event()
+        task = asyncio.create_task(daemon.scheduler())
+        await asyncio.sleep(0.8)
+        daemon.stop()
+        await task
+
+    asyncio.run(run())
+    assert daemon.pending == 1
+    assert daemon.next_run == at(2026, 11, 2, 9, 0)
+
+
+def test_second_daemon_refuses_a_live_socket(blog, tmp_path):
+    path = str(tmp_path / "daemon.sock")
+    assert not blog.daemon_listening(path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(path)
+        server.listen()
+        assert blog.daemon_listening(path)
+        assert asyncio.run(blog.BlogDaemon(None, path).run()) is False
+    # A stale socket file nobody listens on is not a running daemon
+    assert not blog.daemon_listening(path)
+
+
+def test_run_count_must_be_positive(blog, monkeypatch):
+    runs = []
+    monkeypatch.setattr(blog, "run_next_topic", lambda: runs.append(1) or True)
+    monkeypatch.setattr(blog, "connection_report", lambda: None)
+    daemon = blog.BlogDaemon(None, "unused.sock")
+
+    async def run():
+        daemon.wake, daemon.stopping = asyncio.Event(), asyncio.Event()
+        worker = asyncio.create_task(daemon.worker())
+        replies = [await daemon.handle_command({"cmd": "run", "count": count}) for count in (-1, 0, 2)]
+        await asyncio.sleep(0.2)
+        daemon.stop()
+        await worker
+        return replies
+
+    refused, zero, accepted = asyncio.run(run())
+    assert not refused["ok"] and not zero["ok"]
+    assert accepted["ok"]
+    assert len(runs) == 2
+    assert daemon.pending == 0
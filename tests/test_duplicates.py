@@ -0,0 +1,102 @@
+import os
+import shutil
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+POST = "2025-08-24-serverless-function-scaling-explained.html"
+
+
+def page(title, body):
+    return f'<h1 class="text-4xl">{title}</h1><div class="blog-content"><p>{body}</p><!-- Author Bio -->'
+
+
+def test_index_follows_deleted_and_edited_posts(blog, tmp_path, monkeypatch):
+    (tmp_path / "blog").mkdir()
+    monkeypatch.chdir(tmp_path)
+    kept, gone = tmp_path / "blog" / "kept.html", tmp_path / "blog" / "gone.html"
+    kept.write_text(page("Cold starts in serverless functions", "warm pools"), encoding="utf-8")
+    gone.write_text(page("Kubernetes autoscaling", "pods"), encoding="utf-8")
+    assert sorted(blog.load_duplicate_index()["posts"]) == ["gone.html", "kept.html"]
+
+    gone.unlink()
+    kept.write_text(page("Database sharding strategies", "shards"), encoding="utf-8")
+    stat = kept.stat()
+    os.utime(kept, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    index = blog.load_duplicate_index()
+    assert list(index["posts"]) == ["kept.html"]
+    assert index["posts"]["kept.html"]["title"] == "Database sharding strategies"
+    assert blog.find_duplicate_topic("Kubernetes autoscaling") is None
+
+
+def brute_force_candidates(blog, index, signature, key):
+    rows = blog.MINHASH_PERMUTATIONS // blog.MINHASH_BANDS
+    bands = {(b, tuple(signature[b * rows:(b + 1) * rows])) for b in range(blog.MINHASH_BANDS)}
+    return sorted(name for name, entry in index["posts"].items()
+                  if any((b, tuple(entry[key][b * rows:(b + 1) * rows])) in bands for b in range(blog.MINHASH_BANDS)))
+
+
+def test_buckets_follow_the_posts(blog, tmp_path, monkeypatch):
+    shutil.copytree(REPO / "blog", tmp_path / "blog")
+    monkeypatch.chdir(tmp_path)
+    blog.load_duplicate_index()
+    (tmp_path / "blog" / POST).unlink()
+    index = blog.load_duplicate_index()
+
+    assert POST not in {name for key in blog.LSH_SIGNATURES
+                        for names in index["buckets"][key].values() for name in names}
+    for topic in ("Serverless function scaling explained", "Mastering AWS Lambda cold starts", "Kubernetes"):
+        signature = blog.minhash_signature(blog.title_shingles(topic))
+        assert blog._lsh_candidates(index, signature, "title_signature") \
+            == brute_force_candidates(blog, index, signature, "title_signature")
+
+    # An index saved before buckets existed gets them on load
+    legacy = {"posts": index["posts"]}
+    blog.write_json_atomic(blog.DEDUPE_INDEX_FILE, legacy)
+    assert blog.load_duplicate_index()["buckets"] == index["buckets"]
+
+
+def test_index_is_read_once_until_its_file_changes(blog, tmp_path, monkeypatch):
+    (tmp_path / "blog").mkdir()
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "blog" / "kept.html").write_text(page("Cold starts", "warm pools"), encoding="utf-8")
+    first = blog.load_duplicate_index()
+    assert blog.load_duplicate_index() is first
+
+    # Another process rewrites the file: the cached copy is dropped
+    blog.write_json_atomic(blog.DEDUPE_INDEX_FILE, {"posts": {}})
+    assert blog.load_duplicate_index() is not first
+    assert list(blog.load_duplicate_index()["posts"]) == ["kept.html"]
+
+
+def test_follow_up_instructions_reach_every_provider(blog):
+    journal = {"merge_into": {"filename": POST, "title": "Serverless Function Scaling Explained"}}
+    for provider in ("openai", "gemini"):
+        assert "Serverless Function Scaling Explained" in blog.build_blog_prompt("Scaling", journal, provider)
+
+
+def test_merge_appends_sections_to_the_existing_post(blog, tmp_path, monkeypatch):
+    shutil.copytree(REPO / "blog", tmp_path / "blog")
+    monkeypatch.chdir(tmp_path)
+    original = (tmp_path / "blog" / POST).read_text(encoding="utf-8")
+    journal = {"merge_into": {"filename": POST, "title": "Serverless Function Scaling Explained"}}
+    content = '<h2 id="introduction">Introduction</h2><p>Predictive scaling.</p><a href="#introduction">up</a>'
+
+    html, title = blog.render_post("Predictive scaling", content, "Predictive Scaling", journal)
+    assert title == "Serverless Function Scaling Explained"
+    assert journal["merged_into"] == POST
+    before, _, after = html.partition('<h2 id="predictive-scaling">Predictive Scaling</h2>')
+    assert blog.element_inner_html(original, r'<div class="blog-content">').strip() in before
+    assert '<h3 id="predictive-scaling-introduction">Introduction</h3>' in after
+    assert 'href="#predictive-scaling-introduction"' in after
+    assert '<a href="#predictive-scaling">Predictive Scaling</a>' in html
+
+
+def test_hand_written_posts_are_not_merged_into(blog, tmp_path, monkeypatch):
+    shutil.copytree(REPO / "blog", tmp_path / "blog")
+    monkeypatch.chdir(tmp_path)
+    journal = {"merge_into": {"filename": "cold-starts-serverless.html", "title": "Cold Starts"}}
+
+    html, title = blog.render_post("Warm pools", "<h2>Warm pools</h2><p>x</p>", "Warm Pools", journal)
+    assert title == "Warm Pools"
+    assert "merged_into" not in journal
@@ -0,0 +1,50 @@
+import shutil
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def test_feed_title_is_escaped_once(blog, tmp_path, monkeypatch):
+    shutil.copytree(REPO / "blog", tmp_path / "blog")
+    monkeypatch.chdir(tmp_path)
+    html = ('<h1>Rust &amp; Go</h1><meta name="description" content="Fast &amp; safe">'
+            '<div class="blog-content"><p>x</p><!-- Author Bio -->')
+    entry = blog.post_feed_entry("blog/2026-01-02-rust-go.html", html)
+    assert entry["title"] == "Rust & Go"
+    assert "<title>Rust &amp; Go</title>" in blog.render_atom_feed([entry])
+    assert "<title>Rust &amp; Go</title>" in blog.render_rss_feed([entry])
+
+
+def test_sitemap_rolls_over_to_a_new_chunk(blog, tmp_path, monkeypatch):
+    (tmp_path / "blog").mkdir()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(blog, "SITEMAP_CHUNK_SIZE", 2)
+    state = {"entries": [], "chunks": []}
+    for n in range(5):
+        assert blog.add_sitemap_url(state, f"https://example.com/blog/post-{n}.html", "2026-01-0%d" % (n + 1))
+    # A URL already in the newest chunk is not added twice
+    assert not blog.add_sitemap_url(state, "https://example.com/blog/post-4.html", "2026-01-05")
+
+    assert [(chunk["file"], chunk["count"]) for chunk in state["chunks"]] \
+        == [("sitemap-1.xml", 2), ("sitemap-2.xml", 2), ("sitemap-3.xml", 1)]
+    assert (tmp_path / "blog" / "sitemap-2.xml").read_text(encoding="utf-8").count("<url>") == 2
+    index = (tmp_path / "blog" / "sitemap.xml").read_text(encoding="utf-8")
+    assert index.count("<sitemap>") == 3
+    assert "<lastmod>2026-01-04</lastmod>" in index
+
+
+def test_feeds_keep_only_the_newest_entries(blog, tmp_path, monkeypatch):
+    shutil.copytree(REPO / "blog", tmp_path / "blog")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(blog, "FEED_ENTRIES", 3)
+    blog.rebuild_feeds()
+
+    for day in range(1, 6):
+        name = f"blog/2030-01-0{day}-post-{day}.html"
+        blog.add_post_to_feeds(name, f"<h1>Post {day}</h1>", f"Post {day}")
+
+    state = blog.json.loads(Path(blog.FEED_STATE_FILE).read_text(encoding="utf-8"))
+    assert [entry["title"] for entry in state["entries"]] == ["Post 5", "Post 4", "Post 3"]
+    atom = (tmp_path / "blog" / "feed.xml").read_text(encoding="utf-8")
+    assert atom.count("<entry>") == 3 and "Post 2" not in atom
+    assert (tmp_path / "blog" / "rss.xml").read_text(encoding="utf-8").count("<item>") == 3
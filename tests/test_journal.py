@@ -0,0 +1,50 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parent.parent
+RESPONSE = json.dumps({
+    "title": "Edge Caching for Static Sites",
+    "description": "Serving pages from the edge.",
+    "sections": [{"heading": "Introduction", "content": "Caches near readers cut latency.", "code_examples": []}],
+    "tags": ["Performance"],
+    "read_time": 5
+})
+
+
+def test_rerun_resumes_after_render_without_calling_the_provider_again(blog, tmp_path, monkeypatch):
+    shutil.copytree(REPO / "blog", tmp_path / "blog")
+    (tmp_path / "blog" / "topics.md").write_text("Edge caching for static sites\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    requests = []
+    slack_messages = []
+
+    def provider(topic, journal=None):
+        requests.append(topic)
+        return RESPONSE
+
+    def slack(html):
+        slack_messages.append(html)
+        if len(slack_messages) == 1:
+            raise ConnectionError("Slack is down")
+
+    monkeypatch.setattr(blog, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(blog, "request_blog_content", provider)
+    monkeypatch.setattr(blog, "send_to_slack", slack)
+    monkeypatch.setattr(blog, "warm_provider_clients", lambda: None)
+    monkeypatch.setattr(blog, "commit_blog_and_index", lambda *args: True)
+
+    with pytest.raises(ConnectionError):
+        blog.run_next_topic()
+    journal = blog.find_incomplete_journal("Edge caching for static sites")
+    assert blog.stage_done(journal, "generate") and blog.stage_done(journal, "render")
+    assert not blog.stage_done(journal, "slack")
+
+    assert blog.run_next_topic()
+    assert requests == ["Edge caching for static sites"]
+    assert slack_messages[0] == slack_messages[1]  # the same draft, not a regenerated one
+    assert blog.find_incomplete_journal("Edge caching for static sites") is None
+    assert (tmp_path / "blog" / blog.post_filename("Edge Caching for Static Sites")).exists()
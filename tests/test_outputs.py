@@ -0,0 +1,40 @@
+import json
+import threading
+
+
+def test_deploy_manifest_keeps_changes_until_committed(blog, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert blog.write_output("blog/a.html", "one")
+    assert not blog.write_output("blog/a.html", "one")
+    assert [entry["path"] for entry in blog.write_deploy_manifest()["changed"]] == ["blog/a.html"]
+
+    # A later attempt (another process, or a resumed run) adds to it
+    assert blog.write_output("blog/b.html", "two")
+    assert [entry["path"] for entry in blog.write_deploy_manifest()["changed"]] == ["blog/a.html", "blog/b.html"]
+
+    blog.mark_outputs_deployed(["blog/a.html"])
+    assert [entry["path"] for entry in blog.pending_outputs()] == ["blog/b.html"]
+    blog.mark_outputs_deployed(["blog"])
+    assert blog.pending_outputs() == []
+
+
+def test_concurrent_writers_keep_every_entry(blog, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    threads = [threading.Thread(target=blog.write_output, args=(f"blog/{i}.html", str(i))) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(blog.pending_outputs()) == 20
+
+
+def test_legacy_json_manifest_is_imported(blog, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "blog").mkdir()
+    (tmp_path / "blog" / "a.html").write_text("one", encoding="utf-8")
+    fingerprint = blog.content_fingerprint(b"one")
+    (tmp_path / ".blog_state").mkdir()
+    (tmp_path / ".blog_state" / "output-manifest.json").write_text(
+        json.dumps({"files": {"blog/a.html": fingerprint}}), encoding="utf-8")
+    assert blog.output_entry("blog/a.html")["sha256"] == fingerprint["sha256"]
+    assert blog.pending_outputs() == []
@@ -0,0 +1,29 @@
+def page(script=""):
+    return f"<html><head><title>t</title></head><body><p>x</p><script>{script}</script></body></html>"
+
+
+def test_only_new_violations_on_written_pages_fail(blog, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "blog").mkdir()
+    monkeypatch.setattr(blog, "PERF_ACTION", "fail")
+    monkeypatch.setattr(blog, "PERF_BUDGETS", {"inline_script_bytes": 100})
+    index = tmp_path / "blog" / "index.html"
+    index.write_text(page("x" * 500), encoding="utf-8")
+
+    baseline = blog.audit_site()
+    assert baseline["errors"] == 1  # a full audit reports the existing problem
+
+    post = tmp_path / "blog" / "post.html"
+    post.write_text(page("ok"), encoding="utf-8")
+    report = blog.audit_site(pages=["blog/post.html", "blog/index.html"])
+    assert report["errors"] == 0
+    assert report["pages"] == 2
+    assert report["checked"] == ["blog/index.html", "blog/post.html"]
+
+    post.write_text(page("y" * 200), encoding="utf-8")
+    report = blog.audit_site(pages=["blog/post.html", "blog/index.html"])
+    assert [(v["page"], v["metric"]) for v in report["failing"]] == [("blog/post.html", "inline_script_bytes")]
+
+    index.write_text(page("x" * 900), encoding="utf-8")
+    report = blog.audit_site(pages=["blog/index.html"])
+    assert report["errors"] == 1  # got worse in this run
@@ -0,0 +1,46 @@
+import threading
+
+
+def test_claim_error_releases_the_lease(blog, tmp_path, monkeypatch):
+    (tmp_path / "blog").mkdir()
+    (tmp_path / "blog" / "topics.md").write_text("Some topic\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    blog.import_topics_file()
+
+    def broken(topic):
+        raise OSError("journal directory is read-only")
+    monkeypatch.setattr(blog, "find_incomplete_journal", broken)
+
+    try:
+        blog.claim_next_topic("worker-1")
+    except OSError:
+        pass
+    else:
+        raise AssertionError("claim_next_topic swallowed the error")
+
+    with blog.topic_queue() as conn:
+        row = conn.execute("SELECT status, lease_owner, last_error FROM topics").fetchone()
+    assert row["status"] == "queued"
+    assert row["lease_owner"] is None
+    assert "read-only" in row["last_error"]
+
+
+def test_concurrent_index_updates_keep_every_post(blog, tmp_path, monkeypatch):
+    (tmp_path / "blog").mkdir()
+    monkeypatch.chdir(tmp_path)
+
+    def post(n):
+        return (f'<h1 class="text-4xl">Post number {n}</h1><div class="blog-content">'
+                f'<p>body text about topic{n} and serverless scaling</p><!-- Author Bio -->')
+
+    for n in range(8):
+        (tmp_path / "blog" / f"post-{n}.html").write_text(post(n), encoding="utf-8")
+    threads = [threading.Thread(target=blog.index_post_for_duplicates, args=(f"blog/post-{n}.html", post(n)))
+               for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(blog.load_duplicate_index()["posts"]) == sorted(f"post-{n}.html" for n in range(8))
+    assert not list((tmp_path / ".blog_state").glob("*.tmp"))
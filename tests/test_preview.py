@@ -0,0 +1,34 @@
+import shutil
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def test_resolve_serves_only_the_site_tree(blog, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("index.html", "blog.py", ".git/config", ".blog_state/topics.db", "blog/my post.html"):
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("x", encoding="utf-8")
+    preview = Path(blog.PREVIEW_DIR) / "blog" / "index.html"
+    preview.parent.mkdir(parents=True)
+    preview.write_text("x", encoding="utf-8")
+    site = blog.PreviewSite(live_reload=False)
+
+    assert site.resolve("/") == Path("index.html")
+    assert site.resolve("/blog/my%20post.html?v=1") == Path("blog/my post.html")
+    assert site.resolve("/blog/") == preview
+    for url in ("/.git/config", "/.blog_state/topics.db", "/blog.py", "/%2e%2e/etc/passwd",
+                "/blog/..%2f.git/config", "/%2e%62log_state/topics.db"):
+        assert site.resolve(url) is None, url
+
+
+def test_sync_sources_skips_hand_written_pages(blog, tmp_path, monkeypatch):
+    shutil.copytree(REPO / "blog", tmp_path / "blog")
+    monkeypatch.chdir(tmp_path)
+
+    site = blog.PreviewSite(live_reload=False)
+    site.sync_sources()
+    assert not blog.post_source_path("cold-starts-serverless.html").exists()
+    assert "cold-starts-serverless" not in site.source_names()
+    generated = [path.stem for path in Path("blog").glob("2025-*.html")]
+    assert generated and set(generated) <= set(site.source_names())
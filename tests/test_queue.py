@@ -0,0 +1,41 @@
+def read_topics(path):
+    return path.read_text(encoding="utf-8").split()
+
+
+def test_topics_deleted_from_the_file_stay_deleted(blog, tmp_path, monkeypatch):
+    (tmp_path / "blog").mkdir()
+    topics = tmp_path / "blog" / "topics.md"
+    topics.write_text("alpha\nbeta\ngamma\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    assert blog.import_topics_file() == 3
+
+    topics.write_text("alpha\ngamma\n", encoding="utf-8")
+    blog.import_topics_file()
+    blog.export_topics_file()
+    assert read_topics(topics) == ["alpha", "gamma"]
+    with blog.topic_queue() as conn:
+        assert conn.execute("SELECT status FROM topics WHERE topic = 'beta'").fetchone()["status"] == "removed"
+
+    leased = [blog.lease_topic("w")["topic"] for _ in range(2)]
+    assert leased == ["alpha", "gamma"] and blog.lease_topic("w") is None
+
+
+def test_removed_topics_can_be_queued_again(blog, tmp_path, monkeypatch):
+    (tmp_path / "blog").mkdir()
+    topics = tmp_path / "blog" / "topics.md"
+    topics.write_text("alpha\nbeta\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    blog.import_topics_file()
+    topics.write_text("alpha\n", encoding="utf-8")
+    blog.import_topics_file()
+
+    topics.write_text("alpha\nbeta\n", encoding="utf-8")
+    assert blog.import_topics_file() == 1
+    topics.write_text("alpha\n", encoding="utf-8")
+    blog.import_topics_file()
+    assert blog.enqueue_topic("beta")
+    assert read_topics(topics) == ["alpha", "beta"]
+    # The file enqueue_topic wrote is in sync, so importing it removes nothing
+    blog.import_topics_file()
+    with blog.topic_queue() as conn:
+        assert conn.execute("SELECT status FROM topics WHERE topic = 'beta'").fetchone()["status"] == "queued"
@@ -0,0 +1,103 @@
+import datetime
+import email.utils
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parent.parent
+LIMITS = {"openai": {}, "openai:test-model": {"rpm": 50, "tpm": 1000}}
+TIER = "openai:test-model"
+PLAN = {"input_tokens": 100, "output_tokens": 50, "parts": 1, "candidates": 1}
+
+
+class Response:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, message="rate limited", headers=None):
+        super().__init__(message)
+        self.response = Response(headers or {})
+
+
+def daily_usage(blog):
+    with blog.rate_limit_store() as conn:
+        row = conn.execute("SELECT requests, tokens FROM daily_usage WHERE scope = ?", (TIER,)).fetchone()
+    return (row["requests"], row["tokens"]) if row else (0, 0)
+
+
+def test_threads_and_processes_never_overdraw_the_budget(blog, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(blog, "RATE_LIMITS", LIMITS)
+    script = (f"import sys; sys.path.insert(0, {str(REPO)!r}); import blog; "
+              f"print(sum(blog.try_acquire({TIER!r}, 150) == 0 for _ in range(5)))")
+    env = dict(os.environ, BLOG_RATE_LIMITS=json.dumps(LIMITS))
+
+    started = time.time()
+    processes = [subprocess.Popen([sys.executable, "-c", script], cwd=tmp_path, env=env,
+                                  stdout=subprocess.PIPE, text=True) for _ in range(3)]
+    granted = []
+    threads = [threading.Thread(target=lambda: granted.append(blog.try_acquire(TIER, 150) == 0))
+               for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total = sum(granted) + sum(int(process.communicate()[0].strip().splitlines()[-1]) for process in processes)
+
+    # A full bucket plus whatever refilled while the test ran
+    refilled = (time.time() - started) * LIMITS[TIER]["tpm"] / 60
+    assert 6 <= total <= math.floor((LIMITS[TIER]["tpm"] + refilled) / 150)
+    assert daily_usage(blog) == (total, total * 150)
+
+
+def test_failed_calls_hand_their_reservation_back(blog, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(blog, "RATE_LIMITS", LIMITS)
+    monkeypatch.setattr(blog, "block_tier", lambda tier, seconds: None)
+
+    def broken():
+        raise ConnectionError("reset by peer")
+    with pytest.raises(ConnectionError):
+        blog.rate_limited_call(TIER, PLAN, broken)
+    assert daily_usage(blog) == (1, 0)
+
+    # A 429 is retried, and the refused request doesn't count against the quota
+    replies = [RateLimitError(), ("text", {"input_tokens": 100, "output_tokens": 20})]
+
+    def flaky():
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+    assert blog.rate_limited_call(TIER, PLAN, flaky)[0] == "text"
+    assert daily_usage(blog) == (2, 120)
+
+
+def test_retry_after_from_milliseconds_header(blog):
+    assert blog.retry_after_seconds(RateLimitError(headers={"retry-after-ms": "1500"})) == 1.5
+
+
+def test_retry_after_from_http_date(blog):
+    retry_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=30)
+    error = RateLimitError(headers={"retry-after": email.utils.format_datetime(retry_at, usegmt=True)})
+    assert 28 <= blog.retry_after_seconds(error) <= 30
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("429 You exceeded your current quota. Please retry in 38.4s.", 38.4),
+    ("429 Quota exceeded [violations { quota_metric: \"x\" }, retry_delay {\n  seconds: 12\n}\n]", 12),
+    ("429 Resource has been exhausted", None),
+])
+def test_retry_after_from_gemini_text(blog, message, expected):
+    assert blog.retry_after_seconds(RateLimitError(message)) == expected
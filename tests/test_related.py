@@ -0,0 +1,60 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def dense_neighbours(blog, index, top_k):
+    row_ids, weights, norms, _ = blog._tfidf_weights(index)
+    matrix = np.zeros((len(index["posts"]), len(index["terms"])))
+    matrix[row_ids, index["indices"]] = weights / norms[row_ids]
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, -1)
+    return {post["filename"]: [index["posts"][j]["filename"] for j in np.argsort(-similarity[i])[:top_k]
+                               if similarity[i, j] > 0]
+            for i, post in enumerate(index["posts"])}
+
+
+def test_sparse_neighbours_match_dense_product(blog, tmp_path, monkeypatch):
+    shutil.copytree(REPO / "blog", tmp_path / "blog")
+    # A post with no terms at all is an empty CSR row
+    (tmp_path / "blog" / "empty.html").write_text(
+        '<h1>The</h1><div class="blog-content"><p>and the</p><!-- Author Bio -->', encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    index = blog.load_related_index()
+
+    # One block for the whole matrix, then one column per block
+    for cells in (blog.RELATED_BLOCK_CELLS, 1):
+        monkeypatch.setattr(blog, "RELATED_BLOCK_CELLS", cells)
+        for top_k in (1, 3, len(index["posts"])):
+            sparse = blog.related_neighbours(index, top_k)
+            assert {name: [post["filename"] for post in related] for name, related in sparse.items()} \
+                == dense_neighbours(blog, index, top_k)
+
+
+def test_title_decoration_is_dropped(blog):
+    for heading in ("🚀 Cold Starts", "✨ Cold Starts", "\n  🔥✨ Cold Starts", "Cold Starts"):
+        html = f'<h1 class="text-4xl">{heading}</h1><div class="blog-content"><p>x</p><!-- Author Bio -->'
+        assert blog.extract_post_text(html)[0] == "Cold Starts"
+    assert blog.extract_post_text('<h1>"Quoted" title</h1>')[0] == '"Quoted" title'
+
+
+def test_refresh_reopens_only_pages_whose_neighbours_changed(blog, tmp_path, monkeypatch):
+    shutil.copytree(REPO / "blog", tmp_path / "blog")
+    monkeypatch.chdir(tmp_path)
+    blog.refresh_related_posts()
+
+    opened = []
+    real_open = open
+
+    def tracking_open(path, *args, **kwargs):
+        opened.append(Path(path).name)
+        return real_open(path, *args, **kwargs)
+
+    blog.open = tracking_open  # the fixture drops it again
+    assert blog.refresh_related_posts() == []
+    assert not [name for name in opened if name.endswith(".html")]
+    # The cached index is reused, not read back from disk
+    assert "index.json" not in opened
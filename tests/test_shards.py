@@ -0,0 +1,104 @@
+import hashlib
+import json
+import shutil
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def write_shard(directory, posts):
+    directory.mkdir(parents=True)
+    entries = []
+    for topic, name, html, recorded in posts:
+        (directory / name).write_text(html, encoding="utf-8")
+        entries.append({"topic": topic, "title": topic, "file": name,
+                        "sha256": hashlib.sha256(recorded.encode("utf-8")).hexdigest()})
+    manifest = {"shard": 0, "shards": 1, "posts": entries, "skipped": [], "failed": []}
+    (directory / "shard.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+
+def test_merge_leaves_unverified_posts_queued(blog, tmp_path, monkeypatch):
+    (tmp_path / "blog").mkdir()
+    for name in ("index.html", "TEMPLATE.html"):
+        shutil.copy(REPO / "blog" / name, tmp_path / "blog" / name)
+    (tmp_path / "blog" / "topics.md").write_text("Good topic\nTampered topic\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    good = "<html><body><h1>Good topic</h1></body></html>"
+    tampered = "<html><body><h1>Tampered topic</h1></body></html>"
+    write_shard(tmp_path / "shards" / "shard-0", [
+        ("Good topic", "good-topic.html", good, good),
+        ("Tampered topic", "tampered-topic.html", tampered + "<!-- edited -->", tampered),
+    ])
+
+    assert blog.merge_shards("shards", commit=False)
+    with blog.topic_queue() as conn:
+        status = dict(conn.execute("SELECT topic, status FROM topics").fetchall())
+    assert status == {"Good topic": "done", "Tampered topic": "queued"}
+    assert (tmp_path / "blog" / "topics.md").read_text(encoding="utf-8").strip() == "Tampered topic"
+
+
+def test_merge_renames_a_post_whose_filename_is_taken(blog, tmp_path, monkeypatch):
+    (tmp_path / "blog").mkdir()
+    for name in ("index.html", "TEMPLATE.html"):
+        shutil.copy(REPO / "blog" / name, tmp_path / "blog" / name)
+    (tmp_path / "blog" / "topics.md").write_text("Caching, part one\nCaching part one\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    first = "<html><body><h1>Caching, part one</h1></body></html>"
+    second = "<html><body><h1>Caching part one</h1></body></html>"
+    write_shard(tmp_path / "shards" / "shard-0", [("Caching, part one", "caching-part-one.html", first, first)])
+    write_shard(tmp_path / "shards" / "shard-1", [("Caching part one", "caching-part-one.html", second, second)])
+    for shard in (0, 1):
+        manifest_file = tmp_path / "shards" / f"shard-{shard}" / "shard.json"
+        manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+        manifest.update(shard=shard, shards=2)
+        manifest_file.write_text(json.dumps(manifest), encoding="utf-8")
+
+    assert blog.merge_shards("shards", commit=False)
+    assert (tmp_path / "blog" / "caching-part-one.html").read_text(encoding="utf-8") == first
+    assert (tmp_path / "blog" / "caching-part-one-2.html").read_text(encoding="utf-8") == second
+    with blog.topic_queue() as conn:
+        status = dict(conn.execute("SELECT topic, status FROM topics").fetchall())
+    assert status == {"Caching, part one": "done", "Caching part one": "done"}
+
+    # Merging the same output again publishes nothing twice
+    assert blog.merge_shards("shards", commit=False)
+    assert not (tmp_path / "blog" / "caching-part-one-3.html").exists()
+
+
+def test_shard_merges_follow_ups_into_the_existing_post(blog, tmp_path, monkeypatch):
+    shutil.copytree(REPO / "blog", tmp_path / "blog")
+    (tmp_path / "blog" / "topics.md").write_text("Predictive scaling\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    post = "2025-08-24-serverless-function-scaling-explained.html"
+    duplicate = {"filename": post, "title": "Serverless Function Scaling Explained", "similarity": 0.8}
+    calls = []
+
+    def generate(topic, journal):
+        calls.append(journal.get("merge_into"))
+        return '<h2 id="forecasting">Forecasting</h2><p>Predict the load.</p>', "Predictive Scaling"
+
+    monkeypatch.setattr(blog, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(blog, "DUPLICATE_ACTION", "merge")
+    monkeypatch.setattr(blog, "find_duplicate_topic", lambda topic, threshold=None: duplicate)
+    monkeypatch.setattr(blog, "generate_structured_content", generate)
+    monkeypatch.setattr(blog, "warm_provider_clients", lambda: None)
+    monkeypatch.setattr(blog, "connection_report", lambda: None)
+
+    assert blog.run_shard(0, 1, "shards")
+    assert calls == [duplicate]
+    manifest = json.loads((tmp_path / "shards" / "shard-0" / "shard.json").read_text(encoding="utf-8"))
+    assert manifest["posts"][0]["merge_into"] == duplicate
+    assert blog.run_shard(0, 1, "shards")
+    assert len(calls) == 1
+
+    index_before = (tmp_path / "blog" / "index.html").read_text(encoding="utf-8")
+    assert blog.merge_shards("shards", commit=False)
+    html = (tmp_path / "blog" / post).read_text(encoding="utf-8")
+    assert '<h2 id="predictive-scaling">Predictive Scaling</h2>' in html
+    assert '<h3 id="predictive-scaling-forecasting">Forecasting</h3>' in html
+    assert (tmp_path / "blog" / "index.html").read_text(encoding="utf-8").count("blog-card") \
+        == index_before.count("blog-card")
+    with blog.topic_queue() as conn:
+        assert conn.execute("SELECT status FROM topics").fetchone()["status"] == "done"
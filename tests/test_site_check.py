@@ -0,0 +1,24 @@
+def parse(blog, html):
+    parser = blog.PageParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+def test_self_closing_svg_elements_are_balanced(blog):
+    parser = parse(blog, '<div><svg viewBox="0 0 1 1"><path d="x"/><circle r="1"/></svg></div>')
+    assert parser.issues == []
+    assert parser.stack == []
+
+
+def test_unclosed_element_is_reported(blog):
+    parser = parse(blog, "<div><section><p>text</div>")
+    assert [issue["message"] for issue in parser.issues] == ["<section> opened on line 1 is never closed"]
+
+
+def test_toc_link_to_missing_anchor(blog, tmp_path):
+    page = tmp_path / "post.html"
+    page.write_text('<div class="table-of-contents"><ul><li><a href="#gone">Gone</a></li></ul></div>'
+                    '<h2 id="here">Here</h2>', encoding="utf-8")
+    result = blog.check_page(page)
+    assert [issue["check"] for issue in result["issues"]] == ["toc"]
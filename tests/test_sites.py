@@ -0,0 +1,30 @@
+def site(tmp_path, name, **settings):
+    root = tmp_path / name
+    (root / "blog").mkdir(parents=True)
+    return {"name": name, "root": str(root), **settings}
+
+
+def test_sites_in_a_row_keep_their_own_state(blog, tmp_path):
+    shared = str(tmp_path / "shared_state_a")
+    blog.use_site(site(tmp_path, "a", state_dir=shared))
+    assert blog.QUEUE_DB == f"{shared}/topics.db"
+
+    blog.use_site(site(tmp_path, "b"))
+    assert blog.STATE_DIR == ".blog_state"
+    for setting, leaf in blog.SITE_STATE_FILES.items():
+        assert getattr(blog, setting) == f".blog_state/{leaf}"
+        assert shared not in getattr(blog, setting)
+
+
+def test_site_settings_fall_back_to_process_defaults(blog, tmp_path):
+    defaults = {name: getattr(blog, name) for name in blog.SITE_SETTINGS.values()}
+    blog.use_site(site(tmp_path, "a", blog_dir="posts", openai_model="gpt-x", max_tags=2,
+                       slack_webhook_env="NO_SUCH_WEBHOOK_ENV"))
+    assert blog.TEMPLATE_FILE == "posts/TEMPLATE.html"
+    assert blog.MODEL_CASCADE[0] == "openai:gpt-x"
+
+    blog.use_site(site(tmp_path, "b"))
+    for name, value in defaults.items():
+        assert getattr(blog, name) == value
+    assert blog.MODEL_CASCADE == blog._default_site["MODEL_CASCADE"]
+    assert blog.SLACK_WEBHOOK_URL == blog._default_site["SLACK_WEBHOOK_URL"]
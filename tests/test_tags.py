@@ -0,0 +1,47 @@
+import pytest
+
+TAXONOMY = {
+    "Cold Start": {"synonyms": ["cold start", "cold starts"], "weight": 2.0},
+    "AWS Lambda": {"synonyms": ["aws lambda", "lambda function"], "weight": 1.5},
+    "AWS": {"synonyms": ["aws"], "weight": 0.8},
+    "FaaS": {"synonyms": ["faas", "function as a service"], "weight": 1.2},
+    "Start": {"synonyms": ["start"], "weight": 1.0},
+}
+
+
+@pytest.fixture
+def automaton(blog):
+    return blog.build_tag_automaton(TAXONOMY)
+
+
+def test_cold_and_start_apart_are_not_a_cold_start(blog, automaton):
+    scores = blog.scan_tags("A cold morning. Start the server and wait.", automaton)
+    assert "Cold Start" not in scores
+    assert scores == {"Start": 1.0}
+
+
+def test_overlapping_phrases_all_count(blog, automaton):
+    # "aws", "aws lambda" and "lambda function" overlap in one phrase
+    assert blog.scan_tags("an aws lambda function", automaton) == {"AWS": 0.8, "AWS Lambda": 3.0}
+
+
+def test_synonyms_add_up_under_one_tag(blog, automaton):
+    scores = blog.scan_tags("FaaS, or function as a service, bills per call", automaton)
+    assert scores == {"FaaS": pytest.approx(2.4)}
+
+
+def test_matches_stop_at_word_boundaries(blog, automaton):
+    assert blog.scan_tags("restart the starter", automaton) == {}
+    # The plural is its own synonym, not a "cold start" with a trailing letter
+    assert blog.scan_tags("cold starts", automaton) == {"Cold Start": 2.0}
+    assert blog.scan_tags("cold-start, start-up", automaton) == {"Start": 2.0}
+
+
+def test_tags_rank_by_weight_with_title_boost(blog, monkeypatch):
+    monkeypatch.setattr(blog, "_tag_automaton", blog.build_tag_automaton(TAXONOMY))
+    body = "aws aws aws. One cold start."
+    # AWS 2.4 beats Cold Start 2.0 in the body; the title boost turns that round
+    assert blog.extract_tags("Notes", body, limit=2) == ["AWS", "Cold Start"]
+    # Cold Start 2 + 3 * 2, Start (inside "cold start") 1 + 3 * 1, AWS 2.4
+    assert blog.extract_tags("Cold start notes", body, limit=3) == ["Cold Start", "Start", "AWS"]
+    assert blog.extract_tags("Notes", "nothing relevant here") == blog.DEFAULT_TAGS
@@ -0,0 +1,63 @@
+import json
+from types import SimpleNamespace
+
+
+def completion(finish_reason, content="{}", tokens=100):
+    choice = SimpleNamespace(finish_reason=finish_reason, message=SimpleNamespace(content=content))
+    usage = SimpleNamespace(prompt_tokens=50, completion_tokens=tokens)
+    return SimpleNamespace(choices=[choice], usage=usage)
+
+
+class FakeCompletions:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.limits = []
+
+    def create(self, max_completion_tokens, **kwargs):
+        self.limits.append(max_completion_tokens)
+        return self.responses.pop(0)
+
+
+def fake_client(blog, monkeypatch, responses):
+    completions = FakeCompletions(responses)
+    monkeypatch.setattr(blog, "client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    return completions
+
+
+def test_truncated_completion_is_retried_with_more_room(blog, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    completions = fake_client(blog, monkeypatch, [completion("length", '{"title": "cut'), completion("stop")])
+
+    candidates, usage = blog.call_model("openai:gpt-4o-mini", "Cold starts")
+    assert candidates == ["{}"]
+    assert completions.limits[1] == min(16384, completions.limits[0] * blog.TRUNCATION_RETRY_FACTOR)
+    assert usage == {"input_tokens": 100, "output_tokens": 200, "truncated": 1}
+
+    log = [json.loads(line) for line in (tmp_path / ".blog_state" / "token-usage.jsonl").read_text().splitlines()]
+    assert log[-1]["truncated"] == 1
+    calibration = json.loads((tmp_path / ".blog_state" / "token-calibration.json").read_text())
+    assert calibration["openai"]["output_ratio"] > 1.0
+
+
+def test_truncated_output_at_the_model_maximum_is_rejected(blog, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(blog.MODEL_LIMITS, "gpt-4o-mini", (128000, 1000))
+    completions = fake_client(blog, monkeypatch, [completion("length", '{"title": "cut')] * 32)
+
+    candidates, usage = blog.call_model("openai:gpt-4o-mini", "Cold starts")
+    assert candidates == []
+    # Each split request is retried once, at the model's maximum, then given up on
+    first, retries = completions.limits[::2], completions.limits[1::2]
+    assert len(first) == len(retries) and set(retries) == {1000} and max(first) < 1000
+    assert usage["truncated"] == len(completions.limits)
+
+
+def test_gemini_candidates_cut_off_at_the_limit_are_dropped(blog):
+    def candidate(reason, text):
+        return SimpleNamespace(finish_reason=reason, content=SimpleNamespace(parts=[SimpleNamespace(text=text)]))
+
+    response = SimpleNamespace(candidates=[candidate(1, "whole"), candidate(2, "cut")], usage_metadata=None)
+    assert blog.gemini_candidate_texts(response) == ["whole"]
+    assert blog.gemini_usage(response)["truncated"] == 1
+    single = SimpleNamespace(candidates=[candidate(2, "cut")], parts=["cut"], text="cut")
+    assert blog.gemini_candidate_texts(single) == []